@@ -4,8 +4,12 @@ Analysoi yrityksen ja sen kilpailijoiden positioning eri asiakassegmenteissä
 """
 
 import argparse
+import functools
+import json
 import sys
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
 # Lataa ympäristömuuttujat
@@ -33,6 +37,8 @@ from src.copy_extractor import (
 )
 from src.positioning import (
     analyze_positioning,
+    changed_companies,
+    merge_positioning,
     print_positioning_summary,
     create_positioning_matrix
 )
@@ -40,6 +46,413 @@ from src.report_generator import (
     generate_html_report,
     print_report_summary
 )
+from src.http_client import print_connection_stats
+from src.llm_client import print_llm_summary
+from src import http_cache
+from src import llm_cache
+from src import llm_client
+from src import batch_runner
+from src import html_parsing
+from src import rate_limiter
+from src import token_budget
+from src import model_router
+from src import checkpoints
+from src import pipeline
+from src import company_memo
+from src import fingerprints
+from src import tracing
+
+
+def print_stage_banner(title: str):
+    """Tulostaa vaiheen otsikon"""
+    print("\n" + "=" * 60)
+    print(title)
+    print("=" * 60 + "\n")
+
+
+def build_company_list(competitor_data: dict) -> list[dict]:
+    """Kohdeyritys ja kilpailijat muodossa [{"name": "...", "url": "..."}]"""
+    all_companies = [
+        {
+            "name": competitor_data.get('target_company'),
+            "url": competitor_data.get('target_url')
+        }
+    ]
+    all_companies.extend([
+        {
+            "name": comp.get('name'),
+            "url": comp.get('url')
+        }
+        for comp in competitor_data.get('competitors', [])
+    ])
+    return all_companies
+
+
+def run_stage_1(args, api_key: str, inputs: dict) -> dict:
+    """Vaihe 1: kohdeyrityksen analyysi (1A) ja kilpailijoiden haku (1B)"""
+    print_stage_banner("VAIHE 1A/7: Kohdeyrityksen analyysi")
+    
+    company_analysis = analyze_target_company(
+        target_url=args.url,
+        api_key=api_key
+    )
+    
+    # Tulosta yritysanalyysi
+    print_company_analysis(company_analysis)
+    
+    print_stage_banner("VAIHE 1B/7: Kilpailijoiden haku")
+    
+    competitor_data = find_competitors(
+        target_url=args.url,
+        count=args.competitors,
+        api_key=api_key,
+        company_analysis=company_analysis
+    )
+    
+    # Validoi data
+    if not validate_competitor_data(competitor_data):
+        print("\nVIRHE: Kilpailijoiden data on virheellinen!")
+        return None
+    
+    # Tulosta yhteenveto
+    print_competitor_summary(competitor_data)
+    
+    return {"company_analysis": company_analysis, "competitor_data": competitor_data}
+
+
+def run_stage_3(args, api_key: str, inputs: dict, previous: dict = None) -> dict:
+    """Vaihe 3: asiakasreferenssien haku kaikilta yrityksiltä"""
+    print_stage_banner("VAIHE 3/7: Asiakasreferenssien haku")
+    
+    companies = build_company_list(inputs["competitor_data"])
+    
+    # --incremental: yritykset joiden asiakassivut ovat ennallaan käyttävät aiempaa tulosta
+    if previous:
+        fingerprints.remember_all(
+            "customers",
+            companies,
+            previous.get("customer_fingerprints"),
+            previous.get("customers_by_company")
+        )
+    
+    customers_by_company = extract_all_companies_customers(
+        companies=companies,
+        api_key=api_key,
+        deadline_seconds=args.company_deadline,
+        max_workers=args.customer_workers,
+        batch=args.batch_extraction,
+        llm_mode=args.llm_mode
+    )
+    
+    # Tulosta yhteenveto
+    print_customer_summary(customers_by_company)
+    
+    return {
+        "customers_by_company": customers_by_company,
+        "customer_fingerprints": fingerprints.snapshot("customers", companies),
+    }
+
+
+def run_stage_4(args, api_key: str, inputs: dict, previous: dict = None) -> dict:
+    """Vaihe 4: ICP-analyysi asiakkaista"""
+    print_stage_banner("VAIHE 4/7: ICP (Ideal Customer Profile) -analyysi")
+    
+    # --incremental: samoista asiakkaista ei tehdä uusia ICP:itä
+    if previous and previous.get("icp_data") and \
+            previous.get("customers_by_company") == inputs["customers_by_company"]:
+        print("[SAMA] Asiakkaat ennallaan, kaytetaan aiempia ICP:ita")
+        icp_data = previous["icp_data"]
+    else:
+        icp_data = create_icps(
+            customers_by_company=inputs["customers_by_company"],
+            api_key=api_key
+        )
+    
+    # Tulosta yhteenveto
+    print_icp_summary(icp_data)
+    
+    return {"icp_data": icp_data}
+
+
+def run_stage_5(args, api_key: str, inputs: dict) -> dict:
+    """Vaihe 5: etusivujen copyjen haku"""
+    print_stage_banner("VAIHE 5/7: Etusivujen copyjen haku")
+    
+    copies_by_company = extract_all_companies_copy(
+        companies=build_company_list(inputs["competitor_data"]),
+        max_workers=args.scrape_workers
+    )
+    
+    # Tulosta yhteenveto
+    print_copy_summary(copies_by_company)
+    
+    return {"copies_by_company": copies_by_company}
+
+
+def run_stage_6(args, api_key: str, inputs: dict, previous: dict = None) -> dict:
+    """Vaihe 6: positioning-analyysi"""
+    print_stage_banner("VAIHE 6/7: Positioning-analyysi")
+    
+    icps = inputs["icp_data"].get('icps', [])
+    companies = build_company_list(inputs["competitor_data"])
+    previous_positioning = None
+    
+    # --incremental: samoilla ICP:illä pisteytetään uudelleen vain yritykset joiden copy muuttui
+    if previous and previous.get("positioning_data") and previous.get("icp_data") == inputs["icp_data"]:
+        previous_positioning = previous["positioning_data"]
+        companies_to_score = changed_companies(
+            companies,
+            inputs["copies_by_company"],
+            previous.get("copies_by_company") or {},
+            previous_positioning
+        )
+        print(f"[SAMA] {len(companies) - len(companies_to_score)}/{len(companies)} yrityksen copy ennallaan")
+    else:
+        companies_to_score = companies
+    
+    if companies_to_score:
+        positioning_data = analyze_positioning(
+            companies=companies_to_score,
+            icps=icps,
+            copies_by_company=inputs["copies_by_company"],
+            api_key=api_key,
+            llm_mode=args.llm_mode
+        )
+    else:
+        positioning_data = {}
+    
+    if previous_positioning is not None:
+        positioning_data = merge_positioning(previous_positioning, positioning_data, companies, icps)
+    
+    # Tulosta yhteenveto
+    print_positioning_summary(
+        positioning_data=positioning_data,
+        icps=icps
+    )
+    
+    # Luo matriisi (käytetään HTML-raportissa)
+    create_positioning_matrix(positioning_data)
+    
+    return {"positioning_data": positioning_data}
+
+
+def run_stage_7(args, api_key: str, inputs: dict) -> dict:
+    """Vaihe 7: HTML-raportti"""
+    print_stage_banner("VAIHE 7/7: HTML-raportin generointi")
+    
+    output_file = generate_html_report(
+        company_analysis=inputs["company_analysis"],
+        competitor_data=inputs["competitor_data"],
+        customers_by_company=inputs["customers_by_company"],
+        icp_data=inputs["icp_data"],
+        copies_by_company=inputs["copies_by_company"],
+        positioning_data=inputs["positioning_data"],
+        output_file=args.output
+    )
+    
+    # Tulosta yhteenveto
+    print_report_summary(output_file)
+    
+    return {}
+
+
+# Vaiheet jotka saavat aiemman ajon tulokset (previous) --incremental-ajossa
+INCREMENTAL_STAGES = ("3", "4", "6")
+
+
+STAGE_RUNNERS = {
+    "1": run_stage_1,
+    "3": run_stage_3,
+    "4": run_stage_4,
+    "5": run_stage_5,
+    "6": run_stage_6,
+    "7": run_stage_7,
+}
+
+
+def checkpoint_params(args) -> dict:
+    """Parametrit jotka tallennetaan vaiheiden checkpointeihin: {vaihe: parametrit}"""
+    return {"1": {"url": args.url, "competitors": args.competitors}}
+
+
+def select_stages(args, run_dir: str) -> list[str]:
+    """Päättää ajettavat vaiheet --step/--from-step/--resume/--incremental -valitsimien ja checkpointien perusteella"""
+    if args.step:
+        targets = {str(args.step)}
+    elif args.from_step:
+        targets = {s for s in pipeline.STAGE_ORDER if int(s) >= args.from_step}
+    elif args.incremental:
+        # Kilpailijat ladataan checkpointista, muut vaiheet tarkistetaan yrityksittäin
+        targets = set(pipeline.STAGE_ORDER) - {"1"}
+    else:
+        targets = set(pipeline.STAGE_ORDER)
+    
+    if not (args.step or args.from_step or args.resume or args.incremental):
+        return checkpoints.plan(targets, set())
+    
+    available = checkpoints.available_stages(run_dir, checkpoint_params(args))
+    if args.resume:
+        targets -= available
+    
+    # --step ajaa vain pyydetyn vaiheen (ja puuttuvat esivaiheet), ei sen jälkeisiä
+    return checkpoints.plan(targets, available, propagate=not args.step)
+
+
+def run_pipeline(args, api_key: str, run_dir: str) -> tuple[list[str], dict, dict]:
+    """
+    Ajaa valitut vaiheet yhdelle kohdeyritykselle
+    
+    Args:
+        args: Komentoriviparametrit (args.url = kohdeyritys)
+        api_key: OpenAI API-avain
+        run_dir: Kohdeyrityksen checkpointien hakemisto
+    
+    Returns:
+        (ajetut vaiheet, ajoitukset, tulokset nimittäin)
+    
+    Raises:
+        pipeline.StageFailed: Jos vaihe epäonnistui
+    """
+    stages = select_stages(args, run_dir)
+    print(f"Checkpointit: {run_dir}")
+    print(f"Ajettavat vaiheet: {', '.join(stages)}")
+    
+    # Lataa levyltä ne aiempien vaiheiden tulokset, joita ajettavat vaiheet tarvitsevat
+    state = {}
+    for stage in checkpoints.required_checkpoints(stages):
+        state.update(checkpoints.load_stage(run_dir, stage))
+        print(f"[CHECKPOINT] Vaihe {stage} ladattu: {', '.join(pipeline.STAGE_OUTPUTS[stage])}")
+    
+    def save_checkpoint(stage, outputs):
+        if pipeline.STAGE_OUTPUTS[stage]:
+            checkpoints.save_stage(run_dir, stage, outputs, checkpoint_params(args).get(stage))
+    
+    # --incremental: aiemman ajon tulokset luetaan ennen kuin ajo kirjoittaa niiden päälle
+    previous = None
+    if args.incremental:
+        previous = {
+            name: checkpoints.load(run_dir, name)
+            for stage in INCREMENTAL_STAGES + ("5",)
+            for name in pipeline.STAGE_OUTPUTS[stage]
+        }
+    
+    # Riippumattomat vaiheet rinnakkain (esim. 5 samaan aikaan kuin 3 ja 4)
+    runners = {}
+    for stage in stages:
+        if stage in INCREMENTAL_STAGES:
+            runners[stage] = functools.partial(STAGE_RUNNERS[stage], args, api_key, previous=previous)
+        else:
+            runners[stage] = functools.partial(STAGE_RUNNERS[stage], args, api_key)
+    timings = pipeline.run_stages(stages, runners, state, on_complete=save_checkpoint)
+    
+    return stages, timings, state
+
+
+def load_targets(path: str) -> list[str]:
+    """
+    Lukee kohdeyritysten URL:t tiedostosta (yksi per rivi, #-rivit ja tyhjät ohitetaan)
+    
+    Saman yrityksen toistuvat URL:t (esim. www-etuliitteellä) poistetaan.
+    
+    Raises:
+        OSError: Jos tiedostoa ei voi lukea
+    """
+    targets = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            url = line.split("#", 1)[0].strip()
+            if url:
+                targets.setdefault(company_memo.company_key(url), url)
+    return list(targets.values())
+
+
+def run_target(args, api_key: str, url: str) -> dict:
+    """
+    Ajaa yhden kohdeyrityksen erätilassa
+    
+    Returns:
+        {"url", "status", "report", "run_dir", "seconds", "companies"}
+    """
+    run_dir = checkpoints.run_dir_for(url, args.run_dir or checkpoints.DEFAULT_RUNS_DIR)
+    report = os.path.join(args.report_dir, f"{os.path.basename(run_dir)}.html")
+    target_args = argparse.Namespace(**{**vars(args), "url": url, "output": report})
+    
+    print(f"\n[KOHDE] {url} -> {report}")
+    start = time.monotonic()
+    result = {"url": url, "status": "OK", "report": report, "run_dir": run_dir, "companies": []}
+    
+    try:
+        stages, _, state = run_pipeline(target_args, api_key, run_dir)
+        if "7" not in stages:
+            result["report"] = None
+        if "competitor_data" in state:
+            result["companies"] = [c["url"] for c in build_company_list(state["competitor_data"]) if c["url"]]
+    except pipeline.StageFailed as e:
+        print(f"[ERROR] {url}: {e}")
+        result["status"] = "FAIL"
+    except Exception as e:
+        print(f"[ERROR] {url}: {type(e).__name__}: {str(e)}")
+        result["status"] = "ERROR"
+    
+    result["seconds"] = time.monotonic() - start
+    return result
+
+
+def print_batch_summary(results: list[dict], wall_seconds: float):
+    """Tulostaa erätilan yhteenvedon"""
+    references = [company_memo.company_key(url) for r in results for url in r["companies"]]
+    
+    print("\n" + "=" * 60)
+    print(f"ERÄAJON YHTEENVETO ({len(results)} kohdetta)")
+    print("=" * 60)
+    print(f"\n{'Kohde':<30}{'Tila':<7}{'Kesto s':>9}  Raportti")
+    print("-" * 60)
+    
+    for r in results:
+        print(f"{r['url'][:29]:<30}{r['status']:<7}{r['seconds']:>9.1f}  {r['report'] or '-'}")
+    
+    ok = sum(1 for r in results if r["status"] == "OK")
+    print(f"\nOnnistui: {ok}/{len(results)}, kokonaisaika {wall_seconds:.1f} s "
+          f"(kohteet perakkain {sum(r['seconds'] for r in results):.1f} s)")
+    print(f"Yrityksia: {len(set(references))} eri yritysta, {len(references)} viittausta kohteista")
+    company_memo.print_stats()
+    print("\n" + "=" * 60)
+
+
+def run_targets(args, api_key: str, targets: list[str]) -> int:
+    """
+    Erätila: ajaa kohdeyritykset yhteisessä säiepoolissa
+    
+    Sivut (page_store), yritysten asiakkaat ja copyt (company_memo) sekä LLM-vastaukset
+    jaetaan kohteiden kesken, joten useamman kohteen kilpailijana esiintyvä yritys
+    käsitellään vain kerran. Jokaisella kohteella on oma checkpoint-hakemisto ja raportti.
+    
+    Returns:
+        0 jos kaikki kohteet onnistuivat, muuten 1
+    """
+    os.makedirs(args.report_dir, exist_ok=True)
+    start = time.monotonic()
+    
+    with ThreadPoolExecutor(max_workers=max(1, args.target_workers)) as executor:
+        results = list(executor.map(lambda url: run_target(args, api_key, url), targets))
+    
+    wall_seconds = time.monotonic() - start
+    
+    print_connection_stats()
+    print_llm_summary()
+    fingerprints.print_stats()
+    print_batch_summary(results, wall_seconds)
+    
+    summary_file = os.path.join(args.report_dir, "batch_summary.json")
+    with open(summary_file, 'w', encoding='utf-8') as f:
+        json.dump({
+            "seconds": wall_seconds,
+            "targets": results,
+            "company_results": company_memo.get_stats(),
+        }, f, ensure_ascii=False, indent=2)
+    print(f"Yhteenveto tallennettu: {summary_file}")
+    
+    return 0 if all(r["status"] == "OK" for r in results) else 1
 
 
 def main():
@@ -53,15 +466,23 @@ def main():
 Esimerkit:
   python analyzer.py --url https://reaktor.com
   python analyzer.py --url https://meom.fi --competitors 3 --output meom-analyysi.html
+  python analyzer.py --targets kohteet.txt --report-dir raportit
         """
     )
     
-    parser.add_argument(
+    target_group = parser.add_mutually_exclusive_group(required=True)
+    
+    target_group.add_argument(
         "--url",
-        required=True,
         help="Analysoitavan yrityksen URL"
     )
     
+    target_group.add_argument(
+        "--targets",
+        metavar="TIEDOSTO",
+        help="Erätila: tiedosto jossa kohdeyritysten URL:t riveittäin (yhteiset yritykset käsitellään kerran)"
+    )
+    
     parser.add_argument(
         "--competitors",
         type=int,
@@ -76,21 +497,222 @@ Esimerkit:
     )
     
     parser.add_argument(
+        "--report-dir",
+        default="reports",
+        help="Erätilan raporttien ja yhteenvedon hakemisto (oletus: reports)"
+    )
+    
+    parser.add_argument(
+        "--target-workers",
+        type=int,
+        default=2,
+        help="Erätilassa rinnakkain ajettavien kohdeyritysten määrä (oletus: 2)"
+    )
+    
+    parser.add_argument(
+        "--scrape-workers",
+        type=int,
+        default=8,
+        help="Rinnakkaisten sivuhakujen maksimimäärä (oletus: 8)"
+    )
+    
+    parser.add_argument(
+        "--customer-workers",
+        type=int,
+        default=6,
+        help="Rinnakkain käsiteltävien yritysten määrä asiakashaussa (oletus: 6)"
+    )
+    
+    parser.add_argument(
+        "--batch-extraction",
+        action="store_true",
+        help="Lähetä yrityksen asiakassivut LLM:lle erinä (vähemmän kutsuja vaiheessa 3)"
+    )
+    
+    parser.add_argument(
+        "--llm-mode",
+        choices=["sync", "batch"],
+        default="sync",
+        help="LLM-kutsut vaiheissa 3 ja 6: sync = heti, batch = Batch API -erä (yöajot, halvempi)"
+    )
+    
+    parser.add_argument(
+        "--batch-poll-interval",
+        type=float,
+        default=batch_runner.DEFAULT_POLL_INTERVAL,
+        help=f"Batch API -erän tilan tarkistusväli sekunneissa (oletus: {batch_runner.DEFAULT_POLL_INTERVAL})"
+    )
+    
+    parser.add_argument(
+        "--llm-concurrency",
+        type=int,
+        default=llm_client.DEFAULT_MAX_CONCURRENCY,
+        help=f"Samanaikaisten LLM-kutsujen maksimimäärä (oletus: {llm_client.DEFAULT_MAX_CONCURRENCY})"
+    )
+    
+    parser.add_argument(
+        "--token-budget",
+        action="append",
+        default=[],
+        metavar="VAIHE=TOKENIT",
+        help="Vaiheen tokenibudjetti, esim. 3=6000 (vaiheet: "
+             f"{', '.join(token_budget.DEFAULT_BUDGETS)}; voi antaa useita)"
+    )
+    
+    parser.add_argument(
+        "--model-config",
+        metavar="JSON",
+        help="Vaihekohtaiset mallit JSON-tiedostosta, esim. "
+             '{"3": {"model": "gpt-5-mini", "reasoning_effort": "minimal"}} (oletus: gpt-5 kaikille)'
+    )
+    
+    parser.add_argument(
+        "--record-llm",
+        metavar="JSONL",
+        help="Nauhoita LLM-pyynnöt ja vastaukset tiedostoon (test/benchmark_models.py)"
+    )
+    
+    parser.add_argument(
+        "--trace",
+        metavar="JSON",
+        help="Tallenna ajon jäljitys (vaiheet, HTTP-haut, parsinta, LLM-kutsut, odotukset) "
+             "Chrome trace -muodossa ja tulosta aika kategorioittain"
+    )
+    
+    parser.add_argument(
+        "--rate-limit",
+        type=float,
+        default=rate_limiter.DEFAULT_RATE,
+        help=f"Pyyntöjä sekunnissa per sivusto, > 0 (oletus: {rate_limiter.DEFAULT_RATE})"
+    )
+    
+    parser.add_argument(
+        "--company-deadline",
+        type=float,
+        default=60,
+        help="Asiakassivujen hakujen aikabudjetti per yritys sekunneissa (oletus: 60)"
+    )
+    
+    parser.add_argument(
+        "--offline",
+        action="store_true",
+        help="Käytä vain HTTP-välimuistia, ei verkkohakuja (cache only)"
+    )
+    
+    parser.add_argument(
+        "--no-http-cache",
+        action="store_true",
+        help="Ohita HTTP-levyvälimuisti"
+    )
+    
+    parser.add_argument(
+        "--no-llm-cache",
+        action="store_true",
+        help="Ohita LLM-vastausten välimuisti (.cache/llm.sqlite3)"
+    )
+    
+    parser.add_argument(
+        "--html-parser",
+        choices=html_parsing.available_backends(),
+        default=html_parsing.get_backend(),
+        help=f"HTML-parserin backend (oletus: {html_parsing.get_backend()})"
+    )
+    
+    stage_group = parser.add_mutually_exclusive_group()
+    
+    stage_group.add_argument(
         "--step",
         type=int,
         choices=[1, 3, 4, 5, 6, 7],
-        help="Aja vain tietty vaihe (testaus): 1=kilpailijat, 3=asiakkaat, 4=ICP, 5=copyt, jne."
+        help="Aja vain tietty vaihe, aiempien vaiheiden tulokset ladataan checkpointeista: "
+             "1=kilpailijat, 3=asiakkaat, 4=ICP, 5=copyt, 6=positioning, 7=raportti"
+    )
+    
+    stage_group.add_argument(
+        "--from-step",
+        type=int,
+        choices=[1, 3, 4, 5, 6, 7],
+        help="Aja vaiheesta alkaen loppuun, aiemmat vaiheet ladataan checkpointeista"
+    )
+    
+    stage_group.add_argument(
+        "--resume",
+        action="store_true",
+        help="Jatka keskeytynyttä ajoa: aja vain vaiheet joiden checkpoint puuttuu tai on vanhentunut"
+    )
+    
+    stage_group.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Päivitysajo: kilpailijat checkpointista, asiakkaat ja positioning lasketaan uudelleen "
+             "vain yrityksille joiden sivujen sisältö on muuttunut"
+    )
+    
+    parser.add_argument(
+        "--run-dir",
+        help=f"Checkpointien hakemisto (oletus: {checkpoints.DEFAULT_RUNS_DIR}/<kohdeyrityksen domain>; "
+             "erätilassa kohteiden hakemistojen juuri)"
     )
     
     args = parser.parse_args()
     
+    http_cache.configure(
+        enabled=not args.no_http_cache,
+        offline=args.offline
+    )
+    llm_cache.configure(enabled=not args.no_llm_cache)
+    llm_client.configure(max_concurrency=args.llm_concurrency, record_path=args.record_llm)
+    batch_runner.configure(poll_interval=args.batch_poll_interval)
+    try:
+        html_parsing.set_backend(args.html_parser)
+    except ValueError as e:
+        parser.error(f"--html-parser: {e}")
+    try:
+        rate_limiter.configure(rate=args.rate_limit)
+    except ValueError as e:
+        parser.error(f"--rate-limit: {e}")
+    company_memo.configure({"customers": args.customer_workers, "copy": args.scrape_workers})
+    tracing.configure(enabled=bool(args.trace))
+    fingerprints.configure(enabled=args.incremental)
+    
+    budgets = {}
+    for item in args.token_budget:
+        stage, _, tokens = item.partition("=")
+        if not tokens.isdigit():
+            parser.error(f"--token-budget: odotettiin VAIHE=TOKENIT, saatiin '{item}'")
+        budgets[stage] = int(tokens)
+    
+    try:
+        token_budget.configure(budgets)
+    except ValueError as e:
+        parser.error(f"--token-budget: {e}")
+    
+    if args.model_config:
+        try:
+            model_router.load_config(args.model_config)
+        except (OSError, ValueError) as e:
+            parser.error(f"--model-config: {e}")
+    
     # Tulosta otsikko
     print("\n" + "=" * 60)
     print(" " * 15 + "KILPAILIJA-ANALYYSI")
     print("=" * 60)
-    print(f"\nKohdeyritys: {args.url}")
-    print(f"Kilpailijoita haetaan: {args.competitors}")
-    print(f"Raportti tallennettaan: {args.output}")
+    if args.targets:
+        try:
+            targets = load_targets(args.targets)
+        except OSError as e:
+            parser.error(f"--targets: {e}")
+        if not targets:
+            parser.error(f"--targets: tiedostossa ei ole URL-osoitteita: {args.targets}")
+        print(f"\nKohdeyrityksia: {len(targets)} ({args.target_workers} rinnakkain)")
+        print(f"Kilpailijoita haetaan: {args.competitors} per kohde")
+        print(f"Raportit tallennetaan: {args.report_dir}/")
+    else:
+        print(f"\nKohdeyritys: {args.url}")
+        print(f"Kilpailijoita haetaan: {args.competitors}")
+        print(f"Raportti tallennettaan: {args.output}")
+    print("Mallit:")
+    model_router.print_routes()
     print("\n" + "=" * 60)
     
     # Tarkista API-avain
@@ -103,164 +725,25 @@ Esimerkit:
     print(f"\n[OK] API-avain löydetty (pituus: {len(api_key)} merkkiä)")
     
     try:
-        # VAIHE 1A: Yritysanalyysi
-        print("\n" + "=" * 60)
-        print("VAIHE 1A/7: Kohdeyrityksen analyysi")
-        print("=" * 60 + "\n")
-        
-        company_analysis = analyze_target_company(
-            target_url=args.url,
-            api_key=api_key
-        )
-        
-        # Tulosta yritysanalyysi
-        print_company_analysis(company_analysis)
+        if args.targets:
+            return run_targets(args, api_key, targets)
         
-        # VAIHE 1B: Kilpailijoiden haku
-        print("\n" + "=" * 60)
-        print("VAIHE 1B/7: Kilpailijoiden haku")
-        print("=" * 60 + "\n")
-        
-        competitor_data = find_competitors(
-            target_url=args.url,
-            count=args.competitors,
-            api_key=api_key,
-            company_analysis=company_analysis
-        )
+        run_dir = args.run_dir or checkpoints.run_dir_for(args.url)
+        stages, timings, _ = run_pipeline(args, api_key, run_dir)
         
-        # Validoi data
-        if not validate_competitor_data(competitor_data):
-            print("\nVIRHE: Kilpailijoiden data on virheellinen!")
-            return 1
+        print_connection_stats()
+        print_llm_summary()
+        fingerprints.print_stats()
+        pipeline.print_timing(timings)
         
-        # Tulosta yhteenveto
-        print_competitor_summary(competitor_data)
-        
-        # Jos testataan vain vaihetta 1, lopeta tähän
-        if args.step == 1:
-            print("\n[TESTI] Vaihe 1 (1A + 1B) suoritettu. Lopetetaan.")
-            return 0
-        
-        # VAIHE 3: Asiakasreferenssien haku
         print("\n" + "=" * 60)
-        print("VAIHE 3/7: Asiakasreferenssien haku")
-        print("=" * 60 + "\n")
-        
-        # Yhdistä kohdeyritys ja kilpailijat
-        all_companies = [
-            {
-                "name": competitor_data.get('target_company'),
-                "url": competitor_data.get('target_url')
-            }
-        ]
-        all_companies.extend([
-            {
-                "name": comp.get('name'),
-                "url": comp.get('url')
-            }
-            for comp in competitor_data.get('competitors', [])
-        ])
-        
-        # Hae asiakkaat kaikilta
-        customers_by_company = extract_all_companies_customers(
-            companies=all_companies,
-            api_key=api_key
-        )
-        
-        # Tulosta yhteenveto
-        print_customer_summary(customers_by_company)
-        
-        # Jos testataan vain vaiheeseen 3, lopeta tähän
-        if args.step == 3:
-            print("\n[TESTI] Vaihe 3 suoritettu. Lopetetaan.")
-            return 0
-        
-        # VAIHE 4: ICP-analyysi
-        print("\n" + "=" * 60)
-        print("VAIHE 4/7: ICP (Ideal Customer Profile) -analyysi")
-        print("=" * 60 + "\n")
-        
-        icp_data = create_icps(
-            customers_by_company=customers_by_company,
-            api_key=api_key
-        )
-        
-        # Tulosta yhteenveto
-        print_icp_summary(icp_data)
-        
-        # Jos testataan vain vaiheeseen 4, lopeta tähän
-        if args.step == 4:
-            print("\n[TESTI] Vaihe 4 suoritettu. Lopetetaan.")
-            return 0
-        
-        # VAIHE 5: Etusivujen copyjen haku
-        print("\n" + "=" * 60)
-        print("VAIHE 5/7: Etusivujen copyjen haku")
-        print("=" * 60 + "\n")
-        
-        # Käytä samaa all_companies -listaa kuin vaiheessa 3
-        copies_by_company = extract_all_companies_copy(
-            companies=all_companies
-        )
-        
-        # Tulosta yhteenveto
-        print_copy_summary(copies_by_company)
-        
-        # Jos testataan vain vaiheeseen 5, lopeta tähän
-        if args.step == 5:
-            print("\n[TESTI] Vaihe 5 suoritettu. Lopetetaan.")
-            return 0
-        
-        # VAIHE 6: Positioning-analyysi
-        print("\n" + "=" * 60)
-        print("VAIHE 6/7: Positioning-analyysi")
-        print("=" * 60 + "\n")
-        
-        positioning_data = analyze_positioning(
-            companies=all_companies,
-            icps=icp_data.get('icps', []),
-            copies_by_company=copies_by_company,
-            api_key=api_key
-        )
-        
-        # Tulosta yhteenveto
-        print_positioning_summary(
-            positioning_data=positioning_data,
-            icps=icp_data.get('icps', [])
-        )
-        
-        # Luo matriisi (käytetään HTML-raportissa)
-        matrix = create_positioning_matrix(positioning_data)
-        
-        # Jos testataan vain vaiheeseen 6, lopeta tähän
-        if args.step == 6:
-            print("\n[TESTI] Vaihe 6 suoritettu. Lopetetaan.")
-            return 0
-        
-        # VAIHE 7: HTML-raportti
-        print("\n" + "=" * 60)
-        print("VAIHE 7/7: HTML-raportin generointi")
-        print("=" * 60 + "\n")
-        
-        output_file = generate_html_report(
-            company_analysis=company_analysis,
-            competitor_data=competitor_data,
-            customers_by_company=customers_by_company,
-            icp_data=icp_data,
-            copies_by_company=copies_by_company,
-            positioning_data=positioning_data,
-            output_file=args.output
-        )
-        
-        # Tulosta yhteenveto
-        print_report_summary(output_file)
-        
-        print("\n" + "=" * 60)
-        print("ANALYYSI VALMIS!")
+        print("ANALYYSI VALMIS!" if "7" in stages else f"VAIHEET {', '.join(stages)} VALMIIT")
         print("=" * 60)
         
         return 0
         
+    except pipeline.StageFailed:
+        return 1
     except KeyboardInterrupt:
         print("\n\n[INFO] Analyysi keskeytetty käyttäjän toimesta.")
         return 130
@@ -269,6 +752,14 @@ Esimerkit:
         import traceback
         traceback.print_exc()
         return 1
+    finally:
+        if args.trace:
+            tracing.print_summary()
+            try:
+                tracing.export(args.trace)
+                print(f"Jaljitys tallennettu: {args.trace} (chrome://tracing tai ui.perfetto.dev)")
+            except OSError as e:
+                print(f"[WARN] Jaljitysta ei voitu tallentaa: {e}")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,204 @@
+"""
+Batch API -ajotila
+Kerää vaiheiden LLM-pyynnöt JSONL-tiedostoon, lähettää ne eränä, odottaa ja palauttaa vastaukset
+
+Paikallista testipalvelinta varten aseta OPENAI_BASE_URL (esim. http://127.0.0.1:8780/v1).
+"""
+
+import os
+import io
+import json
+import time
+import uuid
+from openai.types.responses import Response
+
+from src.llm_client import get_client, record_call, record_exchange
+from src import llm_cache
+from src import tracing
+
+
+BATCH_ENDPOINT = "/v1/responses"
+COMPLETION_WINDOW = "24h"
+
+# Tilan tarkistusväli ja maksimiodotus sekunneissa
+DEFAULT_POLL_INTERVAL = 30
+DEFAULT_MAX_WAIT = 24 * 60 * 60
+
+# Pyyntötiedostot jätetään tänne vianetsintää varten
+DEFAULT_BATCH_DIR = os.path.join(".cache", "batches")
+
+FINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+_config = {
+    "poll_interval": DEFAULT_POLL_INTERVAL,
+    "max_wait": DEFAULT_MAX_WAIT,
+    "batch_dir": DEFAULT_BATCH_DIR,
+}
+
+
+class BatchError(RuntimeError):
+    """Erä epäonnistui, vanheni tai ei valmistunut ajoissa"""
+
+
+def configure(poll_interval: float = None, max_wait: float = None, batch_dir: str = None):
+    """
+    Muuttaa eräajon asetuksia (None = ei muutosta)
+    
+    Args:
+        poll_interval: Tilan tarkistusväli sekunneissa
+        max_wait: Maksimiodotus sekunneissa
+        batch_dir: Hakemisto johon pyyntötiedostot tallennetaan
+    """
+    for key, value in (
+        ("poll_interval", poll_interval),
+        ("max_wait", max_wait),
+        ("batch_dir", batch_dir),
+    ):
+        if value is not None:
+            _config[key] = value
+
+
+def build_request(custom_id: str, **kwargs) -> dict:
+    """
+    Muodostaa yhden eräpyynnön
+    
+    Args:
+        custom_id: Pyynnön tunniste jolla vastaus yhdistetään takaisin
+        **kwargs: responses.create:n parametrit (model, input, ...)
+    
+    Returns:
+        JSONL-rivin sisältö
+    """
+    return {
+        "custom_id": custom_id,
+        "method": "POST",
+        "url": BATCH_ENDPOINT,
+        "body": kwargs,
+    }
+
+
+def _write_requests(requests: list[dict], stage: str) -> bytes:
+    """Serialisoi pyynnöt JSONL:ksi ja tallentaa kopion levylle"""
+    data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in requests).encode('utf-8')
+    
+    os.makedirs(_config["batch_dir"], exist_ok=True)
+    path = os.path.join(_config["batch_dir"], f"stage{stage}-{int(time.time())}-{uuid.uuid4().hex[:6]}.jsonl")
+    with open(path, 'wb') as f:
+        f.write(data)
+    
+    return data
+
+
+def _wait_for_batch(client, batch_id: str):
+    """Pollaa erää kunnes se on valmis"""
+    started = time.monotonic()
+    
+    while True:
+        batch = client.batches.retrieve(batch_id)
+        if batch.status in FINAL_STATUSES:
+            return batch
+        
+        if time.monotonic() - started > _config["max_wait"]:
+            raise BatchError(f"Era {batch_id} ei valmistunut ajoissa (tila: {batch.status})")
+        
+        counts = batch.request_counts
+        if counts is not None:
+            print(f"  - Era {batch.status}: {counts.completed}/{counts.total} valmiina")
+        tracing.sleep(_config["poll_interval"], "batch poll", batch_id=batch_id)
+
+
+def _read_output(client, file_id: str) -> dict:
+    """Lukee erän tulostiedoston: {custom_id: Response tai None}"""
+    results = {}
+    if not file_id:
+        return results
+    
+    for line in client.files.content(file_id).text.splitlines():
+        if not line.strip():
+            continue
+        
+        item = json.loads(line)
+        response = item.get("response") or {}
+        
+        if item.get("error") or response.get("status_code") != 200:
+            results[item.get("custom_id")] = None
+            continue
+        
+        results[item.get("custom_id")] = Response.model_validate(response.get("body", {}))
+    
+    return results
+
+
+def run_batch(requests: list[dict], stage: str, api_key: str = None) -> dict:
+    """
+    Ajaa pyynnöt Batch API:n kautta
+    
+    Välimuistissa jo olevia pyyntöjä ei lähetetä, ja valmiit vastaukset
+    tallennetaan välimuistiin samalla avaimella kuin interaktiivisessa tilassa.
+    
+    Args:
+        requests: build_request:lla muodostetut pyynnöt
+        stage: Vaiheen tunnus metriikoita varten ("3", "6")
+        api_key: OpenAI API-avain
+    
+    Returns:
+        Dictionary: {custom_id: Response} (None jos pyyntö epäonnistui)
+    
+    Raises:
+        BatchError: Jos erä epäonnistuu tai vanhenee
+    """
+    results = {}
+    pending = []
+    
+    for request in requests:
+        hit = llm_cache.load(request["body"])
+        if hit is not None:
+            record_call(stage, 0.0, hit, cached=True)
+            record_exchange(stage, request["body"], hit)
+            results[request["custom_id"]] = hit
+        else:
+            pending.append(request)
+    
+    if not pending:
+        return results
+    
+    client = get_client(api_key)
+    start = time.monotonic()
+    
+    print(f"  - Lahetetaan {len(pending)} pyyntoa Batch API:lle ({len(results)} valimuistista)")
+    
+    data = _write_requests(pending, stage)
+    input_file = client.files.create(
+        file=(f"stage{stage}.jsonl", io.BytesIO(data)),
+        purpose="batch"
+    )
+    batch = client.batches.create(
+        input_file_id=input_file.id,
+        endpoint=BATCH_ENDPOINT,
+        completion_window=COMPLETION_WINDOW,
+        metadata={"stage": str(stage)}
+    )
+    
+    print(f"  - Era {batch.id} luotu, odotetaan...")
+    batch = _wait_for_batch(client, batch.id)
+    
+    if batch.status != "completed":
+        raise BatchError(f"Era {batch.id} paattyi tilaan {batch.status}")
+    
+    outputs = _read_output(client, batch.output_file_id)
+    latency = time.monotonic() - start
+    
+    bodies = {request["custom_id"]: request["body"] for request in pending}
+    for custom_id, body in bodies.items():
+        response = outputs.get(custom_id)
+        record_call(stage, latency, response, error=response is None)
+        
+        if response is not None:
+            llm_cache.save(body, response, stage)
+            record_exchange(stage, body, response)
+        results[custom_id] = response
+    
+    failed = sum(1 for custom_id in bodies if results[custom_id] is None)
+    print(f"  [OK] Era valmis: {len(bodies) - failed}/{len(bodies)} onnistui")
+    
+    return results
@@ -0,0 +1,185 @@
+"""
+Vaiheiden välitulokset (checkpointit)
+Jokaisen vaiheen tulos tallennetaan ajohakemistoon JSON-tiedostona, jotta yksittäisen vaiheen voi ajaa
+uudelleen lataamalla aiempien vaiheiden tulokset levyltä
+"""
+
+import os
+import re
+import json
+import time
+import threading
+from urllib.parse import urlparse
+
+from src.pipeline import STAGE_ORDER, STAGE_OUTPUTS, dependencies
+
+
+DEFAULT_RUNS_DIR = "runs"
+
+# Tiedostomuodon versio; eri versiolla tallennettu checkpoint ohitetaan
+# 2: vaiheen 3 tuloksiin lisättiin customer_fingerprints (--incremental)
+CHECKPOINT_VERSION = 2
+
+# Vaiheiden tulokset ja riippuvuudet tulevat pipeline-graafista (vaihe 7 = raportti, ei checkpointia)
+STAGE_DEPENDENCIES = {stage: dependencies(stage) for stage in STAGE_ORDER}
+
+_lock = threading.Lock()
+
+
+def run_dir_for(url: str, base_dir: str = DEFAULT_RUNS_DIR) -> str:
+    """
+    Palauttaa kohdeyrityksen ajohakemiston, esim. runs/meom.fi
+    
+    Args:
+        url: Kohdeyrityksen URL
+        base_dir: Ajohakemistojen juuri
+    """
+    host = urlparse(url if "://" in url else f"https://{url}").netloc or url
+    host = host.lower().removeprefix("www.")
+    return os.path.join(base_dir, re.sub(r'[^a-z0-9.-]+', '-', host).strip('-') or "run")
+
+
+def _path(run_dir: str, name: str) -> str:
+    return os.path.join(run_dir, f"{name}.json")
+
+
+def save(run_dir: str, name: str, data, stage: str, params: dict = None):
+    """
+    Tallentaa yhden tuloksen checkpointiksi (atominen kirjoitus)
+    
+    Args:
+        run_dir: Ajohakemisto
+        name: Tuloksen nimi, esim. "customers_by_company"
+        data: JSON-muotoon sarjallistuva tulos
+        stage: Vaihe joka tuotti tuloksen
+        params: Parametrit joilla tulos tehtiin (ladattaessa verrataan)
+    """
+    os.makedirs(run_dir, exist_ok=True)
+    payload = {
+        "version": CHECKPOINT_VERSION,
+        "name": name,
+        "stage": stage,
+        "created": time.time(),
+        "params": params or {},
+        "data": data,
+    }
+    
+    path = _path(run_dir, name)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with _lock:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(payload, f, ensure_ascii=False, indent=2, default=str)
+        os.replace(tmp_path, path)
+
+
+def _read(run_dir: str, name: str) -> dict:
+    """Lukee checkpointin, None jos puuttuu, on rikki tai eri versiota"""
+    try:
+        with open(_path(run_dir, name), 'r', encoding='utf-8') as f:
+            payload = json.load(f)
+    except (OSError, ValueError):
+        return None
+    
+    if not isinstance(payload, dict) or payload.get("version") != CHECKPOINT_VERSION:
+        return None
+    return payload
+
+
+def load(run_dir: str, name: str):
+    """
+    Lataa tuloksen checkpointista
+    
+    Returns:
+        Tallennettu data, None jos checkpointia ei ole
+    """
+    payload = _read(run_dir, name)
+    return None if payload is None else payload["data"]
+
+
+def save_stage(run_dir: str, stage: str, outputs: dict, params: dict = None):
+    """Tallentaa vaiheen kaikki tulokset"""
+    for name in STAGE_OUTPUTS[stage]:
+        save(run_dir, name, outputs[name], stage, params)
+
+
+def load_stage(run_dir: str, stage: str) -> dict:
+    """
+    Lataa vaiheen kaikki tulokset
+    
+    Raises:
+        FileNotFoundError: Jos jokin vaiheen checkpoint puuttuu
+    """
+    outputs = {}
+    for name in STAGE_OUTPUTS[stage]:
+        payload = _read(run_dir, name)
+        if payload is None:
+            raise FileNotFoundError(f"Checkpoint puuttuu: {_path(run_dir, name)}")
+        outputs[name] = payload["data"]
+    return outputs
+
+
+def available_stages(run_dir: str, params: dict = None) -> set:
+    """
+    Vaiheet joiden checkpointit ovat käyttökelpoisia
+    
+    Checkpoint kelpaa jos se on olemassa, on tehty samoilla parametreilla ja on
+    uudempi kuin kaikkien niiden vaiheiden checkpointit joista se riippuu.
+    
+    Args:
+        run_dir: Ajohakemisto
+        params: {vaihe: parametrit}, esim. {"1": {"url": ..., "competitors": 5}}
+    
+    Returns:
+        Joukko vaiheiden tunnuksia
+    """
+    params = params or {}
+    created = {}
+    
+    for stage in STAGE_ORDER:
+        names = STAGE_OUTPUTS[stage]
+        payloads = [_read(run_dir, name) for name in names]
+        if not names or any(p is None for p in payloads):
+            continue
+        if any(p.get("params", {}) != params.get(stage, {}) for p in payloads):
+            continue
+        
+        oldest = min(p["created"] for p in payloads)
+        deps = STAGE_DEPENDENCIES[stage]
+        if all(dep in created and created[dep] <= oldest for dep in deps):
+            created[stage] = max(p["created"] for p in payloads)
+    
+    return set(created)
+
+
+def plan(targets: set, available: set, propagate: bool = True) -> list[str]:
+    """
+    Päättää mitkä vaiheet ajetaan
+    
+    Args:
+        targets: Pyydetyt vaiheet
+        available: Vaiheet joiden checkpointit kelpaavat
+        propagate: Ajetaanko myös vaiheet joiden syötteet lasketaan uudelleen
+    
+    Returns:
+        Ajettavat vaiheet suoritusjärjestyksessä (puuttuvat esivaiheet mukana)
+    """
+    run = set(targets)
+    
+    # Esivaiheet joilla ei ole checkpointia ajetaan myös
+    for stage in reversed(STAGE_ORDER):
+        if stage in run:
+            run.update(dep for dep in STAGE_DEPENDENCIES[stage] if dep not in available)
+    
+    # Uudelleen lasketun vaiheen jälkeiset vaiheet vanhenevat
+    if propagate:
+        for stage in STAGE_ORDER:
+            if any(dep in run for dep in STAGE_DEPENDENCIES[stage]):
+                run.add(stage)
+    
+    return [stage for stage in STAGE_ORDER if stage in run]
+
+
+def required_checkpoints(stages: list[str]) -> list[str]:
+    """Vaiheet joiden tulokset pitää ladata levyltä, jotta annetut vaiheet voi ajaa"""
+    needed = {dep for stage in stages for dep in STAGE_DEPENDENCIES[stage]} - set(stages)
+    return [stage for stage in STAGE_ORDER if stage in needed]
@@ -0,0 +1,160 @@
+"""
+Ajonaikainen yritystulosten varasto
+Saman yrityksen asiakkaat ja copy lasketaan vain kerran per ajo, vaikka yritys esiintyy usean
+kohdeyrityksen kilpailijana (analyzer.py --targets). Laskentoja rajoittaa lajikohtainen yhteinen
+rinnakkaisuusraja, joten samanaikaisten kohteiden määrä ei kasvata kuormaa.
+"""
+
+import threading
+from contextlib import contextmanager
+from concurrent.futures import Future
+
+from src.page_store import canonical_url
+
+
+_results = {}
+_stats = {}
+_limits = {}
+_lock = threading.Lock()
+
+
+def configure(max_workers: dict = None):
+    """
+    Asettaa lajikohtaiset rinnakkaisuusrajat
+    
+    Args:
+        max_workers: {laji: samanaikaisten laskentojen maksimimäärä}, esim. {"customers": 6}
+    """
+    with _lock:
+        for kind, workers in (max_workers or {}).items():
+            _limits[kind] = threading.BoundedSemaphore(max(1, workers))
+
+
+def company_key(url: str) -> str:
+    """
+    Yrityksen avain: etusivun kanoninen URL ilman polkua
+    
+    Args:
+        url: Yrityksen URL (skeeman voi jättää pois)
+    
+    Returns:
+        Esim. "https://meom.fi/"
+    """
+    url = url.strip()
+    if "://" not in url:
+        url = f"https://{url}"
+    
+    canonical = canonical_url(url)
+    scheme, _, rest = canonical.partition("://")
+    host = rest.split("/", 1)[0].removeprefix("www.")
+    return f"{scheme}://{host}/"
+
+
+def claim(kind: str, url: str) -> tuple[Future, bool]:
+    """
+    Varaa yrityksen tuloksen laskennan
+    
+    Ensimmäinen kutsuja saa varauksen (owner=True) ja asettaa tuloksen
+    settle()-funktiolla. Muut saavat saman Futuren ja odottavat sen tulosta.
+    Käytetään kun tulokset lasketaan yhdessä erässä (Batch API), muuten get_or_compute().
+    
+    Args:
+        kind: Tuloksen laji, esim. "customers"
+        url: Yrityksen URL
+    
+    Returns:
+        (future, owner)
+    """
+    key = (kind, company_key(url))
+    
+    with _lock:
+        future = _results.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _results[key] = future
+        counts = _stats.setdefault(kind, {"computed": 0, "reused": 0})
+        counts["computed" if owner else "reused"] += 1
+    
+    return future, owner
+
+
+def settle(kind: str, url: str, future: Future, result=None, error: BaseException = None):
+    """
+    Asettaa claim()-varauksen tuloksen tai virheen
+    
+    Virhettä ei muisteta: varaus poistetaan ja seuraava kutsuja yrittää uudelleen.
+    """
+    if error is None:
+        future.set_result(result)
+        return
+    
+    with _lock:
+        if _results.get((kind, company_key(url))) is future:
+            del _results[(kind, company_key(url))]
+    future.set_exception(error)
+
+
+@contextmanager
+def slot(kind: str):
+    """Varaa yhden lajin rinnakkaisuusrajan paikan (ei rajaa -> ei odotusta)"""
+    limit = _limits.get(kind)
+    if limit is None:
+        yield
+        return
+    
+    with limit:
+        yield
+
+
+def get_or_compute(kind: str, url: str, compute, *args, **kwargs):
+    """
+    Palauttaa yrityksen tuloksen varastosta, laskee sen ensimmäisellä kerralla
+    
+    Rinnakkaiset kutsut samalle yritykselle odottavat samaa laskentaa. Jos laskenta
+    nostaa poikkeuksen, tulosta ei muisteta ja seuraava kutsuja yrittää uudelleen.
+    
+    Args:
+        kind: Tuloksen laji, esim. "customers" tai "copy" (osa avainta)
+        url: Yrityksen URL
+        compute: Funktio joka laskee tuloksen (kutsutaan args/kwargs-parametreilla)
+    
+    Returns:
+        compute-funktion tulos
+    """
+    future, owner = claim(kind, url)
+    
+    if owner:
+        try:
+            with slot(kind):
+                result = compute(*args, **kwargs)
+        except BaseException as e:
+            settle(kind, url, future, error=e)
+        else:
+            settle(kind, url, future, result)
+    
+    return future.result()
+
+
+def get_stats() -> dict:
+    """Palauttaa {laji: {"computed": n, "reused": n}}"""
+    with _lock:
+        return {kind: dict(counts) for kind, counts in _stats.items()}
+
+
+def print_stats():
+    """Tulostaa kuinka monta yritystulosta laskettiin ja käytettiin uudelleen"""
+    stats = get_stats()
+    if not stats:
+        return
+    
+    print("\nYritystulokset (laskettu / uudelleenkaytetty):")
+    for kind, counts in sorted(stats.items()):
+        print(f"  - {kind}: {counts['computed']} / {counts['reused']}")
+
+
+def clear():
+    """Tyhjentää varaston ja tilastot (uusi ajo)"""
+    with _lock:
+        _results.clear()
+        _stats.clear()
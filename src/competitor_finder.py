@@ -3,8 +3,13 @@ Vaihe 1: Kohdeyrityksen analyysi ja kilpailijoiden haku OpenAI:lla
 """
 
 import os
-from openai import OpenAI
-import json
+import textwrap
+
+from src.llm_client import create_response
+from src.json_repair import parse_json_object
+from src.json_schemas import text_format, COMPANY_ANALYSIS_SCHEMA, COMPETITORS_SCHEMA
+from src.prompts import build_prompt, prompt_cache_key
+from src.model_router import route
 
 
 def safe_print(text):
@@ -45,43 +50,19 @@ def analyze_target_company(target_url: str, api_key: str = None) -> dict:
     if not api_key:
         raise ValueError("OpenAI API-avain puuttuu!")
     
-    client = OpenAI(api_key=api_key)
-    
-    prompt = f"""Analysoi yritys osoitteessa {target_url} ja palauta VAIN JSON (ei muuta tekstiä).
-
-TÄRKEÄÄ:
-- Tee paras mahdollinen analyysi saatavilla olevan tiedon perusteella
-- ÄLÄ kysy mitään, vaan anna paras arvio
-- Palauta PELKKÄ JSON-objekti, ei selityksiä
-
-Analysoi:
-1. Yrityksen nimi
-2. Pääpalvelut ja tuotteet
-3. Asiakaskunta (toimialat, yrityskokoat)
-4. Value proposition
-5. Lyhyt yhteenveto
-
-JSON-rakenne (PAKOLLINEN):
-{{
-    "company_name": "Yrityksen nimi",
-    "url": "{target_url}",
-    "services": ["Palvelu 1", "Palvelu 2"],
-    "products": ["Tuote 1"],
-    "target_customers": "Kuvaus asiakaskunnasta",
-    "customer_segments": ["Segmentti 1", "Segmentti 2"],
-    "value_proposition": "Ydinviesti",
-    "analysis": "Yhteenveto yrityksestä"
-}}
-
-Palauta VAIN ylläoleva JSON, ei muuta."""
+    prompt = build_prompt("1A", {"URL": target_url})
     
     print(f"[1/2] Analysoidaan yritys: {target_url}")
-    print("  - Kaytetaan GPT-5 Responses API...")
+    print(f"  - Kaytetaan {route('1A')['model']} Responses API...")
     
     # RESPONSES API - uusi tapa!
-    response = client.responses.create(
-        model="gpt-5",
-        input=prompt
+    response = create_response(
+        stage="1A",
+        api_key=api_key,
+        **route("1A"),
+        input=prompt,
+        text=text_format("company_analysis", COMPANY_ANALYSIS_SCHEMA),
+        prompt_cache_key=prompt_cache_key("1A")
     )
     
     # Debug
@@ -92,7 +73,7 @@ Palauta VAIN ylläoleva JSON, ei muuta."""
         print(f"[DEBUG] output_text (200 merkkia): {response.output_text[:200]}")
     
     # Parsi vastaus
-    result = json.loads(response.output_text)
+    result = parse_json_object(response.output_text, "Vaiheen 1A vastaus")
     
     print(f"[OK] Yritysanalyysi valmis!")
     print(f"  - Yritys: {result.get('company_name', 'N/A')}")
@@ -139,9 +120,6 @@ def find_competitors(target_url: str, count: int = 5, api_key: str = None, compa
         print("\n[INFO] Yritysanalyysia ei annettu, tehdaan ensin...\n")
         company_analysis = analyze_target_company(target_url, api_key)
     
-    # Luo OpenAI client
-    client = OpenAI(api_key=api_key)
-    
     # Muodosta konteksti yritysanalyysista
     company_context = f"""
     KOHDEYRITYKSEN ANALYYSI:
@@ -159,52 +137,28 @@ def find_competitors(target_url: str, count: int = 5, api_key: str = None, compa
     Analyysi: {company_analysis.get('analysis', 'N/A')}
     """
     
-    # Muodosta prompt
-    prompt = f"""
-    {company_context}
-    
-    TEHTÄVÄ:
-    Etsi {count} pääkilpailijaa tälle yritykselle Suomen markkinassa.
-    
-    Kilpailijat tulee valita seuraavien kriteereiden perusteella:
-    1. Tarjoavat samankaltaisia palveluita/tuotteita
-    2. Palvelevat samankaltaista asiakaskuntaa (huomioi yrityskokojen samankaltaisuus)
-    3. Toimivat Suomessa tai palvelevat aktiivisesti Suomen markkinaa
-    4. Ovat todellisia, olemassa olevia yrityksiä
-    5. Kilpailevat suorasti tai epäsuorasti samasta asiakaskunnasta
-    
-    Palauta vastaus JSON-muodossa:
-    {{
-        "target_company": "{company_analysis.get('company_name', 'N/A')}",
-        "competitors": [
-            {{
-                "name": "Kilpailijan virallinen nimi",
-                "url": "https://kilpailijan-verkkosivu.fi",
-                "description": "1-2 lauseen kuvaus yrityksestä",
-                "similarity_reason": "Miksi tämä on relevantti kilpailija (palvelut, asiakkaat, markkina-asema)"
-            }}
-        ]
-    }}
-    
-    Varmista että:
-    - Löydät täsmälleen {count} kilpailijaa
-    - Kaikki kilpailijat ovat relevantteja kohdeyrityksen analyysiin nähden
-    - URL:t ovat toimivia
-    - similarity_reason selittää selkeästi kilpailija-aseman
-    """
+    # Muodosta prompt (vaihtuva data ohjeiden perään)
+    prompt = build_prompt("1B", {
+        "KILPAILIJOIDEN MÄÄRÄ": count,
+        "KOHDEYRITYKSEN ANALYYSI": textwrap.dedent(company_context).strip(),
+    })
     
     print(f"\n[2/2] Haetaan kilpailijoita...")
-    print("  - Kaytetaan GPT-5 WEB SEARCH...")
+    print(f"  - Kaytetaan {route('1B')['model']} WEB SEARCH...")
     
     # RESPONSES API + WEB SEARCH
-    response = client.responses.create(
-        model="gpt-5",
+    response = create_response(
+        stage="1B",
+        api_key=api_key,
+        **route("1B"),
         tools=[{"type": "web_search"}],  # AKTIVOI WEB SEARCH
-        input=prompt
+        input=prompt,
+        text=text_format("competitors", COMPETITORS_SCHEMA),
+        prompt_cache_key=prompt_cache_key("1B")
     )
     
     # Parsi vastaus
-    result = json.loads(response.output_text)
+    result = parse_json_object(response.output_text, "Vaiheen 1B vastaus")
     
     # Lisää kohdeyrityksen URL ja analyysi
     result["target_url"] = target_url
@@ -1,73 +1,52 @@
 """
 Vaihe 5: Etusivujen copyjen haku
-BeautifulSoup4 - ei tarvita OpenAI:ta
+BeautifulSoup4 (sivuvaraston kautta) - ei tarvita OpenAI:ta
 """
 
 import requests
-from bs4 import BeautifulSoup
-import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
+from src.page_store import get_page
+from src.http_client import is_host_available
+from src.token_budget import budget, truncate_to_tokens
+from src import company_memo
 
-def extract_homepage_copy(url: str, timeout: int = 10) -> dict:
+
+def extract_homepage_copy(url: str, timeout: int = 10, deadline: float = None) -> dict:
     """
     Poimii etusivun tärkeimmät tekstit
     
     Args:
         url: Yrityksen etusivun URL
-        timeout: Timeout sekunneissa
+        timeout: Lukutimeout sekunneissa (yhteyden muodostus erikseen max 5 s)
+        deadline: Aikabudjetin päättymishetki (time.monotonic())
         
     Returns:
         Dictionary copyista tai tyhjä jos epäonnistui
     """
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
         print(f"    Haetaan: {url}")
         
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Poista turha
-        for element in soup(['script', 'style', 'nav', 'footer', 'header', 'aside']):
-            element.decompose()
-        
-        # 1. Etsi hero/pääotsikko (H1)
-        hero_headline = ""
-        h1 = soup.find('h1')
-        if h1:
-            hero_headline = h1.get_text(strip=True)
-        
-        # 2. Etsi alaotsikko (ensimmäinen H2 tai suuri teksti H1:n jälkeen)
-        hero_subheadline = ""
-        h2 = soup.find('h2')
-        if h2:
-            hero_subheadline = h2.get_text(strip=True)
-        
-        # 3. Etsi kaikki otsikot (H1-H3)
-        headlines = []
-        for tag in soup.find_all(['h1', 'h2', 'h3']):
-            text = tag.get_text(strip=True)
-            if text and len(text) > 3:
-                headlines.append(text)
-        
-        # 4. Etsi kappaleet (P)
-        paragraphs = []
-        for p in soup.find_all('p', limit=10):  # Max 10 ensimmäistä
-            text = p.get_text(strip=True)
-            if text and len(text) > 20:  # Vähintään 20 merkkiä
-                paragraphs.append(text)
-        
-        # 5. Yhdistä kaikki tekstit
-        all_text = soup.get_text(separator=' ', strip=True)
-        all_text = ' '.join(all_text.split())  # Puhdista välilyönnit
-        
-        # Rajoita pituutta
-        if len(all_text) > 5000:
-            all_text = all_text[:5000] + "..."
+        page = get_page(url, timeout=timeout, deadline=deadline)
+        document = page["document"]
+        
+        # 1. Hero/pääotsikko (H1)
+        hero_headline = document["h1"]
+        
+        # 2. Alaotsikko (ensimmäinen H2)
+        hero_subheadline = document["h2"]
+        
+        # 3. Kaikki otsikot (H1-H3)
+        headlines = [text for text in document["headlines"] if text and len(text) > 3]
+        
+        # 4. Kappaleet (P), max 10 ensimmäistä, vähintään 20 merkkiä
+        paragraphs = [text for text in document["paragraphs"] if text and len(text) > 20]
+        
+        # 5. Kaikki tekstit
+        all_text = document["copy_text"]
+        
+        # Rajoita pituus vaiheen tokenibudjettiin
+        all_text = truncate_to_tokens(all_text, budget("5"))
         
         # 6. Yritä tunnistaa value proposition (ensimmäinen pidempi kappale)
         main_value_prop = ""
@@ -106,53 +85,75 @@ def extract_homepage_copy(url: str, timeout: int = 10) -> dict:
         return {"url": url, "success": False, "error": str(e)}
 
 
-def extract_all_companies_copy(companies: list[dict]) -> dict:
+def _fetch_company_copy(name: str, url: str) -> dict:
+    """Hakee yhden yrityksen copyn (hostikohtainen nopeusrajoitus on HTTP-kerroksessa)"""
+    if not url:
+        print(f"    [SKIP] {name}: URL puuttuu")
+        return {
+            "url": "",
+            "success": False,
+            "error": "No URL"
+        }
+    
+    if not is_host_available(url):
+        print(f"    [SKIP] {name}: sivusto ei vastaa")
+        return {
+            "url": url,
+            "success": False,
+            "error": "Host unavailable"
+        }
+    
+    try:
+        return company_memo.get_or_compute("copy", url, extract_homepage_copy, url)
+    except Exception as e:
+        print(f"    [ERROR] {name}: {type(e).__name__}: {str(e)}")
+        return {
+            "url": url,
+            "success": False,
+            "error": str(e)
+        }
+
+
+def extract_all_companies_copy(companies: list[dict], max_workers: int = 8) -> dict:
     """
-    Hakee kaikkien yritysten etusivujen copyt
+    Hakee kaikkien yritysten etusivujen copyt rinnakkain
     
     Args:
         companies: Lista yrityksiä [{"name": "...", "url": "..."}]
+        max_workers: Samanaikaisten hakujen maksimimäärä (1 = peräkkäin)
         
     Returns:
-        Dictionary: {yritys_nimi: copy_dict}
+        Dictionary: {yritys_nimi: copy_dict} samassa järjestyksessä kuin companies
     """
     print("\n" + "=" * 60)
     print("ETUSIVUJEN COPYJEN HAKU")
     print("=" * 60)
-    print(f"\nHaetaan etusivujen copyt {len(companies)} yritykselta...")
+    print(f"\nHaetaan etusivujen copyt {len(companies)} yritykselta "
+          f"(max {max_workers} rinnakkain)...")
     
-    copies_by_company = {}
+    results = {}
     
-    for i, company in enumerate(companies, 1):
-        name = company.get('name', 'N/A')
-        url = company.get('url', '')
-        
-        print(f"\n[{i}/{len(companies)}] {name}")
-        
-        if not url:
-            print("    [SKIP] URL puuttuu")
-            copies_by_company[name] = {
-                "url": "",
-                "success": False,
-                "error": "No URL"
-            }
-            continue
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(
+                _fetch_company_copy,
+                company.get('name', 'N/A'),
+                company.get('url', '')
+            ): i
+            for i, company in enumerate(companies)
+        }
         
-        try:
-            copy = extract_homepage_copy(url)
-            copies_by_company[name] = copy
-            
-        except Exception as e:
-            print(f"    [ERROR] {type(e).__name__}: {str(e)}")
-            copies_by_company[name] = {
-                "url": url,
-                "success": False,
-                "error": str(e)
-            }
-        
-        # Pieni viive yritysten välissä
-        if i < len(companies):
-            time.sleep(0.5)
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            name = companies[i].get('name', 'N/A')
+            status = "OK" if results[i].get('success') else "FAIL"
+            print(f"\n[{done}/{len(companies)}] {name}: [{status}]")
+    
+    # Palauta syöttöjärjestyksessä
+    copies_by_company = {}
+    for i, company in enumerate(companies):
+        copies_by_company[company.get('name', 'N/A')] = results[i]
     
     return copies_by_company
 
@@ -5,12 +5,45 @@ BeautifulSoup4 + OpenAI
 
 import os
 import requests
-from bs4 import BeautifulSoup
-from openai import OpenAI
-import json
 import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from urllib.parse import urljoin, urlparse
 
+from src.page_store import get_page
+from src.page_discovery import discover_customer_pages
+from src.http_client import is_host_available
+from src.text_dedup import PageDeduplicator
+from src.llm_client import create_response
+from src.json_repair import parse_json_object
+from src.json_schemas import text_format, CUSTOMERS_SCHEMA, CUSTOMER_BATCH_SCHEMA
+from src.prompts import build_prompt, prompt_cache_key
+from src.model_router import route
+from src.batch_runner import build_request, run_batch
+from src import company_memo
+from src import fingerprints
+from src.fingerprints import pages_fingerprint
+from src.token_budget import budget, count_tokens, truncate_to_tokens
+
+
+# Sivut joilla esiintyy näitä sanoja ovat todennäköisesti asiakassivuja
+CUSTOMER_PAGE_KEYWORDS = ['asiakas', 'referenssi', 'case', 'customer', 'client', 'portfolio', 'työ']
+
+# Kohteliaisuus: samanaikaisten pyyntöjen maksimimäärä samaan hostiin
+MAX_CONCURRENT_PER_HOST = 4
+
+_host_semaphores = {}
+_host_semaphores_guard = threading.Lock()
+
+
+def _host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """Palauttaa hostikohtaisen semaforin samanaikaisten pyyntöjen rajoittamiseen"""
+    host = urlparse(url).netloc.lower()
+    with _host_semaphores_guard:
+        if host not in _host_semaphores:
+            _host_semaphores[host] = threading.BoundedSemaphore(MAX_CONCURRENT_PER_HOST)
+        return _host_semaphores[host]
+
 
 def find_customer_pages(base_url: str) -> list[str]:
     """
@@ -48,49 +81,82 @@ def find_customer_pages(base_url: str) -> list[str]:
     return candidate_urls
 
 
-def scrape_page_text(url: str, timeout: int = 10) -> str:
+def scrape_page(url: str, timeout: int = 10, deadline: float = None) -> tuple[str, str]:
     """
-    Hakee sivun ja poimii tekstisisällön
+    Hakee sivun ja poimii tekstisisällön sekä lopullisen URL:n
     
     Args:
         url: Sivun URL
-        timeout: Timeout sekunneissa
+        timeout: Lukutimeout sekunneissa (yhteyden muodostus erikseen max 5 s)
+        deadline: Yrityksen aikabudjetin päättymishetki (time.monotonic())
         
     Returns:
-        Sivun tekstisisältö (tyhjä string jos epäonnistui)
+        (lopullinen URL uudelleenohjausten jälkeen, sivun teksti).
+        Teksti on tyhjä string jos haku epäonnistui.
     """
     try:
-        headers = {
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        }
-        
-        response = requests.get(url, headers=headers, timeout=timeout)
-        response.raise_for_status()
-        
-        # Parsi HTML
-        soup = BeautifulSoup(response.content, 'html.parser')
-        
-        # Poista turha sisältö
-        for element in soup(['script', 'style', 'nav', 'footer', 'header']):
-            element.decompose()
+        # Sivuvarasto hakee ja parsii sivun vain kerran per ajo
+        page = get_page(url, timeout=timeout, deadline=deadline)
+        text = page["document"]["text"]
         
-        # Hae tekstit
-        text = soup.get_text(separator=' ', strip=True)
-        
-        # Puhdista ylimääräiset välilyönnit
-        text = ' '.join(text.split())
-        
-        return text
+        return page["final_url"], text
         
     except requests.Timeout:
         print(f"  [WARN] Timeout: {url}")
-        return ""
+        return url, ""
     except requests.RequestException as e:
         print(f"  [WARN] Virhe haettaessa {url}: {type(e).__name__}")
-        return ""
+        return url, ""
     except Exception as e:
         print(f"  [WARN] Odottamaton virhe {url}: {type(e).__name__}")
-        return ""
+        return url, ""
+
+
+def scrape_page_text(url: str, timeout: int = 10, deadline: float = None) -> str:
+    """
+    Hakee sivun ja poimii tekstisisällön
+    
+    Args:
+        url: Sivun URL
+        timeout: Lukutimeout sekunneissa (yhteyden muodostus erikseen max 5 s)
+        deadline: Yrityksen aikabudjetin päättymishetki (time.monotonic())
+        
+    Returns:
+        Sivun tekstisisältö (tyhjä string jos epäonnistui)
+    """
+    return scrape_page(url, timeout, deadline)[1]
+
+
+def build_customer_prompt(text: str, company_name: str) -> str:
+    """
+    Muodostaa asiakasnimien poiminnan promptin yhdelle sivulle
+    
+    Args:
+        text: Tekstisisältö sivulta
+        company_name: Yrityksen nimi (kontekstia varten)
+        
+    Returns:
+        Prompt
+    """
+    # Rajoita tekstin pituus vaiheen tokenibudjettiin
+    text_limited = truncate_to_tokens(' '.join(text.split()), budget("3"))
+    
+    return build_prompt("3", {"YRITYS": company_name, "TEKSTI": text_limited})
+
+
+def parse_customer_names(output_text: str) -> list[str]:
+    """
+    Lukee asiakasnimet mallin vastauksesta
+    
+    Raises:
+        json.JSONDecodeError: Jos vastaus ei ole JSONia
+        ValueError: Jos vastaus ei ole JSON-objekti
+    """
+    result = parse_json_object(output_text, "Asiakasvastaus")
+    customers = result.get('customers', [])
+    
+    # Suodata tyhjät ja liian lyhyet
+    return [c.strip() for c in customers if c and len(c.strip()) > 2]
 
 
 def extract_customer_names(text: str, company_name: str, api_key: str = None) -> list[str]:
@@ -115,60 +181,365 @@ def extract_customer_names(text: str, company_name: str, api_key: str = None) ->
     if not api_key:
         raise ValueError("OpenAI API-avain puuttuu!")
     
-    client = OpenAI(api_key=api_key)
+    try:
+        response = create_response(
+            stage="3",
+            api_key=api_key,
+            **route("3"),
+            input=build_customer_prompt(text, company_name),
+            text=text_format("customers", CUSTOMERS_SCHEMA),
+            prompt_cache_key=prompt_cache_key("3")
+        )
+        
+        return parse_customer_names(response.output_text)
+        
+    except ValueError:
+        # json.JSONDecodeError tai vastaus ei ole JSON-objekti
+        print(f"  [WARN] JSON-parsinta epaonnistui yritykselle {company_name}")
+        return []
+    except Exception as e:
+        print(f"  [WARN] Virhe asiakasnimienpoiminnassa: {type(e).__name__}")
+        return []
+
+
+def pack_pages(pages: list[dict], token_budget: int = None) -> list[list[dict]]:
+    """
+    Jakaa sivut eriin niin, että kunkin erän teksti mahtuu tokenibudjettiin
+    
+    Args:
+        pages: Lista sivuja [{"id": "p1", "text": "..."}]
+        token_budget: Erän maksimikoko tokeneina (None = vaiheen "3_batch" budjetti)
+    
+    Returns:
+        Lista eriä (budjettia suurempi sivu on oma eränsä)
+    """
+    if token_budget is None:
+        token_budget = budget("3_batch")
+    
+    batches = []
+    current = []
+    used = 0
+    
+    for page in pages:
+        tokens = min(count_tokens(page["text"]), budget("3"))
+        if current and used + tokens > token_budget:
+            batches.append(current)
+            current = []
+            used = 0
+        current.append(page)
+        used += tokens
     
-    # Rajoita tekstin pituutta (max ~3000 sanaa)
-    words = text.split()[:3000]
-    text_limited = ' '.join(words)
+    if current:
+        batches.append(current)
     
-    prompt = f"""Etsi KAIKKI yritys- ja organisaatioiden nimet seuraavasta tekstistä yrityksen {company_name} sivuilta.
+    return batches
 
-TÄRKEÄÄ:
-- Etsi VAIN yritysten ja organisaatioiden nimet (ei henkilönimiä)
-- Palauta PELKKÄ JSON-lista, ei selityksiä
-- Jos et löydä yhtään, palauta tyhjä lista: {{"customers": []}}
 
-Teksti:
-{text_limited}
+def build_customer_batch_prompt(pages: list[dict], company_name: str) -> str:
+    """
+    Muodostaa asiakasnimien poiminnan promptin usealle sivulle
+    
+    Args:
+        pages: Lista sivuja [{"id": "p1", "text": "..."}]
+        company_name: Yrityksen nimi (kontekstia varten)
+        
+    Returns:
+        Prompt
+    """
+    page_blocks = "\n\n".join(
+        f"=== SIVU {page['id']} ===\n{truncate_to_tokens(' '.join(page['text'].split()), budget('3'))}"
+        for page in pages
+    )
+    
+    return build_prompt("3_batch", {"YRITYS": company_name, "SIVUT": page_blocks})
 
-Palauta JSON:
-{{
-    "customers": ["Yritys 1", "Yritys 2", "Yritys 3"]
-}}
 
-VAIN JSON, ei muuta tekstiä."""
+def parse_customer_batch(output_text: str, page_ids: list[str]) -> dict:
+    """
+    Lukee sivukohtaiset asiakasnimet mallin vastauksesta
+    
+    Args:
+        output_text: Mallin vastaus
+        page_ids: Pyynnössä olleiden sivujen tunnisteet
+    
+    Returns:
+        Dictionary: {sivun_id: [asiakas1, ...]} (tuntemattomat tunnisteet ohitetaan)
+    
+    Raises:
+        json.JSONDecodeError: Jos vastaus ei ole JSONia
+        ValueError: Jos vastaus ei ole JSON-objekti
+    """
+    result = parse_json_object(output_text, "Asiakaserän vastaus")
+    known_ids = set(page_ids)
+    customers_by_page = {}
+    
+    for item in result.get('pages', []):
+        if not isinstance(item, dict):
+            continue
+        page_id = str(item.get('page_id', ''))
+        if page_id not in known_ids:
+            continue
+        customers = [c.strip() for c in item.get('customers', []) if c and len(c.strip()) > 2]
+        customers_by_page.setdefault(page_id, []).extend(customers)
+    
+    return customers_by_page
+
+
+def extract_customer_names_batch(pages: list[dict], company_name: str, api_key: str = None) -> dict:
+    """
+    Poimii asiakasnimet usealta sivulta yhdellä OpenAI-kutsulla
+    
+    Args:
+        pages: Lista sivuja [{"id": "p1", "text": "..."}]
+        company_name: Yrityksen nimi (kontekstia varten)
+        api_key: OpenAI API-avain
+        
+    Returns:
+        Dictionary: {sivun_id: [asiakas1, asiakas2, ...]}
+    """
+    pages = [page for page in pages if page.get("text") and len(page["text"]) >= 50]
+    if not pages:
+        return {}
+    
+    if api_key is None:
+        api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPEN_AI_API")
+    
+    if not api_key:
+        raise ValueError("OpenAI API-avain puuttuu!")
     
     try:
-        response = client.responses.create(
-            model="gpt-5",
-            input=prompt
+        response = create_response(
+            stage="3",
+            api_key=api_key,
+            **route("3"),
+            input=build_customer_batch_prompt(pages, company_name),
+            text=text_format("customer_pages", CUSTOMER_BATCH_SCHEMA),
+            prompt_cache_key=prompt_cache_key("3_batch")
         )
         
-        # Parsi JSON
-        result = json.loads(response.output_text)
-        customers = result.get('customers', [])
-        
-        # Suodata tyhjät ja liian lyhyet
-        customers = [c.strip() for c in customers if c and len(c.strip()) > 2]
-        
-        return customers
+        return parse_customer_batch(response.output_text, [page["id"] for page in pages])
         
-    except json.JSONDecodeError:
+    except ValueError:
+        # json.JSONDecodeError tai vastaus ei ole JSON-objekti
         print(f"  [WARN] JSON-parsinta epaonnistui yritykselle {company_name}")
-        return []
+        return {}
     except Exception as e:
         print(f"  [WARN] Virhe asiakasnimienpoiminnassa: {type(e).__name__}")
+        return {}
+
+
+def _collect_candidate(
+    url: str,
+    company_url: str,
+    stop_event: threading.Event,
+    deadline: float = None,
+    dedup: PageDeduplicator = None
+) -> str:
+    """
+    Hakee yhden ehdokassivun ja tarkistaa kannattaako se lähettää LLM:lle
+    
+    Palauttaa heti tyhjän jos stop_event on asetettu, host ei vastaa tai
+    yrityksen aikabudjetti on käytetty. Sivu jonka sisältö on jo käsitelty
+    (uudelleenohjaus, sama teksti tai lähes-duplikaatti) ohitetaan.
+    
+    Returns:
+        Sivun teksti, tyhjä string jos sivua ei kannata käsitellä
+    """
+    if stop_event.is_set():
+        return ""
+    
+    with _host_semaphore(url):
+        if stop_event.is_set() or not is_host_available(url):
+            return ""
+        if deadline is not None and time.monotonic() >= deadline:
+            return ""
+        final_url, text = scrape_page(url, deadline=deadline)
+    
+    if not text or stop_event.is_set():
+        return ""
+    
+    # Jos sivulla on sanoja "asiakas", "referenssi", "case" jne, todennäköisesti oikea sivu
+    text_lower = text.lower()
+    
+    if not (any(keyword in text_lower for keyword in CUSTOMER_PAGE_KEYWORDS) or url == company_url):
+        return ""
+    
+    if dedup is not None:
+        reason = dedup.check(final_url, text)
+        if reason:
+            print(f"    [-] Duplikaatti ({reason}), ohitetaan: {url[:60]}")
+            return ""
+    
+    print(f"    [OK] Loydetty potentiaalinen sivu: {url[:60]}...")
+    
+    return text
+
+
+def _probe_candidate(
+    url: str,
+    company_url: str,
+    company_name: str,
+    api_key: str,
+    stop_event: threading.Event,
+    deadline: float = None,
+    dedup: PageDeduplicator = None
+) -> list[str]:
+    """Hakee yhden ehdokassivun ja poimii siltä asiakkaat"""
+    text = _collect_candidate(url, company_url, stop_event, deadline, dedup)
+    
+    if not text:
+        return []
+    
+    return _extract_page_customers({"url": url, "text": text}, company_name, api_key, stop_event)
+
+
+def _extract_page_customers(
+    page: dict,
+    company_name: str,
+    api_key: str,
+    stop_event: threading.Event
+) -> list[str]:
+    """
+    Poimii asiakkaat yhdeltä haetulta sivulta
+    
+    Palauttaa heti tyhjän listan jos stop_event on asetettu, jolloin
+    kynnys on jo saavutettu eikä sivua kannata enää lähettää LLM:lle.
+    """
+    if stop_event.is_set():
         return []
+    
+    # Poimi asiakasnimet
+    customers = extract_customer_names(page["text"], company_name, api_key)
+    
+    if customers:
+        print(f"    [OK] Loydetty {len(customers)} asiakasta ({page['url'][:40]})")
+    else:
+        print(f"    [-] Ei asiakkaita taalta ({page['url'][:40]})")
+    
+    return customers
 
 
-def get_all_customers(company_url: str, company_name: str, api_key: str = None) -> list[str]:
+def _discover_candidates(company_url: str, deadline: float) -> list[str]:
+    """
+    Etsii yrityksen ehdokassivut: sitemap ja etusivun linkit, muuten arvatut polut
+    
+    Returns:
+        Lista URL:eja (tyhjä jos sivusto ei vastaa)
+    """
+    candidate_urls = discover_customer_pages(company_url, deadline=deadline)
+    
+    if not is_host_available(company_url):
+        print("    [SKIP] Sivusto ei vastaa")
+        return []
+    
+    if len(candidate_urls) > 1:
+        print(f"    Loydetty {len(candidate_urls) - 1} ehdokassivua (sitemap/linkit)")
+    else:
+        candidate_urls = find_customer_pages(company_url)
+    
+    print(f"    Kokeillaan {len(candidate_urls)} sivua...")
+    
+    return candidate_urls
+
+
+def _collect_pages(
+    candidate_urls: list[str],
+    company_url: str,
+    max_workers: int,
+    deadline: float
+) -> list[dict]:
+    """
+    Hakee kaikki ehdokassivut rinnakkain ilman LLM-kutsuja
+    
+    Returns:
+        Lista sivuja [{"id": "p1", "url": "...", "text": "..."}] ehdokassivujen järjestyksessä
+    """
+    stop_event = threading.Event()
+    dedup = PageDeduplicator()
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        texts = list(executor.map(
+            lambda url: _collect_candidate(url, company_url, stop_event, deadline, dedup),
+            candidate_urls
+        ))
+    
+    return [
+        {"id": f"p{i + 1}", "url": url, "text": text}
+        for i, (url, text) in enumerate(zip(candidate_urls, texts))
+        if text
+    ]
+
+
+def _extract_batched(
+    pages: list[dict],
+    company_name: str,
+    api_key: str,
+    min_customers: int
+) -> list[str]:
+    """
+    Eräajo: lähettää sivut LLM:lle tokenibudjetin kokoisina erinä
+    
+    Returns:
+        Asiakasnimet ehdokassivujen järjestyksessä (voi sisältää duplikaatteja)
+    """
+    batches = pack_pages(pages)
+    
+    if batches:
+        print(f"    Lahetetaan {len(pages)} sivua {len(batches)} LLM-pyynnossa")
+    
+    all_customers = []
+    for batch in batches:
+        customers_by_page = extract_customer_names_batch(batch, company_name, api_key)
+        
+        for page in batch:
+            all_customers.extend(customers_by_page.get(page["id"], []))
+        
+        # Jos löysimme jo paljon asiakkaita, ei tarvitse jatkaa
+        if len(all_customers) > min_customers:
+            break
+    
+    return all_customers
+
+
+def _carry_over_customers(company_url: str, company_name: str) -> list[str]:
+    """--incremental: sivuja ei saatu, käytetään aiempia asiakkaita (tuntematon ei ole muutos)"""
+    previous = fingerprints.carry_over("customers", company_url) if fingerprints.is_enabled() else None
+    
+    if previous is None:
+        return []
+    
+    print(f"    [SAMA] {company_name}: sivuja ei saatu, kaytetaan aiempia asiakkaita ({len(previous)})")
+    return list(previous)
+
+
+def get_all_customers(
+    company_url: str,
+    company_name: str,
+    api_key: str = None,
+    max_workers: int = 5,
+    min_customers: int = 20,
+    deadline_seconds: float = 60,
+    batch: bool = False
+) -> list[str]:
     """
     Hakee kaikki asiakkaat yrityksen sivuilta
     
+    Ehdokassivut haetaan rinnakkain. Kun asiakkaita on löytynyt yli
+    min_customers, odottavat haut ja LLM-poiminnat perutaan. Sivuja ei
+    haeta enää deadline_seconds jälkeen eikä lainkaan, jos host ei vastaa.
+    
+    Päivitysajossa (--incremental) kaikki sivut haetaan ensin ja niistä
+    lasketaan sormenjälki. Jos sivut ovat ennallaan, käytetään aiempia
+    asiakkaita ilman LLM-kutsuja.
+    
     Args:
         company_url: Yrityksen URL
         company_name: Yrityksen nimi
         api_key: OpenAI API-avain
+        max_workers: Rinnakkain käsiteltävien sivujen maksimimäärä
+        min_customers: Kynnys jonka ylittyessä haku lopetetaan
+        deadline_seconds: Yrityksen sivuhakujen aikabudjetti sekunneissa
+        batch: Jos True, sivut lähetetään LLM:lle erinä (vähemmän kutsuja)
         
     Returns:
         Lista uniikkeja asiakasnimiä
@@ -177,90 +548,335 @@ def get_all_customers(company_url: str, company_name: str, api_key: str = None)
     print(f"    URL: {company_url}")
     
     all_customers = []
+    deadline = time.monotonic() + deadline_seconds
     
     # 1. Etsi mahdolliset asiakassivut
-    candidate_urls = find_customer_pages(company_url)
-    print(f"    Kokeillaan {len(candidate_urls)} sivua...")
+    candidate_urls = _discover_candidates(company_url, deadline)
     
-    # 2. Käy läpi sivut
-    for url in candidate_urls:
-        # Pieni viive ettei tule rate limitiä
-        time.sleep(0.5)
-        
-        # Scrape sivu
-        text = scrape_page_text(url)
+    if not candidate_urls:
+        return _carry_over_customers(company_url, company_name)
+    
+    # 2. Erä ja --incremental tarvitsevat kaikki sivut ennen LLM-kutsuja
+    pages = None
+    if batch or fingerprints.is_enabled():
+        pages = _collect_pages(candidate_urls, company_url, max_workers, deadline)
+    
+    if fingerprints.is_enabled():
+        if not pages:
+            return _carry_over_customers(company_url, company_name)
         
-        if not text:
-            continue
+        # Sormenjälki kattaa joka ajossa samat sivut, koska hakuja ei lopeteta kesken
+        fingerprint = pages_fingerprint(pages)
+        fingerprints.record("customers", company_url, fingerprint)
         
-        # Jos sivulla on sanoja "asiakas", "referenssi", "case" jne, todennäköisesti oikea sivu
-        keywords = ['asiakas', 'referenssi', 'case', 'customer', 'client', 'portfolio', 'työ']
-        text_lower = text.lower()
+        previous = fingerprints.lookup("customers", company_url, fingerprint)
+        if previous is not None:
+            print(f"    [SAMA] {company_name}: sivut ennallaan, kaytetaan aiempia asiakkaita ({len(previous)})")
+            return list(previous)
+    
+    if batch:
+        all_customers = _extract_batched(pages, company_name, api_key, min_customers)
+        unique_customers = list(dict.fromkeys(all_customers))
+        print(f"    [DONE] {company_name}: yhteensa {len(unique_customers)} uniikkia asiakasta")
+        return unique_customers
+    
+    # 3. Käy läpi sivut rinnakkain (ilman --incrementalia haku ja poiminta limittyvät)
+    stop_event = threading.Event()
+    results = {}
+    executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+    
+    try:
+        if pages is None:
+            dedup = PageDeduplicator()
+            futures = {
+                executor.submit(
+                    _probe_candidate, url, company_url, company_name, api_key, stop_event, deadline, dedup
+                ): i
+                for i, url in enumerate(candidate_urls)
+            }
+        else:
+            futures = {
+                executor.submit(_extract_page_customers, page, company_name, api_key, stop_event): i
+                for i, page in enumerate(pages)
+            }
         
-        if any(keyword in text_lower for keyword in keywords) or url == company_url:
-            print(f"    [OK] Loydetty potentiaalinen sivu: {url[:60]}...")
+        found = 0
+        for future in as_completed(futures):
+            customers = future.result()
+            results[futures[future]] = customers
+            found += len(customers)
             
-            # Poimi asiakasnimet
-            customers = extract_customer_names(text, company_name, api_key)
-            
-            if customers:
-                print(f"    [OK] Loydetty {len(customers)} asiakasta")
-                all_customers.extend(customers)
-            else:
-                print(f"    [-] Ei asiakkaita taalta")
-        
-        # Jos löysimme jo paljon asiakkaita, ei tarvitse jatkaa
-        if len(all_customers) > 20:
-            break
+            # Jos löysimme jo paljon asiakkaita, ei tarvitse jatkaa
+            if found > min_customers:
+                stop_event.set()
+                break
+    finally:
+        # Peru vielä aloittamattomat haut, käynnissä olevia ei jäädä odottamaan
+        executor.shutdown(wait=False, cancel_futures=True)
     
-    # 3. Poista duplikaatit
-    unique_customers = list(set(all_customers))
+    # 4. Poista duplikaatit (ehdokassivujen järjestyksessä, jotta tulos on toistettava)
+    for i in sorted(results):
+        all_customers.extend(results[i])
+    unique_customers = list(dict.fromkeys(all_customers))
     
-    print(f"    [DONE] Yhteensa {len(unique_customers)} uniikkia asiakasta")
+    print(f"    [DONE] {company_name}: yhteensa {len(unique_customers)} uniikkia asiakasta")
     
     return unique_customers
 
 
-def extract_all_companies_customers(companies: list[dict], api_key: str = None) -> dict:
+def _fetch_company_customers(
+    company: dict,
+    api_key: str,
+    deadline_seconds: float,
+    batch: bool = False
+) -> list[str]:
+    """Hakee yhden yrityksen asiakkaat (virhe -> tyhjä lista)"""
+    name = company.get('name', 'N/A')
+    url = company.get('url', '')
+    
+    if not url:
+        print(f"\n  [SKIP] {name}: URL puuttuu")
+        return []
+    
+    try:
+        # Sama yritys voi olla usean kohteen kilpailija (--targets), haetaan vain kerran
+        return company_memo.get_or_compute(
+            "customers", url, get_all_customers,
+            url, name, api_key, deadline_seconds=deadline_seconds, batch=batch
+        )
+    except Exception as e:
+        print(f"  [ERROR] {name}: {type(e).__name__}: {str(e)}")
+        return _carry_over_customers(url, name)
+
+
+def _collect_company_pages(company: dict, deadline_seconds: float) -> list[dict]:
+    """Hakee yhden yrityksen ehdokassivut Batch API -tilaa varten (virhe -> tyhjä lista)"""
+    name = company.get('name', 'N/A')
+    url = company.get('url', '')
+    
+    if not url:
+        print(f"\n  [SKIP] {name}: URL puuttuu")
+        return []
+    
+    print(f"\n  Haetaan sivuja: {name}")
+    
+    try:
+        # Sama yhteinen rinnakkaisuusraja kuin sync-tilan yrityshauilla
+        with company_memo.slot("customers"):
+            deadline = time.monotonic() + deadline_seconds
+            candidate_urls = _discover_candidates(url, deadline)
+            pages = _collect_pages(candidate_urls, url, 5, deadline)
+    except Exception as e:
+        print(f"  [ERROR] {name}: {type(e).__name__}: {str(e)}")
+        return []
+    
+    return [page for page in pages if len(page["text"]) >= 50]
+
+
+def _extract_all_via_batch_api(
+    companies: list[dict],
+    api_key: str,
+    deadline_seconds: float,
+    max_workers: int,
+    batch: bool
+) -> dict:
     """
-    Hakee kaikkien yritysten asiakkaat
+    Batch API -tila: hakee kaikkien yritysten sivut, lähettää poiminnat
+    yhtenä eränä ja kokoaa tulokset takaisin yrityksittäin
+    
+    Sama yritys voi olla usean kohteen kilpailija (--targets): vain ensimmäinen
+    varaaja hakee sen sivut ja lähettää pyynnöt, muut odottavat sen tulosta.
     
-    Args:
-        companies: Lista yrityksiä (dict: name, url)
-        api_key: OpenAI API-avain
-        
     Returns:
-        Dictionary: {yritys_nimi: [asiakas1, asiakas2, ...]}
+        Dictionary: {yritys_nimi: [asiakas1, ...]} samassa järjestyksessä kuin companies
     """
-    print("\n" + "=" * 60)
-    print("ASIAKASREFERENSSIEN HAKU")
-    print("=" * 60)
-    print(f"\nHaetaan asiakkaita {len(companies)} yritykselta...")
+    claims = {}
+    owned = []
+    
+    for i, company in enumerate(companies):
+        url = company.get('url', '')
+        if url:
+            claims[i], owner = company_memo.claim("customers", url)
+            if not owner:
+                print(f"\n  [SAMA] {company.get('name', 'N/A')}: asiakkaat haetaan jo toisen kohteen kautta")
+                continue
+        owned.append(i)
+    
+    try:
+        results = _batch_api_customers(
+            [companies[i] for i in owned], api_key, deadline_seconds, max_workers, batch
+        )
+    except BaseException as e:
+        for i in owned:
+            if i in claims:
+                company_memo.settle("customers", companies[i]['url'], claims[i], error=e)
+        raise
+    
+    # Omat tulokset jaetaan ennen kuin odotetaan muita, joten kohteet eivät jää odottamaan toisiaan
+    customers_by_index = dict(zip(owned, results))
+    for i in owned:
+        if i in claims:
+            company_memo.settle("customers", companies[i]['url'], claims[i], customers_by_index[i])
     
     customers_by_company = {}
+    for i, company in enumerate(companies):
+        name = company.get('name', 'N/A')
+        if i not in customers_by_index:
+            try:
+                customers_by_index[i] = claims[i].result()
+            except Exception as e:
+                print(f"  [ERROR] {name}: {type(e).__name__}: {str(e)}")
+                customers_by_index[i] = []
+        customers_by_company[name] = customers_by_index[i]
+    
+    return customers_by_company
+
+
+def _batch_api_customers(
+    companies: list[dict],
+    api_key: str,
+    deadline_seconds: float,
+    max_workers: int,
+    batch: bool
+) -> list[list[str]]:
+    """
+    Hakee yritysten sivut ja poimii asiakkaat yhdellä Batch API -erällä
     
-    for i, company in enumerate(companies, 1):
+    Returns:
+        Lista uniikkeja asiakasnimiä per yritys, companies-järjestyksessä
+    """
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        pages_by_company = list(executor.map(
+            lambda company: _collect_company_pages(company, deadline_seconds),
+            companies
+        ))
+    
+    # Pyyntö per sivu tai (batch=True) per tokenibudjetin kokoinen sivuerä
+    batch_requests = []
+    owners = {}
+    reused = {}
+    
+    for i, (company, pages) in enumerate(zip(companies, pages_by_company)):
         name = company.get('name', 'N/A')
         url = company.get('url', '')
         
-        print(f"\n[{i}/{len(companies)}] {name}")
+        # Yritykset joiden sivut ovat ennallaan eivät tarvitse pyyntöjä (--incremental)
+        if url and fingerprints.is_enabled():
+            if not pages:
+                # Sivuja ei saatu (tai haku epäonnistui): aiempi tulos pysyy
+                reused[i] = _carry_over_customers(url, name)
+                continue
+            
+            fingerprint = pages_fingerprint(pages)
+            fingerprints.record("customers", url, fingerprint)
+            previous = fingerprints.lookup("customers", url, fingerprint)
+            if previous is not None:
+                print(f"  [SAMA] {name}: sivut ennallaan, kaytetaan aiempia asiakkaita ({len(previous)})")
+                reused[i] = list(previous)
+                continue
+        
+        if batch:
+            for j, group in enumerate(pack_pages(pages)):
+                custom_id = f"c{i}-b{j}"
+                prompt = build_customer_batch_prompt(group, name)
+                owners[custom_id] = (i, [page["id"] for page in group])
+                batch_requests.append(build_request(
+                    custom_id,
+                    **route("3"),
+                    input=prompt,
+                    text=text_format("customer_pages", CUSTOMER_BATCH_SCHEMA),
+                    prompt_cache_key=prompt_cache_key("3_batch")
+                ))
+        else:
+            for page in pages:
+                custom_id = f"c{i}-{page['id']}"
+                owners[custom_id] = (i, None)
+                batch_requests.append(build_request(
+                    custom_id,
+                    **route("3"),
+                    input=build_customer_prompt(page["text"], name),
+                    text=text_format("customers", CUSTOMERS_SCHEMA),
+                    prompt_cache_key=prompt_cache_key("3")
+                ))
+    
+    responses = run_batch(batch_requests, stage="3", api_key=api_key) if batch_requests else {}
+    
+    # Kokoa pyyntöjen järjestyksessä, jotta tulos on toistettava
+    customers_by_index = {i: reused.get(i, []) for i in range(len(companies))}
+    
+    for request in batch_requests:
+        custom_id = request["custom_id"]
+        i, page_ids = owners[custom_id]
+        response = responses.get(custom_id)
         
-        if not url:
-            print("  [SKIP] URL puuttuu")
-            customers_by_company[name] = []
+        if response is None:
             continue
         
         try:
-            customers = get_all_customers(url, name, api_key)
-            customers_by_company[name] = customers
-            
-        except Exception as e:
-            print(f"  [ERROR] {type(e).__name__}: {str(e)}")
-            customers_by_company[name] = []
+            if page_ids is None:
+                customers_by_index[i].extend(parse_customer_names(response.output_text))
+            else:
+                for customers in parse_customer_batch(response.output_text, page_ids).values():
+                    customers_by_index[i].extend(customers)
+        except ValueError:
+            # json.JSONDecodeError tai vastaus ei ole JSON-objekti
+            print(f"  [WARN] JSON-parsinta epaonnistui yritykselle {companies[i].get('name', 'N/A')}")
+    
+    return [list(dict.fromkeys(customers_by_index[i])) for i in range(len(companies))]
+
+
+def extract_all_companies_customers(
+    companies: list[dict],
+    api_key: str = None,
+    deadline_seconds: float = 60,
+    max_workers: int = 6,
+    batch: bool = False,
+    llm_mode: str = "sync"
+) -> dict:
+    """
+    Hakee kaikkien yritysten asiakkaat rinnakkain
+    
+    LLM-kutsujen kokonaismäärää rajoittaa llm_client:n yhteinen
+    rinnakkaisuusraja, joten yritysten määrä ei kasvata kuormaa rajatta.
+    
+    Args:
+        companies: Lista yrityksiä (dict: name, url)
+        api_key: OpenAI API-avain
+        deadline_seconds: Sivuhakujen aikabudjetti per yritys sekunneissa
+        max_workers: Samanaikaisesti käsiteltävien yritysten maksimimäärä (1 = peräkkäin)
+        batch: Jos True, kunkin yrityksen sivut lähetetään LLM:lle erinä
+        llm_mode: "sync" = kutsut heti, "batch" = kaikki poiminnat yhtenä Batch API -eränä
+        
+    Returns:
+        Dictionary: {yritys_nimi: [asiakas1, asiakas2, ...]} samassa järjestyksessä kuin companies
+    """
+    print("\n" + "=" * 60)
+    print("ASIAKASREFERENSSIEN HAKU")
+    print("=" * 60)
+    print(f"\nHaetaan asiakkaita {len(companies)} yritykselta "
+          f"(max {max_workers} rinnakkain)...")
+    
+    if llm_mode == "batch":
+        return _extract_all_via_batch_api(companies, api_key, deadline_seconds, max_workers, batch)
+    
+    results = {}
+    
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = {
+            executor.submit(_fetch_company_customers, company, api_key, deadline_seconds, batch): i
+            for i, company in enumerate(companies)
+        }
         
-        # Pieni tauko yritysten välissä
-        if i < len(companies):
-            time.sleep(1)
+        for done, future in enumerate(as_completed(futures), 1):
+            i = futures[future]
+            results[i] = future.result()
+            name = companies[i].get('name', 'N/A')
+            print(f"\n[{done}/{len(companies)}] {name}: {len(results[i])} asiakasta")
+    
+    # Palauta syöttöjärjestyksessä
+    customers_by_company = {}
+    for i, company in enumerate(companies):
+        customers_by_company[company.get('name', 'N/A')] = results[i]
     
     return customers_by_company
 
@@ -0,0 +1,178 @@
+"""
+Yritysten sisällön sormenjäljet
+Asiakassivujen ja etusivun copyn SHA-256-tiivisteet. Uudelleenajossa (analyzer.py --incremental)
+yrityksen aiempi tulos käytetään sellaisenaan, jos sen sisällön sormenjälki ei ole muuttunut.
+"""
+
+import json
+import hashlib
+import threading
+
+from src.company_memo import company_key
+
+
+# Copyn kentät joita vaihe 6 käyttää; muut kentät eivät vaikuta tulokseen
+COPY_FIELDS = ("success", "hero_headline", "main_value_prop", "full_text")
+
+_enabled = {"on": False}
+_current = {}
+_known = {}
+_stats = {}
+_lock = threading.Lock()
+
+
+def configure(enabled: bool = None):
+    """
+    Kytkee sormenjäljet päälle tai pois (analyzer.py --incremental)
+    
+    Pois päältä asiakassivut käsitellään virtana ja haut loppuvat kun
+    asiakkaita on löytynyt tarpeeksi; sormenjälkeä ei silloin lasketa.
+    """
+    if enabled is not None:
+        _enabled["on"] = enabled
+
+
+def is_enabled() -> bool:
+    return _enabled["on"]
+
+
+def content_fingerprint(value) -> str:
+    """
+    Laskee JSON-muotoon sarjallistuvan arvon sormenjäljen
+    
+    Args:
+        value: Esim. lista sivujen tekstejä
+    
+    Returns:
+        SHA-256 heksana
+    """
+    data = json.dumps(value, ensure_ascii=False, sort_keys=True, default=str)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+
+def pages_fingerprint(pages: list[dict]) -> str:
+    """Asiakassivujen sormenjälki (tekstit järjestyksestä riippumatta)"""
+    return content_fingerprint(sorted(page["text"] for page in pages))
+
+
+def copy_fingerprint(copy_data: dict) -> str:
+    """Etusivun copyn sormenjälki vaiheen 6 käyttämistä kentistä"""
+    return content_fingerprint({field: copy_data.get(field) for field in COPY_FIELDS})
+
+
+def record(kind: str, url: str, fingerprint: str):
+    """Tallentaa tämän ajon sormenjäljen yritykselle"""
+    with _lock:
+        _current[(kind, company_key(url))] = fingerprint
+
+
+def remember(kind: str, url: str, fingerprint: str, result):
+    """
+    Tallentaa aiemman ajon tuloksen uudelleenkäyttöä varten
+    
+    Args:
+        kind: Tuloksen laji, esim. "customers"
+        url: Yrityksen URL
+        fingerprint: Sisällön sormenjälki jolla tulos laskettiin
+        result: Aiempi tulos
+    """
+    with _lock:
+        _known[(kind, company_key(url))] = {"fingerprint": fingerprint, "result": result}
+
+
+def lookup(kind: str, url: str, fingerprint: str):
+    """
+    Palauttaa aiemman tuloksen jos sisältö ei ole muuttunut
+    
+    Returns:
+        Aiempi tulos tai None (ei aiempaa tulosta tai sisältö muuttunut)
+    """
+    with _lock:
+        known = _known.get((kind, company_key(url)))
+        counts = _stats.setdefault(kind, {"unchanged": 0, "changed": 0, "unknown": 0})
+        if known is None or known["fingerprint"] != fingerprint:
+            if known is not None:
+                counts["changed"] += 1
+            return None
+        counts["unchanged"] += 1
+        return known["result"]
+
+
+def carry_over(kind: str, url: str):
+    """
+    Sisältöä ei saatu (esim. tilapäinen hakuvirhe): aiempi sormenjälki ja tulos pysyvät
+    
+    Tyhjä sivujoukko ei kerro että sisältö muuttui, joten aiempaa tulosta ei korvata
+    tyhjällä ja sormenjälki siirtyy tämän ajon checkpointiin sellaisenaan.
+    
+    Returns:
+        Aiempi tulos tai None (ei aiempaa tulosta)
+    """
+    key = (kind, company_key(url))
+    
+    with _lock:
+        known = _known.get(key)
+        if known is None:
+            return None
+        _current[key] = known["fingerprint"]
+        counts = _stats.setdefault(kind, {"unchanged": 0, "changed": 0, "unknown": 0})
+        counts["unknown"] += 1
+        return known["result"]
+
+
+def snapshot(kind: str, companies: list[dict]) -> dict:
+    """
+    Tämän ajon sormenjäljet checkpointiin
+    
+    Args:
+        kind: Tuloksen laji, esim. "customers"
+        companies: Lista yrityksiä [{"name", "url"}]
+    
+    Returns:
+        {yritys_nimi: sormenjälki} yrityksille joille sormenjälki laskettiin
+    """
+    with _lock:
+        fingerprints = {}
+        for company in companies:
+            url = company.get('url')
+            fingerprint = _current.get((kind, company_key(url))) if url else None
+            if fingerprint:
+                fingerprints[company.get('name', 'N/A')] = fingerprint
+        return fingerprints
+
+
+def remember_all(kind: str, companies: list[dict], fingerprints: dict, results: dict):
+    """
+    Tallentaa aiemman ajon checkpointien tulokset yritysten nimien perusteella
+    
+    Args:
+        kind: Tuloksen laji, esim. "customers"
+        companies: Tämän ajon yritykset [{"name", "url"}]
+        fingerprints: Aiemman ajon {yritys_nimi: sormenjälki}
+        results: Aiemman ajon {yritys_nimi: tulos}
+    """
+    for company in companies:
+        name = company.get('name', 'N/A')
+        if company.get('url') and name in (fingerprints or {}) and name in (results or {}):
+            remember(kind, company['url'], fingerprints[name], results[name])
+
+
+def print_stats():
+    """Tulostaa kuinka monen yrityksen tulos käytettiin uudelleen"""
+    with _lock:
+        stats = {kind: dict(counts) for kind, counts in _stats.items()}
+    
+    if not stats:
+        return
+    
+    print("\nSormenjäljet (ennallaan / muuttunut / ei saatu):")
+    for kind, counts in sorted(stats.items()):
+        print(f"  - {kind}: {counts['unchanged']} / {counts['changed']} / {counts['unknown']}")
+
+
+def clear():
+    """Tyhjentää sormenjäljet ja aiemmat tulokset (uusi ajo)"""
+    with _lock:
+        _current.clear()
+        _known.clear()
+        _stats.clear()
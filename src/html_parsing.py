@@ -0,0 +1,271 @@
+"""
+HTML-parsinta vaihdettavalla taustajärjestelmällä
+Kaikki backendit tuottavat saman dokumentin (teksti, otsikot, kappaleet) hyvin muodostetusta HTML:stä.
+Virheellisessä HTML:ssä kappaleet (ja lxml:llä <template>-sisältö) voivat poiketa, ks. test/test_html_parsing.py
+"""
+
+import os
+import re
+from functools import partial
+from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
+
+from src import tracing
+
+try:
+    import lxml.html
+except ImportError:  # pragma: no cover - lxml on requirements.txt:ssä
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser
+except ImportError:
+    LexborHTMLParser = None
+
+
+# Poistetaan ennen sivun tekstin poimintaa (vaihe 3)
+NOISE_TAGS = ['script', 'style', 'nav', 'footer', 'header']
+
+# Poistetaan lisäksi ennen etusivun copyn poimintaa (vaihe 5)
+COPY_NOISE_TAGS = ['aside']
+
+HEADLINE_TAGS = ['h1', 'h2', 'h3']
+
+# Kuinka monta ensimmäistä P-elementtiä poimitaan
+MAX_PARAGRAPHS = 10
+
+# Kuinka monta linkkiä poimitaan (sivujen löytämistä varten)
+MAX_LINKS = 500
+
+DEFAULT_BACKEND = "html.parser"
+
+_XML_DECLARATION = re.compile(r'^\s*<\?xml[^>]*\?>')
+
+
+def _clean(text: str) -> str:
+    """Puhdistaa ylimääräiset välilyönnit"""
+    return ' '.join(text.split())
+
+
+def _empty_document() -> dict:
+    return {
+        "text": "",
+        "h1": "",
+        "h2": "",
+        "headlines": [],
+        "paragraphs": [],
+        "copy_text": "",
+        "links": [],
+    }
+
+
+def _decode(content: bytes) -> str:
+    """Dekoodaa HTML:n samalla tavalla kuin BeautifulSoup (meta charset / arvaus)"""
+    if isinstance(content, str):
+        return content
+    return UnicodeDammit(content, is_html=True).unicode_markup or ""
+
+
+def _parse_bs4(content: bytes, features: str = 'html.parser') -> dict:
+    """BeautifulSoup-backend (html.parser tai lxml-puunrakentaja)"""
+    soup = BeautifulSoup(content, features)
+    
+    # Linkit poimitaan ennen siivousta, koska navigaatio on tärkein lähde
+    links = [
+        {"href": a['href'], "text": a.get_text(separator=' ', strip=True)}
+        for a in soup.find_all('a', href=True, limit=MAX_LINKS)
+    ]
+    
+    # Poista turha sisältö
+    for element in soup(NOISE_TAGS):
+        element.decompose()
+    
+    text = _clean(soup.get_text(separator=' ', strip=True))
+    
+    for element in soup(COPY_NOISE_TAGS):
+        element.decompose()
+    
+    h1 = soup.find('h1')
+    h2 = soup.find('h2')
+    
+    return {
+        "text": text,
+        "h1": h1.get_text(strip=True) if h1 else "",
+        "h2": h2.get_text(strip=True) if h2 else "",
+        "headlines": [tag.get_text(strip=True) for tag in soup.find_all(HEADLINE_TAGS)],
+        "paragraphs": [p.get_text(strip=True) for p in soup.find_all('p', limit=MAX_PARAGRAPHS)],
+        "copy_text": _clean(soup.get_text(separator=' ', strip=True)),
+        "links": links,
+    }
+
+
+def _lxml_text(element, separator: str) -> str:
+    """Vastaa BeautifulSoupin get_text(separator, strip=True) -kutsua"""
+    return separator.join(s.strip() for s in element.itertext() if s.strip())
+
+
+def _parse_lxml(content: bytes) -> dict:
+    """lxml.html-backend (ei BeautifulSoup-puuta lainkaan)"""
+    markup = _XML_DECLARATION.sub('', _decode(content), count=1)
+    if not markup.strip():
+        return _empty_document()
+    
+    try:
+        root = lxml.html.document_fromstring(markup)
+    except lxml.etree.ParserError:
+        return _empty_document()
+    
+    links = []
+    for a in root.iter('a'):
+        if len(links) >= MAX_LINKS:
+            break
+        if a.get('href') is not None:
+            links.append({"href": a.get('href'), "text": _lxml_text(a, ' ')})
+    
+    # drop_tree säilyttää elementin perässä olevan tekstin kuten decompose
+    for element in list(root.iter(*NOISE_TAGS)):
+        element.drop_tree()
+    
+    text = _clean(_lxml_text(root, ' '))
+    
+    for element in list(root.iter(*COPY_NOISE_TAGS)):
+        element.drop_tree()
+    
+    h1 = next(root.iter('h1'), None)
+    h2 = next(root.iter('h2'), None)
+    
+    paragraphs = []
+    for p in root.iter('p'):
+        if len(paragraphs) >= MAX_PARAGRAPHS:
+            break
+        paragraphs.append(_lxml_text(p, ''))
+    
+    return {
+        "text": text,
+        "h1": _lxml_text(h1, '') if h1 is not None else "",
+        "h2": _lxml_text(h2, '') if h2 is not None else "",
+        "headlines": [_lxml_text(tag, '') for tag in root.iter(*HEADLINE_TAGS)],
+        "paragraphs": paragraphs,
+        "copy_text": _clean(_lxml_text(root, ' ')),
+        "links": links,
+    }
+
+
+def _parse_selectolax(content: bytes) -> dict:
+    """selectolax (lexbor) -backend"""
+    markup = _decode(content)
+    if not markup.strip():
+        return _empty_document()
+    
+    tree = LexborHTMLParser(markup)
+    
+    links = [
+        {"href": a.attributes.get('href') or "", "text": a.text(separator=' ', strip=True)}
+        for a in tree.css('a[href]')[:MAX_LINKS]
+    ]
+    
+    tree.strip_tags(NOISE_TAGS)
+    
+    root = tree.root
+    if root is None:
+        return _empty_document()
+    
+    text = _clean(root.text(separator=' ', strip=True))
+    
+    tree.strip_tags(COPY_NOISE_TAGS)
+    
+    h1 = tree.css_first('h1')
+    h2 = tree.css_first('h2')
+    
+    return {
+        "text": text,
+        "h1": h1.text(strip=True) if h1 else "",
+        "h2": h2.text(strip=True) if h2 else "",
+        "headlines": [tag.text(strip=True) for tag in tree.css(', '.join(HEADLINE_TAGS))],
+        "paragraphs": [p.text(strip=True) for p in tree.css('p')[:MAX_PARAGRAPHS]],
+        "copy_text": _clean(root.text(separator=' ', strip=True)),
+        "links": links,
+    }
+
+
+# Nimi -> parsintafunktio (None = riippuvuus puuttuu)
+BACKENDS = {
+    "html.parser": _parse_bs4,
+    "bs4-lxml": partial(_parse_bs4, features='lxml') if lxml else None,
+    "lxml": _parse_lxml if lxml else None,
+    "selectolax": _parse_selectolax if LexborHTMLParser else None,
+}
+
+
+def _initial_backend() -> str:
+    """MEOM_HTML_PARSER tai oletus; tuntematon tai asentamaton arvo -> varoitus ja oletus"""
+    name = os.getenv("MEOM_HTML_PARSER", DEFAULT_BACKEND)
+    
+    if BACKENDS.get(name) is None:
+        print(f"  [WARN] MEOM_HTML_PARSER={name} ei ole kaytettavissa, kaytetaan {DEFAULT_BACKEND}")
+        return DEFAULT_BACKEND
+    
+    return name
+
+
+_backend = _initial_backend()
+
+
+def available_backends() -> list[str]:
+    """Palauttaa käytettävissä olevat backendit"""
+    return [name for name, func in BACKENDS.items() if func is not None]
+
+
+def set_backend(name: str):
+    """
+    Vaihtaa oletus-backendin
+    
+    Args:
+        name: Backendin nimi (ks. BACKENDS)
+    
+    Raises:
+        ValueError: Jos backendia ei ole tai sen riippuvuus puuttuu
+    """
+    global _backend
+    
+    if name not in BACKENDS:
+        raise ValueError(f"Tuntematon HTML-parseri: {name} (vaihtoehdot: {', '.join(BACKENDS)})")
+    if BACKENDS[name] is None:
+        raise ValueError(f"HTML-parseri '{name}' ei ole asennettu")
+    
+    _backend = name
+
+
+def get_backend() -> str:
+    """Palauttaa käytössä olevan backendin nimen"""
+    return _backend
+
+
+def parse_document(content: bytes, backend: str = None) -> dict:
+    """
+    Parsii HTML:n kerran ja poimii vaiheiden 3 ja 5 tarvitsemat tekstit
+    
+    Args:
+        content: Sivun HTML tavuina
+        backend: Backendin nimi (None = oletus)
+    
+    Returns:
+        dict: {
+            "text": "Sivun teksti (vaihe 3)",
+            "h1": "Ensimmäinen H1",
+            "h2": "Ensimmäinen H2",
+            "headlines": ["H1-H3 otsikot"],
+            "paragraphs": ["10 ensimmäisen P:n tekstit"],
+            "copy_text": "Sivun teksti ilman aside-elementtejä (vaihe 5)",
+            "links": [{"href": "...", "text": "Linkin teksti"}]
+        }
+    """
+    name = backend or _backend
+    parse = BACKENDS.get(name)
+    
+    if parse is None:
+        name = DEFAULT_BACKEND
+        parse = BACKENDS[name]
+    
+    with tracing.span("parse", "parse", backend=name, bytes=len(content)):
+        return parse(content)
@@ -0,0 +1,322 @@
+"""
+Pysyvä levyvälimuisti scrapereiden HTTP-vastauksille
+ETag/Last-Modified-ehdolliset haut, TTL, kokorajaan perustuva siivous ja offline-tila
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+import requests
+from requests.structures import CaseInsensitiveDict
+
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "http")
+
+# Näin kauan vastaus on tuore (ei verkkoa lainkaan)
+DEFAULT_TTL = 24 * 60 * 60
+
+# Käyttämättömät merkinnät poistetaan tämän jälkeen
+DEFAULT_MAX_AGE = 30 * 24 * 60 * 60
+
+# Välimuistin maksimikoko, ylittyessä vanhimmat (LRU) poistetaan
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+
+# Nämä statukset tallennetaan, jotta puuttuvia polkuja ei haeta joka ajolla
+CACHEABLE_STATUSES = {200, 203, 404, 410}
+
+# Tallennettavat vastausotsakkeet
+STORED_HEADERS = ['Content-Type', 'ETag', 'Last-Modified', 'Content-Language']
+
+_config = {
+    "enabled": os.getenv("MEOM_HTTP_CACHE", "1") != "0",
+    "cache_dir": os.getenv("MEOM_HTTP_CACHE_DIR", DEFAULT_CACHE_DIR),
+    "ttl": DEFAULT_TTL,
+    "max_age": DEFAULT_MAX_AGE,
+    "max_bytes": DEFAULT_MAX_BYTES,
+    "offline": False,
+}
+
+_lock = threading.Lock()
+_total_bytes = None
+
+
+class CacheMissError(requests.ConnectionError):
+    """Offline-tilassa pyydettyä URL:ia ei löytynyt välimuistista"""
+
+
+def configure(
+    enabled: bool = None,
+    cache_dir: str = None,
+    ttl: int = None,
+    max_age: int = None,
+    max_bytes: int = None,
+    offline: bool = None
+):
+    """
+    Muuttaa välimuistin asetuksia (None = ei muutosta)
+    
+    Args:
+        enabled: Käytetäänkö välimuistia lainkaan
+        cache_dir: Hakemisto johon vastaukset tallennetaan
+        ttl: Tuoreusaika sekunneissa
+        max_age: Käyttämättömän merkinnän maksimi-ikä sekunneissa
+        max_bytes: Välimuistin maksimikoko tavuina
+        offline: Jos True, verkkoon ei mennä lainkaan (vain välimuisti)
+    """
+    global _total_bytes
+    
+    with _lock:
+        for key, value in (
+            ("enabled", enabled),
+            ("cache_dir", cache_dir),
+            ("ttl", ttl),
+            ("max_age", max_age),
+            ("max_bytes", max_bytes),
+            ("offline", offline),
+        ):
+            if value is not None:
+                _config[key] = value
+        
+        if cache_dir is not None:
+            _total_bytes = None
+
+
+def is_enabled() -> bool:
+    """Onko välimuisti käytössä"""
+    return _config["enabled"] or _config["offline"]
+
+
+def is_offline() -> bool:
+    """Onko cache only -tila päällä"""
+    return _config["offline"]
+
+
+def _paths(url: str) -> tuple[str, str]:
+    """Palauttaa (meta, body) -tiedostopolut URL:lle"""
+    key = hashlib.sha256(url.encode('utf-8')).hexdigest()
+    subdir = os.path.join(_config["cache_dir"], key[:2])
+    return os.path.join(subdir, key + ".json"), os.path.join(subdir, key + ".body")
+
+
+def _write_atomic(path: str, data: bytes):
+    """Kirjoittaa tiedoston atomisesti (rinnakkaiset säikeet eivät näe puolikasta)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def load(url: str) -> dict:
+    """
+    Lataa URL:n merkinnän välimuistista
+    
+    Args:
+        url: Haettu URL
+    
+    Returns:
+        Merkintä ({"meta": {...}, "body": bytes}) tai None
+    """
+    if not is_enabled():
+        return None
+    
+    meta_path, body_path = _paths(url)
+    
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            meta = json.load(f)
+        with open(body_path, 'rb') as f:
+            body = f.read()
+    except (OSError, ValueError):
+        return None
+    
+    # LRU: käyttö päivittää mtimen
+    try:
+        os.utime(meta_path, None)
+    except OSError:
+        pass
+    
+    return {"meta": meta, "body": body}
+
+
+def is_fresh(entry: dict) -> bool:
+    """Onko merkintä TTL:n sisällä"""
+    return time.time() - entry["meta"].get("validated_at", 0) < _config["ttl"]
+
+
+def conditional_headers(entry: dict) -> dict:
+    """
+    Muodostaa ehdollisen GET-pyynnön otsakkeet
+    
+    Args:
+        entry: Välimuistimerkintä tai None
+    
+    Returns:
+        Dictionary: If-None-Match / If-Modified-Since
+    """
+    if not entry or entry["meta"].get("status") != 200:
+        return {}
+    
+    headers = {}
+    stored = entry["meta"].get("headers", {})
+    
+    if stored.get("ETag"):
+        headers["If-None-Match"] = stored["ETag"]
+    if stored.get("Last-Modified"):
+        headers["If-Modified-Since"] = stored["Last-Modified"]
+    
+    return headers
+
+
+def to_response(url: str, entry: dict) -> requests.Response:
+    """
+    Rakentaa requests.Response-olion välimuistimerkinnästä
+    
+    Args:
+        url: Pyydetty URL
+        entry: Välimuistimerkintä
+    
+    Returns:
+        requests.Response (from_cache = True)
+    """
+    meta = entry["meta"]
+    
+    response = requests.Response()
+    response.status_code = meta.get("status", 200)
+    response._content = entry["body"]
+    response.headers = CaseInsensitiveDict(meta.get("headers", {}))
+    response.url = meta.get("final_url", url)
+    response.encoding = meta.get("encoding")
+    response.reason = "Cached"
+    response.from_cache = True
+    
+    return response
+
+
+def save(url: str, response: requests.Response):
+    """
+    Tallentaa vastauksen välimuistiin (vain CACHEABLE_STATUSES)
+    
+    Kokorajaan katkaistua runkoa ei tallenneta, jotta osittaista sivua ei
+    tarjota myöhemmissä ajoissa tai 304-vastauksen jälkeen kokonaisena.
+    
+    Args:
+        url: Pyydetty URL
+        response: Vastaus jonka sisältö on jo luettu
+    """
+    global _total_bytes
+    
+    if not _config["enabled"] or response.status_code not in CACHEABLE_STATUSES:
+        return
+    if getattr(response, 'truncated', False):
+        return
+    
+    body = response.content or b""
+    meta = {
+        "url": url,
+        "final_url": response.url,
+        "status": response.status_code,
+        "encoding": response.encoding,
+        "headers": {
+            name: response.headers[name]
+            for name in STORED_HEADERS
+            if name in response.headers
+        },
+        "validated_at": time.time(),
+        "size": len(body),
+    }
+    
+    meta_path, body_path = _paths(url)
+    
+    try:
+        _write_atomic(body_path, body)
+        _write_atomic(meta_path, json.dumps(meta).encode('utf-8'))
+    except OSError as e:
+        print(f"  [WARN] HTTP-valimuistiin kirjoitus epaonnistui: {type(e).__name__}")
+        return
+    
+    with _lock:
+        if _total_bytes is not None:
+            _total_bytes += len(body)
+        over_limit = _total_bytes is None or _total_bytes > _config["max_bytes"]
+    
+    if over_limit:
+        evict()
+
+
+def revalidated(url: str, entry: dict) -> dict:
+    """
+    Merkitsee merkinnän tuoreeksi 304 Not Modified -vastauksen jälkeen
+    
+    Args:
+        url: Pyydetty URL
+        entry: Välimuistimerkintä
+    
+    Returns:
+        Päivitetty merkintä
+    """
+    entry["meta"]["validated_at"] = time.time()
+    meta_path, _ = _paths(url)
+    
+    try:
+        _write_atomic(meta_path, json.dumps(entry["meta"]).encode('utf-8'))
+    except OSError:
+        pass
+    
+    return entry
+
+
+def evict() -> int:
+    """
+    Poistaa vanhentuneet merkinnät ja pienentää välimuistin kokorajan alle
+    
+    Returns:
+        Poistettujen merkintöjen määrä
+    """
+    global _total_bytes
+    
+    cache_dir = _config["cache_dir"]
+    if not os.path.isdir(cache_dir):
+        with _lock:
+            _total_bytes = 0
+        return 0
+    
+    now = time.time()
+    entries = []
+    
+    for root, _, files in os.walk(cache_dir):
+        for name in files:
+            if not name.endswith(".json"):
+                continue
+            meta_path = os.path.join(root, name)
+            body_path = meta_path[:-len(".json")] + ".body"
+            try:
+                used_at = os.path.getmtime(meta_path)
+                size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+            except OSError:
+                continue
+            entries.append((used_at, size, meta_path, body_path))
+    
+    # Vanhimmat ensin
+    entries.sort()
+    total = sum(size for _, size, _, _ in entries)
+    removed = 0
+    
+    for used_at, size, meta_path, body_path in entries:
+        too_old = now - used_at > _config["max_age"]
+        if not too_old and total <= _config["max_bytes"]:
+            break
+        for path in (meta_path, body_path):
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        total -= size
+        removed += 1
+    
+    with _lock:
+        _total_bytes = total
+    
+    return removed
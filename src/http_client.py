@@ -0,0 +1,388 @@
+"""
+Jaettu HTTP-kerros kaikille scrapereille
+Yksi requests.Session: keep-alive-yhteysaltaat per host, pakkaus ja yhtenäiset otsakkeet
+"""
+
+import time
+import threading
+import requests
+from urllib.parse import urlsplit
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import ReadTimeoutError
+from urllib3.util.request import ACCEPT_ENCODING
+
+from src import http_cache
+from src import rate_limiter
+from src import tracing
+
+
+# Sama User-Agent kuin aiemmin scrapereissa
+DEFAULT_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'fi,en;q=0.8',
+    # gzip/deflate aina, br/zstd jos brotli/zstandard on asennettu
+    'Accept-Encoding': ACCEPT_ENCODING,
+}
+
+# Erilliset yhteys- ja lukutimeoutit sekunneissa
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 10
+DEFAULT_TIMEOUT = (CONNECT_TIMEOUT, READ_TIMEOUT)
+
+# 429/503-vastauksen jälkeen yritetään uudelleen korkeintaan näin monta kertaa
+MAX_RATE_LIMIT_RETRIES = 2
+
+# Vastauksesta luetaan korkeintaan näin monta (purettua) tavua
+MAX_CONTENT_BYTES = 2 * 1024 * 1024
+
+# Hyväksytyt sisältötyypit (HTML-sivut, robots.txt, sitemapit)
+ACCEPTED_CONTENT_TYPES = ('text/html', 'application/xhtml+xml', 'text/plain', 'text/xml', 'application/xml')
+
+# Katkaisija: näin monta peräkkäistä yhteysvirhettä -> host ohitetaan loppuajon
+BREAKER_THRESHOLD = 2
+
+# Montako hostia pidetään altaassa ja montako yhteyttä per host
+POOL_CONNECTIONS = 64
+POOL_MAXSIZE = 8
+
+_session = None
+_session_lock = threading.Lock()
+
+# Suljettujen sessioiden tilastot säilötään tänne
+_retired_stats = {}
+
+_host_failures = {}
+_tripped_hosts = set()
+_breaker_lock = threading.Lock()
+
+
+class HostUnavailableError(requests.ConnectionError):
+    """Hostin katkaisija on lauennut, hostia ei yritetä enää tässä ajossa"""
+
+
+class DeadlineExceededError(requests.Timeout):
+    """Yrityksen aikabudjetti on käytetty loppuun"""
+
+
+class ContentRejectedError(requests.RequestException):
+    """Vastaus ei ole HTML/tekstiä tai on ilmoitetulta kooltaan liian suuri"""
+
+
+def _host(url: str) -> str:
+    """Palauttaa URL:n hostin portteineen (pienillä kirjaimilla)"""
+    return urlsplit(url).netloc.lower()
+
+
+def is_host_available(url: str) -> bool:
+    """
+    Onko URL:n host vielä käytettävissä (katkaisija ei ole lauennut)
+    
+    Args:
+        url: Mikä tahansa hostin URL
+        
+    Returns:
+        bool: False jos hostiin ei saatu yhteyttä BREAKER_THRESHOLD kertaa peräkkäin
+    """
+    with _breaker_lock:
+        return _host(url) not in _tripped_hosts
+
+
+def _record_result(url: str, failed: bool):
+    """Päivittää hostin katkaisijan tilan"""
+    host = _host(url)
+    
+    with _breaker_lock:
+        if not failed:
+            _host_failures.pop(host, None)
+            return
+        
+        _host_failures[host] = _host_failures.get(host, 0) + 1
+        if _host_failures[host] >= BREAKER_THRESHOLD and host not in _tripped_hosts:
+            _tripped_hosts.add(host)
+            print(f"  [WARN] Host ei vastaa, ohitetaan loppuajon: {host}")
+
+
+def reset_circuit_breakers():
+    """Nollaa kaikkien hostien katkaisijat"""
+    with _breaker_lock:
+        _host_failures.clear()
+        _tripped_hosts.clear()
+
+
+def _effective_timeout(timeout, deadline: float):
+    """
+    Rajaa (connect, read) -timeoutit jäljellä olevaan aikabudjettiin
+    
+    Returns:
+        ((connect, read), capped): capped=True jos budjetti lyhensi timeoutia
+    """
+    if timeout is None:
+        timeout = DEFAULT_TIMEOUT
+    if not isinstance(timeout, tuple):
+        timeout = (min(CONNECT_TIMEOUT, timeout), timeout)
+    
+    if deadline is None:
+        return timeout, False
+    
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        raise DeadlineExceededError("Yrityksen aikabudjetti kaytetty")
+    
+    capped = remaining < max(timeout)
+    return (min(timeout[0], remaining), min(timeout[1], remaining)), capped
+
+
+def _is_timeout(error: Exception) -> bool:
+    """Onko virhe aikakatkaisu (rungon lukemisen katkaisu tulee ConnectionErrorina)"""
+    if isinstance(error, requests.Timeout):
+        return True
+    return bool(error.args) and isinstance(error.args[0], ReadTimeoutError)
+
+
+def get_session() -> requests.Session:
+    """
+    Palauttaa jaetun HTTP-session (luodaan ensimmäisellä kutsulla)
+    
+    Returns:
+        requests.Session jossa keep-alive-altaat http- ja https-hosteille
+    """
+    global _session
+    
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            session.headers.update(DEFAULT_HEADERS)
+            
+            adapter = HTTPAdapter(
+                pool_connections=POOL_CONNECTIONS,
+                pool_maxsize=POOL_MAXSIZE
+            )
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            
+            _session = session
+        
+        return _session
+
+
+def _read_body(response: requests.Response, max_bytes: int):
+    """
+    Tarkistaa Content-Typen ja Content-Lengthin ennen latausta ja lukee rungon max_bytes asti
+    
+    Raises:
+        ContentRejectedError: Jos sisältö ei ole tekstiä tai on liian suuri
+    """
+    if response.ok:
+        content_type = response.headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+        if content_type and content_type not in ACCEPTED_CONTENT_TYPES:
+            response.close()
+            raise ContentRejectedError(f"Ei HTML-sisaltoa ({content_type}): {response.url}")
+        
+        content_length = response.headers.get('Content-Length', '')
+        if content_length.isdigit() and int(content_length) > max_bytes:
+            response.close()
+            raise ContentRejectedError(f"Liian suuri ({content_length} tavua): {response.url}")
+    
+    chunks = []
+    size = 0
+    truncated = False
+    
+    for chunk in response.iter_content(chunk_size=64 * 1024):
+        chunks.append(chunk)
+        size += len(chunk)
+        if size > max_bytes:
+            truncated = True
+            break
+    
+    if not truncated:
+        # Runko luettu loppuun: close() palauttaa yhteyden altaaseen
+        response._content_consumed = True
+    
+    # Katkaistussa vastauksessa loppu jää lukematta ja yhteys suljetaan
+    response.close()
+    
+    response._content = b''.join(chunks)[:max_bytes]
+    response._content_consumed = True
+    response.truncated = truncated
+
+
+def fetch(
+    url: str,
+    timeout=DEFAULT_TIMEOUT,
+    deadline: float = None,
+    max_bytes: int = MAX_CONTENT_BYTES
+) -> requests.Response:
+    """
+    Hakee URL:n jaetulla sessiolla levyvälimuistin kautta
+    
+    Tuore välimuistimerkintä palautetaan ilman verkkoa. Vanhentunut merkintä
+    tarkistetaan ehdollisella GET:llä (ETag / Last-Modified). Jos hostiin ei
+    ole saatu yhteyttä, haku epäonnistuu heti (katkaisija). Runko ladataan
+    virtana: muu kuin HTML/teksti hylätään otsakkeiden perusteella ja
+    runkoa luetaan korkeintaan max_bytes.
+    
+    Args:
+        url: Haettava URL
+        timeout: (connect, read) tai yksi luku sekunneissa
+        deadline: time.monotonic()-aika johon mennessä haun on valmistuttava
+        max_bytes: Luettavan rungon maksimikoko tavuina
+        
+    Returns:
+        requests.Response (raise_for_status jo kutsuttu)
+        
+    Raises:
+        requests.RequestException: Jos haku epäonnistuu
+        http_cache.CacheMissError: Offline-tilassa jos URL puuttuu välimuistista
+        HostUnavailableError: Jos hostin katkaisija on lauennut
+        DeadlineExceededError: Jos aikabudjetti on käytetty (myös budjetin lyhentämä aikakatkaisu)
+        ContentRejectedError: Jos sisältö ei ole HTML:ää/tekstiä tai on liian suuri
+    """
+    with tracing.span("GET", "http", url=url) as attrs:
+        response = _fetch(url, timeout, deadline, max_bytes)
+        attrs["status"] = response.status_code
+        attrs["bytes"] = len(response.content)
+        attrs["from_cache"] = getattr(response, 'from_cache', False)
+        return response
+
+
+def _fetch(url: str, timeout, deadline: float, max_bytes: int) -> requests.Response:
+    """fetch() ilman jäljitystä"""
+    entry = http_cache.load(url)
+    
+    if entry and (http_cache.is_fresh(entry) or http_cache.is_offline()):
+        response = http_cache.to_response(url, entry)
+        response.raise_for_status()
+        return response
+    
+    if http_cache.is_offline():
+        raise http_cache.CacheMissError(f"Ei valimuistissa (offline): {url}")
+    
+    if not is_host_available(url):
+        raise HostUnavailableError(f"Host ei vastaa: {_host(url)}")
+    
+    for attempt in range(MAX_RATE_LIMIT_RETRIES + 1):
+        # Hostikohtainen token bucket, muiden hostien pyynnöt eivät odota tätä
+        if not rate_limiter.acquire(url, deadline):
+            raise DeadlineExceededError("Yrityksen aikabudjetti kaytetty")
+        
+        effective_timeout, capped = _effective_timeout(timeout, deadline)
+        try:
+            response = get_session().get(
+                url,
+                headers=http_cache.conditional_headers(entry),
+                timeout=effective_timeout,
+                stream=True
+            )
+        except DeadlineExceededError:
+            raise
+        except (requests.ConnectionError, requests.Timeout) as e:
+            # Budjetin lyhentämä timeout ei kerro hostin tilasta: ei katkaisijaan
+            if capped and _is_timeout(e):
+                raise DeadlineExceededError("Yrityksen aikabudjetti kaytetty") from e
+            _record_result(url, failed=True)
+            raise
+        
+        _record_result(url, failed=False)
+        
+        retry_delay = rate_limiter.record_response(
+            url,
+            response.status_code,
+            response.headers.get('Retry-After')
+        )
+        
+        if retry_delay is None or attempt == MAX_RATE_LIMIT_RETRIES:
+            break
+        if deadline is not None and time.monotonic() + retry_delay > deadline:
+            break
+        
+        print(f"  [WARN] {response.status_code} {_host(url)}: odotetaan {retry_delay:.0f} s")
+        response.close()
+    
+    if response.status_code == 304 and entry:
+        response.close()
+        entry = http_cache.revalidated(url, entry)
+        return http_cache.to_response(url, entry)
+    
+    try:
+        _read_body(response, max_bytes)
+    except (requests.ConnectionError, requests.Timeout) as e:
+        if capped and _is_timeout(e):
+            raise DeadlineExceededError("Yrityksen aikabudjetti kaytetty") from e
+        raise
+    
+    http_cache.save(url, response)
+    response.raise_for_status()
+    return response
+
+
+def get_connection_stats() -> dict:
+    """
+    Kokoaa yhteysaltaiden tilastot
+    
+    Returns:
+        Dictionary: {host: {"requests": N, "connections": N, "reused": N}}
+    """
+    stats = {host: dict(values) for host, values in _retired_stats.items()}
+    
+    with _session_lock:
+        session = _session
+    
+    if session is None:
+        return stats
+    
+    seen = set()
+    for adapter in session.adapters.values():
+        if id(adapter) in seen:
+            continue
+        seen.add(id(adapter))
+        
+        pools = adapter.poolmanager.pools
+        for key in list(pools.keys()):
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            
+            host = f"{pool.host}:{pool.port}" if pool.port else pool.host
+            entry = stats.setdefault(host, {"requests": 0, "connections": 0, "reused": 0})
+            entry["requests"] += pool.num_requests
+            entry["connections"] += pool.num_connections
+    
+    for entry in stats.values():
+        entry["reused"] = max(0, entry["requests"] - entry["connections"])
+    
+    return stats
+
+
+def print_connection_stats():
+    """Tulostaa yhteenvedon HTTP-yhteyksien uudelleenkäytöstä"""
+    stats = get_connection_stats()
+    
+    total_requests = sum(s["requests"] for s in stats.values())
+    total_connections = sum(s["connections"] for s in stats.values())
+    
+    print("\n" + "=" * 60)
+    print("HTTP-YHTEYDET - YHTEENVETO")
+    print("=" * 60)
+    print(f"\nPyyntoja {total_requests}, uusia yhteyksia {total_connections}, "
+          f"uudelleenkaytettyja {max(0, total_requests - total_connections)}")
+    print("-" * 60)
+    
+    for host, s in sorted(stats.items()):
+        print(f"  {host}: {s['requests']} pyyntoa / {s['connections']} yhteytta")
+    
+    print("\n" + "=" * 60)
+
+
+def close_session():
+    """Sulkee jaetun session ja säilöö sen tilastot"""
+    global _session
+    
+    stats = get_connection_stats()
+    
+    with _session_lock:
+        if _session is not None:
+            _session.close()
+            _session = None
+        _retired_stats.clear()
+        _retired_stats.update(stats)
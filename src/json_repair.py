@@ -0,0 +1,135 @@
+"""
+Salliva JSON-parseri mallien vastauksille
+Poistaa koodiaidat ja ylimääräisen tekstin, korjaa perässä olevat pilkut ja sulkee katkenneen JSONin
+"""
+
+import re
+import json
+
+
+FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL | re.IGNORECASE)
+TRAILING_COMMA_PATTERN = re.compile(r",(\s*[}\]])")
+
+CLOSERS = {'{': '}', '[': ']'}
+
+
+def _extract_balanced(text: str) -> tuple[str, list[str], bool]:
+    """
+    Poimii ensimmäisen JSON-objektin tai -listan
+    
+    Returns:
+        (JSON-teksti, avoimet sulut, onko merkkijono kesken)
+    """
+    start = min((i for i in (text.find('{'), text.find('[')) if i >= 0), default=-1)
+    if start < 0:
+        return "", [], False
+    
+    stack = []
+    in_string = False
+    escaped = False
+    
+    for i in range(start, len(text)):
+        char = text[i]
+        
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == '\\':
+                escaped = True
+            elif char == '"':
+                in_string = False
+            continue
+        
+        if char == '"':
+            in_string = True
+        elif char in CLOSERS:
+            stack.append(char)
+        elif char in '}]':
+            if stack:
+                stack.pop()
+            if not stack:
+                return text[start:i + 1], [], False
+    
+    return text[start:], stack, in_string
+
+
+def _close_truncated(fragment: str, stack: list[str], in_string: bool) -> str:
+    """Sulkee kesken jääneen JSONin (katkennut vastaus)"""
+    if in_string:
+        fragment += '"'
+    
+    # Poista perästä keskeneräinen avain tai pilkku: {"a": 1, "b  tai  {"a": 1, "b":
+    fragment = fragment.rstrip()
+    fragment = re.sub(r',\s*"[^"]*"\s*:?\s*$', '', fragment)
+    fragment = re.sub(r'[,:]\s*$', '', fragment)
+    fragment = re.sub(r'{\s*"[^"]*"\s*$', '{', fragment)
+    
+    return fragment + ''.join(CLOSERS[c] for c in reversed(stack))
+
+
+def parse_json(text: str):
+    """
+    Jäsentää mallin vastauksen JSONiksi niin sallivasti kuin mahdollista
+    
+    Järjestys: suora json.loads -> koodiaidan sisältö -> ensimmäinen tasapainoinen
+    objekti -> perässä olevien pilkkujen poisto -> katkenneen JSONin sulkeminen.
+    
+    Args:
+        text: Mallin vastausteksti
+    
+    Returns:
+        Jäsennetty JSON (dict tai list)
+    
+    Raises:
+        json.JSONDecodeError: Jos JSONia ei saada korjattua
+    """
+    text = (text or "").strip()
+    
+    try:
+        return json.loads(text)
+    except json.JSONDecodeError as e:
+        error = e
+    
+    fence = FENCE_PATTERN.search(text)
+    if fence:
+        text = fence.group(1).strip()
+    
+    fragment, stack, in_string = _extract_balanced(text)
+    if not fragment:
+        raise error
+    
+    candidates = [fragment]
+    if stack or in_string:
+        candidates.append(_close_truncated(fragment, stack, in_string))
+    
+    for candidate in candidates:
+        for variant in (candidate, TRAILING_COMMA_PATTERN.sub(r"\1", candidate)):
+            try:
+                return json.loads(variant)
+            except json.JSONDecodeError:
+                continue
+    
+    raise error
+
+
+def parse_json_object(text: str, what: str) -> dict:
+    """
+    Jäsentää mallin vastauksen JSON-objektiksi (ks. parse_json)
+    
+    Args:
+        text: Mallin vastausteksti
+        what: Vastauksen kuvaus virheilmoitukseen, esim. "Vaiheen 4 vastaus"
+    
+    Returns:
+        Jäsennetty JSON-objekti
+    
+    Raises:
+        json.JSONDecodeError: Jos JSONia ei saada korjattua
+        ValueError: Jos JSON ei ole objekti (esim. pelkkä lista)
+    """
+    result = parse_json(text)
+    
+    if not isinstance(result, dict):
+        raise ValueError(f"{what} ei ole JSON-objekti ({type(result).__name__})")
+    
+    return result
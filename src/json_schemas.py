@@ -0,0 +1,147 @@
+"""
+Vaiheiden JSON-skeemat (Structured Outputs)
+Malli pakotetaan palauttamaan dokumentoitu rakenne: text={"format": {"type": "json_schema", ...}}
+"""
+
+
+def _object(properties: dict) -> dict:
+    """Strict-tilan objekti: kaikki kentät pakollisia, ei ylimääräisiä"""
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+STRING = {"type": "string"}
+STRING_LIST = {"type": "array", "items": STRING}
+
+
+# Vaihe 1A: analyze_target_company
+COMPANY_ANALYSIS_SCHEMA = _object({
+    "company_name": STRING,
+    "url": STRING,
+    "services": STRING_LIST,
+    "products": STRING_LIST,
+    "target_customers": STRING,
+    "customer_segments": STRING_LIST,
+    "value_proposition": STRING,
+    "analysis": STRING,
+})
+
+# Vaihe 1B: find_competitors
+COMPETITORS_SCHEMA = _object({
+    "target_company": STRING,
+    "competitors": {
+        "type": "array",
+        "items": _object({
+            "name": STRING,
+            "url": STRING,
+            "description": STRING,
+            "similarity_reason": STRING,
+        }),
+    },
+})
+
+# Vaihe 3: extract_customer_names
+CUSTOMERS_SCHEMA = _object({
+    "customers": STRING_LIST,
+})
+
+# Vaihe 3: extract_customer_names_batch
+CUSTOMER_BATCH_SCHEMA = _object({
+    "pages": {
+        "type": "array",
+        "items": _object({
+            "page_id": STRING,
+            "customers": STRING_LIST,
+        }),
+    },
+})
+
+# Vaihe 4: create_icps
+ICPS_SCHEMA = _object({
+    "icps": {
+        "type": "array",
+        "items": _object({
+            "name": STRING,
+            "firmographic": _object({
+                "company_size": STRING,
+                "industries": STRING_LIST,
+                "org_type": STRING,
+                "geography": STRING,
+            }),
+            "technographic": _object({
+                "digital_maturity": STRING,
+                "tech_sophistication": STRING,
+                "innovation_appetite": STRING,
+            }),
+            "needs": _object({
+                "challenges": STRING_LIST,
+                "typical_projects": STRING_LIST,
+                "priorities": STRING_LIST,
+            }),
+            "behavioral": _object({
+                "decision_speed": STRING,
+                "budget_level": STRING,
+                "partnership_style": STRING,
+            }),
+            "example_customers": STRING_LIST,
+            "estimated_size": {"type": "integer"},
+            "market_value": STRING,
+            "reasoning": STRING,
+        }),
+    },
+})
+
+# Vaihe 6: analyze_positioning
+# Strict-tila ei salli vapaita avaimia, joten icp_leaders on lista ja muunnetaan
+# takaisin muotoon {"ICP": "Yritys"} vastauksen jäsennyksessä
+POSITIONING_SCHEMA = _object({
+    "analysis": {
+        "type": "array",
+        "items": _object({
+            "company": STRING,
+            "positioning_by_icp": {
+                "type": "array",
+                "items": _object({
+                    "icp_name": STRING,
+                    "score": {"type": "integer"},
+                    "reasoning": STRING,
+                    "strengths": STRING_LIST,
+                    "weaknesses": STRING_LIST,
+                }),
+            },
+        }),
+    },
+    "icp_leaders": {
+        "type": "array",
+        "items": _object({
+            "icp_name": STRING,
+            "company": STRING,
+        }),
+    },
+    "overall_insights": STRING,
+})
+
+
+def text_format(name: str, schema: dict) -> dict:
+    """
+    Muodostaa responses.create:n text-parametrin
+    
+    Args:
+        name: Skeeman nimi
+        schema: JSON-skeema
+    
+    Returns:
+        {"format": {"type": "json_schema", "name": ..., "schema": ..., "strict": True}}
+    """
+    return {
+        "format": {
+            "type": "json_schema",
+            "name": name,
+            "schema": schema,
+            "strict": True,
+        }
+    }
@@ -0,0 +1,209 @@
+"""
+Pysyvä välimuisti LLM-vastauksille (SQLite)
+Avain = tiiviste mallista, työkaluista ja promptista; TTL, LRU-siivous ja ohitus
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from openai.types.responses import Response
+
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm.sqlite3")
+
+# Näin kauan vastaus kelpaa (web search -tulokset vanhenevat)
+DEFAULT_TTL = 7 * 24 * 60 * 60
+
+# Välimuistin maksimikoko, ylittyessä vähiten käytetyt (LRU) poistetaan
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+
+_config = {
+    "enabled": os.getenv("MEOM_LLM_CACHE", "1") != "0",
+    "path": os.getenv("MEOM_LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+    "ttl": DEFAULT_TTL,
+    "max_bytes": DEFAULT_MAX_BYTES,
+}
+
+_lock = threading.Lock()
+_conn = None
+
+
+def configure(enabled: bool = None, path: str = None, ttl: int = None, max_bytes: int = None):
+    """
+    Muuttaa välimuistin asetuksia (None = ei muutosta)
+    
+    Args:
+        enabled: Käytetäänkö välimuistia lainkaan
+        path: SQLite-tiedoston polku
+        ttl: Vastauksen voimassaoloaika sekunneissa
+        max_bytes: Välimuistin maksimikoko tavuina
+    """
+    global _conn
+    
+    with _lock:
+        for key, value in (
+            ("enabled", enabled),
+            ("path", path),
+            ("ttl", ttl),
+            ("max_bytes", max_bytes),
+        ):
+            if value is not None:
+                _config[key] = value
+        
+        if _conn is not None:
+            _conn.close()
+            _conn = None
+
+
+def is_enabled() -> bool:
+    """Onko välimuisti käytössä"""
+    return _config["enabled"]
+
+
+def _connection() -> sqlite3.Connection:
+    """Avaa tietokannan ensimmäisellä käytöllä (kutsutaan lukon sisällä)"""
+    global _conn
+    
+    if _conn is None:
+        directory = os.path.dirname(_config["path"])
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        
+        _conn = sqlite3.connect(_config["path"], check_same_thread=False)
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY,"
+            " stage TEXT,"
+            " body TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        _conn.commit()
+    
+    return _conn
+
+
+def cache_key(request: dict) -> str:
+    """
+    Laskee pyynnön tiivisteen
+    
+    Args:
+        request: responses.create:n parametrit (model, tools, input, ...)
+    
+    Returns:
+        SHA-256 heksana
+    """
+    payload = json.dumps(request, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def load(request: dict) -> Response:
+    """
+    Palauttaa välimuistissa olevan vastauksen
+    
+    Args:
+        request: responses.create:n parametrit
+    
+    Returns:
+        Response-olio, None jos ei löydy tai on vanhentunut
+    """
+    if not is_enabled():
+        return None
+    
+    key = cache_key(request)
+    now = time.time()
+    
+    with _lock:
+        conn = _connection()
+        row = conn.execute("SELECT body, created FROM responses WHERE key = ?", (key,)).fetchone()
+        
+        if row is None:
+            return None
+        
+        body, created = row
+        if now - created > _config["ttl"]:
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            conn.commit()
+            return None
+        
+        conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        conn.commit()
+    
+    try:
+        return Response.model_validate_json(body)
+    except ValueError:
+        return None
+
+
+def save(request: dict, response: Response, stage: str = None):
+    """
+    Tallentaa valmiin vastauksen välimuistiin
+    
+    Args:
+        request: responses.create:n parametrit
+        response: OpenAI Response -olio
+        stage: Vaiheen tunnus (tilastoja varten)
+    """
+    if not is_enabled() or getattr(response, 'status', None) not in (None, 'completed'):
+        return
+    
+    try:
+        body = response.model_dump_json()
+    except AttributeError:
+        return
+    
+    now = time.time()
+    
+    with _lock:
+        conn = _connection()
+        conn.execute(
+            "INSERT OR REPLACE INTO responses (key, stage, body, size, created, last_used)"
+            " VALUES (?, ?, ?, ?, ?, ?)",
+            (cache_key(request), stage, body, len(body), now, now)
+        )
+        conn.commit()
+        _evict(conn)
+
+
+def _evict(conn: sqlite3.Connection) -> int:
+    """Poistaa vanhentuneet ja kokorajan ylittävät merkinnät (kutsutaan lukon sisällä)"""
+    removed = conn.execute(
+        "DELETE FROM responses WHERE created < ?",
+        (time.time() - _config["ttl"],)
+    ).rowcount
+    
+    total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+    
+    if total > _config["max_bytes"]:
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used").fetchall():
+            if total <= _config["max_bytes"]:
+                break
+            conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total -= size
+            removed += 1
+    
+    conn.commit()
+    return removed
+
+
+def evict() -> int:
+    """
+    Siivoaa välimuistin
+    
+    Returns:
+        Poistettujen merkintöjen määrä
+    """
+    with _lock:
+        return _evict(_connection())
+
+
+def clear():
+    """Tyhjentää välimuistin"""
+    with _lock:
+        conn = _connection()
+        conn.execute("DELETE FROM responses")
+        conn.commit()
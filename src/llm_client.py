@@ -0,0 +1,324 @@
+"""
+Jaettu LLM-yhdyskäytävä
+Yksi OpenAI-client (yhteysallas), yhteinen timeout- ja retry-politiikka, välimuisti sekä kutsukohtaiset metriikat
+"""
+
+import os
+import json
+import time
+import random
+import threading
+from openai import (
+    OpenAI,
+    APIConnectionError,
+    APITimeoutError,
+    RateLimitError,
+    InternalServerError
+)
+
+from src.rate_limiter import parse_retry_after
+from src import llm_cache
+from src import tracing
+from src.token_budget import count_tokens
+
+
+# GPT-5 + web search voi kestää minuutteja
+DEFAULT_TIMEOUT = 300.0
+
+# Uudelleenyritykset yhteysvirheille, timeouteille, 429:lle ja 5xx:lle
+MAX_RETRIES = 3
+BACKOFF_BASE = 2.0
+BACKOFF_MAX = 60.0
+
+RETRYABLE_ERRORS = (APIConnectionError, APITimeoutError, RateLimitError, InternalServerError)
+
+# Samanaikaisten API-kutsujen maksimimäärä koko prosessissa
+DEFAULT_MAX_CONCURRENCY = 4
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+_metrics = {}
+_metrics_lock = threading.Lock()
+
+_semaphore = threading.BoundedSemaphore(DEFAULT_MAX_CONCURRENCY)
+
+# Pyyntöjen nauhoitus mallien vertailuun (test/benchmark_models.py), JSONL-tiedosto
+_recording = {"path": os.getenv("MEOM_LLM_RECORD") or None}
+_recording_lock = threading.Lock()
+
+# 429:n jälkeen kaikki säikeet odottavat tähän hetkeen asti (time.monotonic())
+_cooldown = {"until": 0.0}
+_cooldown_lock = threading.Lock()
+
+
+def configure(max_concurrency: int = None, record_path: str = None):
+    """
+    Muuttaa LLM-kutsujen asetuksia (None = ei muutosta)
+    
+    Args:
+        max_concurrency: Samanaikaisten API-kutsujen maksimimäärä
+        record_path: JSONL-tiedosto johon pyynnöt ja vastaukset nauhoitetaan
+    """
+    global _semaphore
+    
+    if max_concurrency is not None:
+        _semaphore = threading.BoundedSemaphore(max(1, max_concurrency))
+    
+    if record_path is not None:
+        _recording["path"] = record_path
+
+
+def resolve_api_key(api_key: str = None) -> str:
+    """
+    Palauttaa API-avaimen (parametri tai ympäristömuuttuja)
+    
+    Raises:
+        ValueError: Jos avainta ei löydy
+    """
+    if api_key is None:
+        api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPEN_AI_API")
+    
+    if not api_key:
+        raise ValueError("OpenAI API-avain puuttuu!")
+    
+    return api_key
+
+
+def get_client(api_key: str = None) -> OpenAI:
+    """
+    Palauttaa jaetun OpenAI-clientin (yksi per API-avain koko ajon ajan)
+    
+    Args:
+        api_key: OpenAI API-avain (None = ympäristömuuttuja)
+    
+    Returns:
+        OpenAI-client jonka HTTP-yhteysallasta käytetään uudelleen
+    """
+    api_key = resolve_api_key(api_key)
+    
+    with _clients_lock:
+        if api_key not in _clients:
+            # Uudelleenyritykset hoidetaan create_response:ssa, jotta ne näkyvät metriikoissa
+            _clients[api_key] = OpenAI(
+                api_key=api_key,
+                timeout=DEFAULT_TIMEOUT,
+                max_retries=0
+            )
+        return _clients[api_key]
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """Backoff: Retry-After jos palvelin kertoo sen, muuten eksponentiaalinen + jitter"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        delay = parse_retry_after(response.headers.get('retry-after'))
+        if delay is not None:
+            return min(delay, BACKOFF_MAX)
+    
+    return min(BACKOFF_MAX, BACKOFF_BASE ** attempt) * (0.5 + random.random() / 2)
+
+
+def _wait_cooldown():
+    """Odottaa jos jokin kutsu on saanut 429:n ja koko API:a pitää hidastaa"""
+    with _cooldown_lock:
+        wait = _cooldown["until"] - time.monotonic()
+    if wait > 0:
+        tracing.sleep(wait, "LLM cooldown")
+
+
+def _start_cooldown(delay: float):
+    """Pysäyttää kaikki uudet kutsut delay sekunniksi"""
+    with _cooldown_lock:
+        _cooldown["until"] = max(_cooldown["until"], time.monotonic() + delay)
+
+
+def record_call(
+    stage: str,
+    latency: float,
+    response=None,
+    retries: int = 0,
+    error: bool = False,
+    cached: bool = False
+):
+    """Kirjaa kutsun metriikat vaiheelle"""
+    usage = getattr(response, 'usage', None)
+    
+    with _metrics_lock:
+        m = _metrics.setdefault(stage, {
+            "calls": 0,
+            "cache_hits": 0,
+            "errors": 0,
+            "retries": 0,
+            "latency_total": 0.0,
+            "latency_max": 0.0,
+            "input_tokens": 0,
+            "cached_input_tokens": 0,
+            "output_tokens": 0,
+        })
+        m["calls"] += 1
+        m["cache_hits"] += int(cached)
+        m["errors"] += int(error)
+        m["retries"] += retries
+        m["latency_total"] += latency
+        m["latency_max"] = max(m["latency_max"], latency)
+        if usage is not None and not cached:
+            m["input_tokens"] += getattr(usage, 'input_tokens', 0) or 0
+            m["cached_input_tokens"] += _prompt_cached_tokens(usage)
+            m["output_tokens"] += getattr(usage, 'output_tokens', 0) or 0
+
+
+def record_exchange(stage: str, request: dict, response):
+    """
+    Nauhoittaa pyynnön ja vastauksen tekstin (jos nauhoitus on päällä)
+    
+    Rivit ovat muotoa {"stage", "request", "output_text"}; benchmark_models.py
+    toistaa pyynnöt eri malleilla ja vertaa vastauksia output_textiin.
+    """
+    path = _recording["path"]
+    if not path or response is None:
+        return
+    
+    line = json.dumps({
+        "stage": stage,
+        "request": request,
+        "output_text": getattr(response, 'output_text', '') or '',
+    }, ensure_ascii=False, default=str)
+    
+    with _recording_lock:
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(line + "\n")
+
+
+def _prompt_cached_tokens(usage) -> int:
+    """Palvelimen prompt cachesta luetut syötetokenit (pysyvä prefiksi)"""
+    details = getattr(usage, 'input_tokens_details', None)
+    return getattr(details, 'cached_tokens', 0) or 0
+
+
+def _report_call(stage: str, request: dict, response, latency: float, cached: bool = False):
+    """Tulostaa kutsun tokenit (vastauksen usage, muuten paikallinen laskenta)"""
+    usage = getattr(response, 'usage', None)
+    prefix_cached = ""
+    
+    if usage is not None:
+        input_tokens = getattr(usage, 'input_tokens', 0) or 0
+        output_tokens = getattr(usage, 'output_tokens', 0) or 0
+        if not cached and _prompt_cached_tokens(usage):
+            prefix_cached = f" ({_prompt_cached_tokens(usage)} prefiksista)"
+    else:
+        prompt = request.get('input', '')
+        input_tokens = count_tokens(prompt if isinstance(prompt, str) else str(prompt))
+        output_tokens = count_tokens(getattr(response, 'output_text', '') or '')
+    
+    source = "valimuistista" if cached else f"{latency:.1f} s"
+    print(f"    [LLM {stage}] {input_tokens} in{prefix_cached} / {output_tokens} out tokenia ({source})")
+
+
+def create_response(stage: str, api_key: str = None, **kwargs):
+    """
+    Ainoa reitti client.responses.create -kutsuun
+    
+    Identtinen pyyntö (malli, työkalut, prompt) palautetaan välimuistista ilman API-kutsua.
+    Samanaikaisia API-kutsuja on korkeintaan configure(max_concurrency) verran, ja
+    429-vastauksen jälkeen kaikki säikeet pitävät tauon.
+    
+    Args:
+        stage: Vaiheen tunnus metriikoita varten ("1A", "1B", "3", "4", "6")
+        api_key: OpenAI API-avain
+        **kwargs: Välitetään sellaisenaan responses.create:lle (model, input, tools, ...)
+    
+    Returns:
+        OpenAI Response -olio
+    
+    Raises:
+        openai.OpenAIError: Jos kutsu epäonnistuu kaikkien uudelleenyritysten jälkeen
+    """
+    client = get_client(api_key)
+    start = time.monotonic()
+    
+    hit = llm_cache.load(kwargs)
+    if hit is not None:
+        record_call(stage, time.monotonic() - start, hit, cached=True)
+        _report_call(stage, kwargs, hit, 0.0, cached=True)
+        record_exchange(stage, kwargs, hit)
+        return hit
+    
+    for attempt in range(MAX_RETRIES + 1):
+        _wait_cooldown()
+        try:
+            with _semaphore:
+                # Span mittaa vain API-kutsun, ei jonotusta rinnakkaisuusrajalla
+                with tracing.span(f"LLM {stage}", "llm", stage=stage, model=kwargs.get('model')) as attrs:
+                    response = client.responses.create(**kwargs)
+                    usage = getattr(response, 'usage', None)
+                    attrs["input_tokens"] = getattr(usage, 'input_tokens', 0) or 0
+                    attrs["cached_tokens"] = _prompt_cached_tokens(usage)
+                    attrs["output_tokens"] = getattr(usage, 'output_tokens', 0) or 0
+                    attrs["attempt"] = attempt
+        except RETRYABLE_ERRORS as e:
+            if attempt == MAX_RETRIES:
+                record_call(stage, time.monotonic() - start, retries=attempt, error=True)
+                raise
+            
+            delay = _retry_delay(e, attempt + 1)
+            if isinstance(e, RateLimitError):
+                _start_cooldown(delay)
+            print(f"  [WARN] LLM ({stage}) {type(e).__name__}, yritetaan uudelleen {delay:.0f} s paasta...")
+            tracing.sleep(delay, "LLM retry", stage=stage)
+            continue
+        except Exception:
+            record_call(stage, time.monotonic() - start, retries=attempt, error=True)
+            raise
+        
+        latency = time.monotonic() - start
+        record_call(stage, latency, response, retries=attempt)
+        _report_call(stage, kwargs, response, latency)
+        llm_cache.save(kwargs, response, stage)
+        record_exchange(stage, kwargs, response)
+        return response
+
+
+def get_llm_metrics() -> dict:
+    """
+    Palauttaa vaihekohtaiset LLM-metriikat
+    
+    Returns:
+        Dictionary: {vaihe: {"calls", "cache_hits", "errors", "retries", "latency_total",
+                             "latency_max", "input_tokens", "cached_input_tokens", "output_tokens"}}
+    """
+    with _metrics_lock:
+        return {stage: dict(m) for stage, m in _metrics.items()}
+
+
+def reset_metrics():
+    """Nollaa metriikat"""
+    with _metrics_lock:
+        _metrics.clear()
+
+
+def print_llm_summary():
+    """Tulostaa yhteenvedon LLM-kutsuista vaiheittain"""
+    metrics = get_llm_metrics()
+    
+    print("\n" + "=" * 60)
+    print("LLM-KUTSUT - YHTEENVETO")
+    print("=" * 60)
+    print(f"\n{'Vaihe':<8}{'Kutsut':>8}{'Cache':>7}{'Virheet':>9}{'Ka. s':>8}{'Max s':>8}{'Tok in':>10}{'Tok out':>10}")
+    print("-" * 60)
+    
+    for stage, m in sorted(metrics.items()):
+        avg = m["latency_total"] / m["calls"] if m["calls"] else 0.0
+        print(f"{stage:<8}{m['calls']:>8}{m['cache_hits']:>7}{m['errors']:>9}{avg:>8.1f}{m['latency_max']:>8.1f}"
+              f"{m['input_tokens']:>10}{m['output_tokens']:>10}")
+    
+    input_tokens = sum(m["input_tokens"] for m in metrics.values())
+    cached_input = sum(m["cached_input_tokens"] for m in metrics.values())
+    if input_tokens:
+        print(f"\nPrompt cache: {cached_input}/{input_tokens} syotetokenia prefiksista "
+              f"({100 * cached_input / input_tokens:.0f} %)")
+    
+    print("\n" + "=" * 60)
@@ -0,0 +1,107 @@
+"""
+Vaihekohtainen mallin valinta
+Jokaiselle LLM-vaiheelle oma malli ja reasoning effort (oletuksena kaikki gpt-5), muutettavissa JSON-konfiguraatiolla
+"""
+
+import json
+
+
+DEFAULT_MODEL = "gpt-5"
+
+# Vaiheet joissa kutsutaan mallia
+STAGES = ("1A", "1B", "3", "4", "6")
+
+# reasoning.effort-arvot (None = parametria ei lähetetä, mallin oletus)
+REASONING_EFFORTS = ("minimal", "low", "medium", "high")
+
+DEFAULT_ROUTES = {stage: {"model": DEFAULT_MODEL, "reasoning_effort": None} for stage in STAGES}
+
+_routes = {stage: dict(route) for stage, route in DEFAULT_ROUTES.items()}
+
+
+def _normalize(stage: str, value) -> dict:
+    """
+    Tarkistaa yhden vaiheen reitin
+    
+    Args:
+        stage: Vaiheen tunnus
+        value: "malli" tai {"model": "...", "reasoning_effort": "..."}
+    
+    Raises:
+        ValueError: Jos vaihe, malli tai effort on virheellinen
+    """
+    if stage not in STAGES:
+        raise ValueError(f"Tuntematon vaihe: {stage} (vaihtoehdot: {', '.join(STAGES)})")
+    
+    if isinstance(value, str):
+        value = {"model": value}
+    if not isinstance(value, dict) or not value.get("model"):
+        raise ValueError(f"Vaiheelta {stage} puuttuu malli")
+    
+    effort = value.get("reasoning_effort")
+    if effort is not None and effort not in REASONING_EFFORTS:
+        raise ValueError(f"Vaiheen {stage} reasoning_effort '{effort}' ei kelpaa "
+                         f"(vaihtoehdot: {', '.join(REASONING_EFFORTS)})")
+    
+    return {"model": value["model"], "reasoning_effort": effort}
+
+
+def configure(routes: dict = None):
+    """
+    Muuttaa vaiheiden malleja (puuttuvat vaiheet pysyvät ennallaan)
+    
+    Args:
+        routes: {vaihe: "malli"} tai {vaihe: {"model": "...", "reasoning_effort": "low"}}
+    
+    Raises:
+        ValueError: Jos konfiguraatio on virheellinen
+    """
+    normalized = {stage: _normalize(stage, value) for stage, value in (routes or {}).items()}
+    _routes.update(normalized)
+
+
+def load_config(path: str):
+    """
+    Lukee reitit JSON-tiedostosta, esim. {"3": {"model": "gpt-5-mini", "reasoning_effort": "minimal"}}
+    
+    Raises:
+        OSError: Jos tiedostoa ei voi lukea
+        ValueError: Jos tiedosto ei ole kelvollinen konfiguraatio
+    """
+    with open(path, 'r', encoding='utf-8') as f:
+        routes = json.load(f)
+    
+    if not isinstance(routes, dict):
+        raise ValueError("Mallikonfiguraation pitää olla JSON-objekti {vaihe: malli}")
+    
+    configure(routes)
+
+
+def get_route(stage: str) -> dict:
+    """Palauttaa vaiheen reitin {"model", "reasoning_effort"}"""
+    return dict(_routes[stage])
+
+
+def route(stage: str) -> dict:
+    """
+    Palauttaa vaiheen mallin responses.create:n parametreina
+    
+    Args:
+        stage: Vaiheen tunnus ("1A", "1B", "3", "4", "6")
+    
+    Returns:
+        {"model": "..."} ja reasoning-parametri jos effort on asetettu
+    """
+    selected = _routes[stage]
+    params = {"model": selected["model"]}
+    if selected["reasoning_effort"]:
+        params["reasoning"] = {"effort": selected["reasoning_effort"]}
+    return params
+
+
+def print_routes():
+    """Tulostaa käytössä olevat mallit vaiheittain"""
+    for stage in STAGES:
+        selected = _routes[stage]
+        effort = selected["reasoning_effort"] or "oletus"
+        print(f"  - Vaihe {stage}: {selected['model']} (reasoning: {effort})")
@@ -0,0 +1,239 @@
+"""
+Asiakas- ja referenssisivujen löytäminen
+robots.txt + sitemap.xml + etusivun linkit -> pisteytetty lyhyt URL-lista vaiheelle 3
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from urllib.parse import urljoin, urlsplit
+
+from src.http_client import fetch, is_host_available
+from src.page_store import get_page, canonical_url
+
+
+# Polun osat ja linkkitekstit jotka viittaavat asiakas-/referenssisivuun (sana: pisteet)
+REFERENCE_KEYWORDS = {
+    'asiakkaat': 5,
+    'asiakkaamme': 5,
+    'referenssit': 5,
+    'referenssi': 4,
+    'references': 5,
+    'customers': 5,
+    'clients': 5,
+    'asiakastarinat': 5,
+    'customer-stories': 5,
+    'case-studies': 5,
+    'cases': 4,
+    'case': 3,
+    'tyomme': 3,
+    'tyot': 3,
+    'portfolio': 3,
+    'projektit': 3,
+    'projects': 2,
+    'work': 2,
+    'success-stories': 4,
+}
+
+# Näitä ei kannata hakea (tiedostot, sisäänkirjautuminen, blogin arkistot jne.)
+SKIP_PATTERN = re.compile(
+    r'\.(pdf|jpe?g|png|gif|svg|webp|zip|mp4|docx?|xlsx?)$|/(wp-admin|wp-login|login|cart|feed|tag|author)/',
+    re.IGNORECASE
+)
+
+# Sitemap-indeksistä seurataan korkeintaan näin monta alisitemapia
+MAX_CHILD_SITEMAPS = 3
+
+# Yhdestä sitemapista luetaan korkeintaan näin monta URL:ia
+MAX_SITEMAP_URLS = 5000
+
+
+def _slug_words(path: str) -> list[str]:
+    """Pilkkoo polun sanoiksi: /fi/asiakkaat/case-x -> ['fi', 'asiakkaat', 'case-x', 'case', 'x']"""
+    words = []
+    for segment in path.lower().strip('/').split('/'):
+        if not segment:
+            continue
+        words.append(segment)
+        words.extend(w for w in re.split(r'[-_.]', segment) if w and w != segment)
+    return words
+
+
+def _normalize_text(text: str) -> str:
+    """Pienet kirjaimet ja ääkköset ASCII:ksi vertailua varten"""
+    return text.lower().replace('ä', 'a').replace('ö', 'o').replace('å', 'a')
+
+
+def score_candidate(url: str, anchor_text: str = "") -> int:
+    """
+    Pisteyttää ehdokas-URL:n polun ja linkkitekstin perusteella
+    
+    Args:
+        url: Ehdokas-URL
+        anchor_text: Linkin teksti (jos URL löytyi etusivulta)
+    
+    Returns:
+        Pisteet (0 = ei vaikuta asiakassivulta)
+    """
+    path = urlsplit(url).path
+    words = _slug_words(_normalize_text(path))
+    
+    score = max((REFERENCE_KEYWORDS.get(w, 0) for w in words), default=0)
+    
+    text_words = re.split(r'\W+', _normalize_text(anchor_text))
+    text_score = max((REFERENCE_KEYWORDS.get(w, 0) for w in text_words), default=0)
+    
+    if not score and not text_score:
+        return 0
+    
+    # Listaussivu (/referenssit) on parempi kuin yksittäinen case (/referenssit/x/y)
+    depth = len([s for s in path.split('/') if s])
+    keyword_last = bool(words) and REFERENCE_KEYWORDS.get(words[-1], 0) > 0
+    
+    return score * 2 + text_score + (2 if keyword_last else 0) - max(0, depth - 1)
+
+
+def _same_site(url: str, base_url: str) -> bool:
+    """Onko URL samassa domainissa (www-etuliite sallitaan)"""
+    host = (urlsplit(url).hostname or "").lower()
+    base_host = (urlsplit(base_url).hostname or "").lower()
+    return host.removeprefix('www.') == base_host.removeprefix('www.')
+
+
+def _read_sitemap_urls(sitemap_url: str, depth: int = 0, deadline: float = None) -> list[str]:
+    """Lukee sitemapin (tai sitemap-indeksin) URL:t"""
+    try:
+        response = fetch(sitemap_url, deadline=deadline)
+        root = ET.fromstring(response.content)
+    except Exception:
+        return []
+    
+    locs = [
+        (el.text or "").strip()
+        for el in root.iter()
+        if el.tag.endswith('loc') and el.text
+    ][:MAX_SITEMAP_URLS]
+    
+    if not root.tag.endswith('sitemapindex'):
+        return locs
+    
+    if depth > 0:
+        return []
+    
+    # Indeksi: suosi sivu-sitemapeja blogien ja tuotteiden sijaan
+    children = sorted(
+        locs,
+        key=lambda loc: (0 if re.search(r'page|sivu|case|referen|asiak', loc, re.I) else 1)
+    )[:MAX_CHILD_SITEMAPS]
+    
+    urls = []
+    for child in children:
+        urls.extend(_read_sitemap_urls(child, depth + 1, deadline))
+    return urls
+
+
+def find_sitemap_urls(base_url: str, deadline: float = None) -> list[str]:
+    """
+    Hakee sivuston URL:t robots.txt:n Sitemap-riveistä tai /sitemap.xml:stä
+    
+    Args:
+        base_url: Yrityksen pääsivu
+        deadline: Aikabudjetin päättymishetki (time.monotonic())
+    
+    Returns:
+        Lista URL:eja (tyhjä jos sitemapia ei löydy)
+    """
+    sitemaps = []
+    
+    try:
+        robots = fetch(urljoin(base_url, '/robots.txt'), deadline=deadline)
+        for line in robots.text.splitlines():
+            if line.lower().startswith('sitemap:'):
+                sitemaps.append(line.split(':', 1)[1].strip())
+    except Exception:
+        pass
+    
+    if not sitemaps:
+        sitemaps = [urljoin(base_url, '/sitemap.xml')]
+    
+    urls = []
+    for sitemap in sitemaps[:MAX_CHILD_SITEMAPS]:
+        urls.extend(_read_sitemap_urls(sitemap, deadline=deadline))
+    return urls
+
+
+def rank_candidates(base_url: str, links: list[dict], sitemap_urls: list[str], limit: int = 5) -> list[str]:
+    """
+    Pisteyttää ja järjestää ehdokas-URL:t
+    
+    Args:
+        base_url: Yrityksen pääsivu
+        links: Etusivun linkit [{"href": "...", "text": "..."}]
+        sitemap_urls: Sitemapin URL:t
+        limit: Palautettavien URL:ien maksimimäärä
+    
+    Returns:
+        Parhaat URL:t pisteiden mukaan (ei pääsivua)
+    """
+    scores = {}
+    home = canonical_url(base_url)
+    
+    candidates = [(urljoin(base_url, link.get('href', '')), link.get('text', '')) for link in links]
+    candidates.extend((url, "") for url in sitemap_urls)
+    
+    for url, text in candidates:
+        url = url.split('#', 1)[0]
+        if not url.startswith(('http://', 'https://')) or not _same_site(url, base_url):
+            continue
+        if SKIP_PATTERN.search(url):
+            continue
+        
+        key = canonical_url(url)
+        if key == home:
+            continue
+        
+        score = score_candidate(url, text)
+        if score > 0 and score > scores.get(key, (0, ""))[0]:
+            scores[key] = (score, url)
+    
+    ranked = sorted(scores.values(), key=lambda item: (-item[0], len(item[1]), item[1]))
+    return [url for _, url in ranked[:limit]]
+
+
+def discover_customer_pages(
+    base_url: str,
+    limit: int = 5,
+    use_sitemap: bool = True,
+    deadline: float = None
+) -> list[str]:
+    """
+    Löytää yrityksen todennäköisimmät asiakas-/referenssisivut
+    
+    Lähteet: etusivun linkit (navigaatio mukaan lukien), robots.txt ja
+    sitemap.xml. Palautettavan listan ensimmäinen URL on aina pääsivu.
+    
+    Args:
+        base_url: Yrityksen pääsivu
+        limit: Pääsivun lisäksi palautettavien URL:ien maksimimäärä
+        use_sitemap: Käytetäänkö robots.txt:tä ja sitemapia
+        deadline: Aikabudjetin päättymishetki (time.monotonic())
+    
+    Returns:
+        Lista URL:eja, [] jos mitään ei löytynyt (kutsuja voi käyttää arvattuja polkuja)
+    """
+    links = []
+    try:
+        links = get_page(base_url, deadline=deadline)["document"].get("links", [])
+    except Exception:
+        pass
+    
+    if not is_host_available(base_url):
+        return []
+    
+    sitemap_urls = find_sitemap_urls(base_url, deadline) if use_sitemap else []
+    
+    ranked = rank_candidates(base_url, links, sitemap_urls, limit)
+    
+    if not ranked:
+        return []
+    
+    return [base_url] + ranked
@@ -0,0 +1,101 @@
+"""
+Ajonaikainen sivuvarasto
+Jokainen sivu haetaan ja parsitaan vain kerran per ajo (vaiheet 3 ja 5 jakavat sivut)
+"""
+
+import threading
+from concurrent.futures import Future
+from urllib.parse import urlsplit, urlunsplit
+
+from src.http_client import fetch, DEFAULT_TIMEOUT, DeadlineExceededError
+from src.html_parsing import parse_document
+
+
+_pages = {}
+_pages_lock = threading.Lock()
+
+
+def canonical_url(url: str) -> str:
+    """
+    Normalisoi URL:n varaston avaimeksi
+    
+    Skeema ja host pieniksi kirjaimiksi, oletusportti ja fragmentti pois,
+    tyhjä polku -> "/".
+    
+    Args:
+        url: URL
+    
+    Returns:
+        Kanoninen URL
+    """
+    parts = urlsplit(url.strip())
+    scheme = parts.scheme.lower()
+    host = (parts.hostname or "").lower()
+    
+    if parts.port and not ((scheme == 'http' and parts.port == 80) or
+                           (scheme == 'https' and parts.port == 443)):
+        host = f"{host}:{parts.port}"
+    
+    path = parts.path or "/"
+    
+    return urlunsplit((scheme, host, path, parts.query, ""))
+
+
+def _load_page(url: str, timeout, deadline: float) -> dict:
+    """Hakee ja parsii sivun"""
+    response = fetch(url, timeout=timeout, deadline=deadline)
+    
+    return {
+        "url": url,
+        "final_url": response.url or url,
+        "content": response.content,
+        "document": parse_document(response.content),
+    }
+
+
+def get_page(url: str, timeout=DEFAULT_TIMEOUT, deadline: float = None) -> dict:
+    """
+    Palauttaa sivun varastosta, hakee ja parsii sen ensimmäisellä kerralla
+    
+    Rinnakkaiset kutsut samalle URL:lle odottavat samaa hakua. Myös
+    epäonnistuminen muistetaan, joten kuollutta sivua ei haeta uudelleen
+    (paitsi jos vain kutsujan aikabudjetti loppui).
+    
+    Args:
+        url: Sivun URL
+        timeout: (connect, read) tai yksi luku sekunneissa
+        deadline: time.monotonic()-aika johon mennessä haun on valmistuttava
+    
+    Returns:
+        dict: {"url", "final_url", "content": bytes, "document": parse_document()}
+    
+    Raises:
+        requests.RequestException: Jos haku epäonnistui
+    """
+    key = canonical_url(url)
+    
+    with _pages_lock:
+        future = _pages.get(key)
+        owner = future is None
+        if owner:
+            future = Future()
+            _pages[key] = future
+    
+    if owner:
+        try:
+            future.set_result(_load_page(url, timeout, deadline))
+        except DeadlineExceededError as e:
+            # Budjetin loppuminen ei kerro sivusta mitään, seuraava kutsuja saa yrittää
+            with _pages_lock:
+                _pages.pop(key, None)
+            future.set_exception(e)
+        except BaseException as e:
+            future.set_exception(e)
+    
+    return future.result()
+
+
+def clear():
+    """Tyhjentää varaston (uusi ajo)"""
+    with _pages_lock:
+        _pages.clear()
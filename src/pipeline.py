@@ -0,0 +1,182 @@
+"""
+Vaiheiden riippuvuusgraafi ja ajastin
+Vaiheet ilmoittavat syötteensä ja tuloksensa; toisistaan riippumattomat vaiheet (esim. copyjen haku ja
+asiakashaku) ajetaan rinnakkain ja lopuksi tulostetaan kriittinen polku
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src import tracing
+
+
+class StageFailed(RuntimeError):
+    """Vaihe palautti None (virhe on jo tulostettu)"""
+
+
+# Vaiheet suoritusjärjestyksessä (topologinen järjestys)
+STAGE_ORDER = ["1", "3", "4", "5", "6", "7"]
+
+# Vaiheen tarvitsemat tulokset
+STAGE_INPUTS = {
+    "1": [],
+    "3": ["competitor_data"],
+    "4": ["customers_by_company"],
+    "5": ["competitor_data"],
+    "6": ["competitor_data", "icp_data", "copies_by_company"],
+    "7": [
+        "company_analysis",
+        "competitor_data",
+        "customers_by_company",
+        "icp_data",
+        "copies_by_company",
+        "positioning_data",
+    ],
+}
+
+# Vaiheen tuottamat tulokset (vaihe 7 = raportti)
+STAGE_OUTPUTS = {
+    "1": ["company_analysis", "competitor_data"],
+    "3": ["customers_by_company", "customer_fingerprints"],
+    "4": ["icp_data"],
+    "5": ["copies_by_company"],
+    "6": ["positioning_data"],
+    "7": [],
+}
+
+
+def producer(name: str) -> str:
+    """Palauttaa vaiheen joka tuottaa tuloksen"""
+    for stage, outputs in STAGE_OUTPUTS.items():
+        if name in outputs:
+            return stage
+    raise KeyError(name)
+
+
+def dependencies(stage: str) -> list[str]:
+    """Vaiheet joiden tuloksia vaihe tarvitsee (suoritusjärjestyksessä)"""
+    deps = {producer(name) for name in STAGE_INPUTS[stage]}
+    return [s for s in STAGE_ORDER if s in deps]
+
+
+def run_stages(stages: list[str], runners: dict, state: dict, on_complete=None) -> dict:
+    """
+    Ajaa vaiheet riippuvuuksien mukaan, toisistaan riippumattomat rinnakkain
+    
+    Vaihe käynnistyy heti kun kaikki sen ajettavat esivaiheet ovat valmiit. Esivaiheet
+    jotka eivät ole ajettavien joukossa oletetaan jo olevan statessa (checkpointit).
+    
+    Args:
+        stages: Ajettavat vaiheet
+        runners: {vaihe: funktio(inputs) -> {tulos: data} tai None virheessä}
+        state: Tulokset nimittäin; päivitetään vaiheiden valmistuessa
+        on_complete: Kutsutaan pääsäikeessä jokaisen valmistuneen vaiheen jälkeen (vaihe, tulokset)
+    
+    Returns:
+        {vaihe: {"start": s, "end": s}} ajon alusta laskettuna; ajamatta jääneet puuttuvat
+    
+    Raises:
+        StageFailed: Jos vaihe palauttaa None (ajo keskeytetään)
+        Exception: Vaiheen oma poikkeus välitetään eteenpäin
+    """
+    pending = [stage for stage in STAGE_ORDER if stage in stages]
+    timings = {}
+    running = {}
+    done = set()
+    failed = None
+    start = time.monotonic()
+    
+    def execute(stage, inputs):
+        began = time.monotonic() - start
+        with tracing.span(f"Vaihe {stage}", "stage", stage=stage):
+            outputs = runners[stage](inputs)
+        return began, time.monotonic() - start, outputs
+    
+    with ThreadPoolExecutor(max_workers=max(1, len(pending))) as executor:
+        while pending or running:
+            # Käynnistä vaiheet joiden esivaiheet ovat valmiit
+            if failed is None:
+                for stage in list(pending):
+                    if all(dep in done or dep not in stages for dep in dependencies(stage)):
+                        inputs = {name: state[name] for name in STAGE_INPUTS[stage]}
+                        running[executor.submit(execute, stage, inputs)] = stage
+                        pending.remove(stage)
+            elif not running:
+                break
+            
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage = running.pop(future)
+                try:
+                    began, ended, outputs = future.result()
+                except Exception as e:
+                    failed = failed or e
+                    continue
+                
+                timings[stage] = {"start": began, "end": ended}
+                if outputs is None:
+                    failed = failed or StageFailed(f"Vaihe {stage} epaonnistui")
+                    continue
+                
+                state.update(outputs)
+                done.add(stage)
+                if on_complete is not None:
+                    on_complete(stage, outputs)
+    
+    if failed is not None:
+        raise failed
+    
+    return timings
+
+
+def critical_path(timings: dict) -> list[str]:
+    """
+    Pisin riippuvuusketju ajetuista vaiheista (kestojen summana)
+    
+    Returns:
+        Vaiheet polun järjestyksessä
+    """
+    longest = {}
+    previous = {}
+    
+    for stage in STAGE_ORDER:
+        if stage not in timings:
+            continue
+        duration = timings[stage]["end"] - timings[stage]["start"]
+        best = max((d for d in dependencies(stage) if d in longest), key=lambda d: longest[d], default=None)
+        longest[stage] = duration + (longest[best] if best else 0.0)
+        previous[stage] = best
+    
+    if not longest:
+        return []
+    
+    path = [max(longest, key=longest.get)]
+    while previous[path[-1]]:
+        path.append(previous[path[-1]])
+    return list(reversed(path))
+
+
+def print_timing(timings: dict):
+    """Tulostaa vaiheiden ajoitukset ja kriittisen polun"""
+    if not timings:
+        return
+    
+    print("\n" + "=" * 60)
+    print("VAIHEIDEN AJOITUS")
+    print("=" * 60)
+    print(f"\n{'Vaihe':<8}{'Alku s':>10}{'Loppu s':>10}{'Kesto s':>10}")
+    print("-" * 60)
+    
+    for stage in STAGE_ORDER:
+        if stage in timings:
+            t = timings[stage]
+            print(f"{stage:<8}{t['start']:>10.1f}{t['end']:>10.1f}{t['end'] - t['start']:>10.1f}")
+    
+    path = critical_path(timings)
+    path_seconds = sum(timings[s]["end"] - timings[s]["start"] for s in path)
+    serial = sum(t["end"] - t["start"] for t in timings.values())
+    wall = max(t["end"] for t in timings.values())
+    
+    print(f"\nKriittinen polku: {' -> '.join(path)} ({path_seconds:.1f} s)")
+    print(f"Kokonaisaika: {wall:.1f} s (perakkain ajettuna {serial:.1f} s)")
+    print("\n" + "=" * 60)
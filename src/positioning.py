@@ -4,44 +4,32 @@ Analysoi miten eri yritysten viestit resonoivat eri ICP:ille
 """
 
 import os
-from openai import OpenAI
 import json
 
+from src.llm_client import create_response
+from src.json_repair import parse_json_object
+from src.json_schemas import text_format, POSITIONING_SCHEMA
+from src.prompts import build_prompt, prompt_cache_key
+from src.model_router import route
+from src.batch_runner import build_request, run_batch, BatchError
+from src.token_budget import budget, truncate_to_tokens
+from src.fingerprints import copy_fingerprint
 
-def analyze_positioning(
-    companies: list[dict],
-    icps: list[dict],
-    copies_by_company: dict,
-    api_key: str = None
-) -> dict:
+
+def build_positioning_prompt(companies: list[dict], icps: list[dict], copies_by_company: dict) -> str:
     """
-    Analysoi positioning: Kenen viesti resonoi kenellekin ICP:lle
+    Muodostaa positioning-analyysin promptin
     
     Args:
         companies: Lista yrityksiä
         icps: Lista ICP:itä
         copies_by_company: {yritys: copy_data}
-        api_key: OpenAI API-avain
         
     Returns:
-        Positioning-analyysi per yritys per ICP
+        Prompt
     """
-    
-    # Hae API-avain
-    if api_key is None:
-        api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPEN_AI_API")
-    
-    if not api_key:
-        raise ValueError("OpenAI API-avain puuttuu!")
-    
-    client = OpenAI(api_key=api_key)
-    
-    print("\n" + "=" * 60)
-    print("POSITIONING-ANALYYSI")
-    print("=" * 60)
-    
-    print(f"\nAnalysoidaan {len(companies)} yrityksen positioning")
-    print(f"{len(icps)} ICP:lle...")
+    # Etusivutekstien budjetti jaetaan tasan yritysten kesken
+    company_tokens = budget("6") // max(1, len(companies))
     
     # Muodosta yritysviestit
     companies_text = ""
@@ -52,7 +40,7 @@ def analyze_positioning(
         if copy_data.get('success'):
             hero = copy_data.get('hero_headline', '')
             value = copy_data.get('main_value_prop', '')
-            full = copy_data.get('full_text', '')[:1000]  # Max 1000 merkkiä
+            full = truncate_to_tokens(copy_data.get('full_text', ''), company_tokens)
             
             companies_text += f"\n\n=== {name} ===\n"
             companies_text += f"Hero: {hero}\n"
@@ -76,72 +64,101 @@ def analyze_positioning(
         if challenges:
             icps_text += f"   - Haasteet: {', '.join(challenges[:3])}\n"
     
-    prompt = f"""Analysoi miten eri yritysten viestit (etusivujen copyt) resonoivat eri ICP:iden kanssa.
-
-YRITYKSET JA HEIDÄN VIESTINSÄ:
-{companies_text}
-
-ICP:T (IDEAL CUSTOMER PROFILES):
-{icps_text}
-
-TEHTÄVÄ:
-Arvioi JOKAISELLE yritykselle JOKAISEN ICP:n kohdalla:
-1. SCORE (1-5): Kuinka hyvin yrityksen viesti resonoi tämän ICP:n kanssa?
-   - 1 = Ei lainkaan relevantia
-   - 2 = Vähän relevanttia
-   - 3 = Kohtuullisen relevantia
-   - 4 = Erittäin relevantia
-   - 5 = Täydellinen match
-
-2. REASONING: Miksi tämä pisteet? (2-3 lausetta)
-
-3. STRENGTHS: Vahvuudet tämän ICP:n näkökulmasta
-
-4. WEAKNESSES: Heikkoudet tämän ICP:n näkökulmasta
-
-KRITEERIT PISTEILLE:
-- Mainitaanko ICP:n toimialoja eksplisiittisesti?
-- Puhutaanko ICP:n haasteista?
-- Onko case-esimerkkejä tästä ICP:stä?
-- Onko viesti linjassa ICP:n digitaalisen kypsyyden kanssa?
-- Onko tarjonta relevanttia ICP:n tarpeille?
-
-PALAUTA JSON:
-{{
-    "analysis": [
-        {{
-            "company": "Yritys A",
-            "positioning_by_icp": [
-                {{
-                    "icp_name": "ICP 1 nimi",
-                    "score": 4,
-                    "reasoning": "Vahva fokus finanssialaan...",
-                    "strengths": ["Vahvuus 1", "Vahvuus 2"],
-                    "weaknesses": ["Heikkous 1"]
-                }}
-            ]
-        }}
-    ],
-    "icp_leaders": {{
-        "ICP 1 nimi": "Vahvin yritys tälle",
-        "ICP 2 nimi": "Vahvin yritys tälle"
-    }},
-    "overall_insights": "2-3 lauseen yhteenveto löydöksistä"
-}}
-
-TÄRKEÄÄ: Palauta VAIN JSON, ei muuta."""
-    
-    print("  - Analysoidaan GPT-5:llä...")
+    return build_prompt("6", {
+        "YRITYKSET JA HEIDÄN VIESTINSÄ": companies_text,
+        "ICP:T (IDEAL CUSTOMER PROFILES)": icps_text,
+    })
+
+
+def parse_positioning(output_text: str) -> dict:
+    """
+    Jäsentää positioning-vastauksen
+    
+    Skeema palauttaa icp_leaders-kentän listana [{"icp_name", "company"}];
+    raportti käyttää muotoa {"ICP nimi": "Yritys"}.
+    
+    Raises:
+        json.JSONDecodeError: Jos vastaus ei ole JSONia
+        ValueError: Jos vastaus ei ole JSON-objekti
+    """
+    result = parse_json_object(output_text, "Vaiheen 6 vastaus")
+    
+    leaders = result.get('icp_leaders', {})
+    if isinstance(leaders, list):
+        result['icp_leaders'] = {
+            item.get('icp_name', ''): item.get('company', '')
+            for item in leaders
+            if isinstance(item, dict)
+        }
+    
+    return result
+
+
+def analyze_positioning(
+    companies: list[dict],
+    icps: list[dict],
+    copies_by_company: dict,
+    api_key: str = None,
+    llm_mode: str = "sync"
+) -> dict:
+    """
+    Analysoi positioning: Kenen viesti resonoi kenellekin ICP:lle
+    
+    Args:
+        companies: Lista yrityksiä
+        icps: Lista ICP:itä
+        copies_by_company: {yritys: copy_data}
+        api_key: OpenAI API-avain
+        llm_mode: "sync" = kutsu heti, "batch" = Batch API -erä
+        
+    Returns:
+        Positioning-analyysi per yritys per ICP
+    """
+    
+    # Hae API-avain
+    if api_key is None:
+        api_key = os.getenv("OPENAI_API_KEY") or os.getenv("OPEN_AI_API")
+    
+    if not api_key:
+        raise ValueError("OpenAI API-avain puuttuu!")
+    
+    print("\n" + "=" * 60)
+    print("POSITIONING-ANALYYSI")
+    print("=" * 60)
+    
+    print(f"\nAnalysoidaan {len(companies)} yrityksen positioning")
+    print(f"{len(icps)} ICP:lle...")
+    
+    prompt = build_positioning_prompt(companies, icps, copies_by_company)
+    
+    print(f"  - Analysoidaan mallilla {route('6')['model']}...")
     print("  - Tämä vie ~30-60 sekuntia...")
     
     try:
-        response = client.responses.create(
-            model="gpt-5",
-            input=prompt
-        )
+        if llm_mode == "batch":
+            request = build_request(
+                "positioning",
+                **route("6"),
+                input=prompt,
+                text=text_format("positioning", POSITIONING_SCHEMA),
+                prompt_cache_key=prompt_cache_key("6")
+            )
+            responses = run_batch([request], "6", api_key)
+            response = responses.get("positioning")
+            if response is None:
+                raise BatchError("Positioning-pyynto epaonnistui erassa")
+        else:
+            response = create_response(
+                stage="6",
+                api_key=api_key,
+                **route("6"),
+                input=prompt,
+                text=text_format("positioning", POSITIONING_SCHEMA),
+                prompt_cache_key=prompt_cache_key("6")
+            )
         
         # Parsi JSON
-        result = json.loads(response.output_text)
+        result = parse_positioning(response.output_text)
         
         print("  [OK] Positioning-analyysi valmis!")
         
@@ -156,6 +173,87 @@ TÄRKEÄÄ: Palauta VAIN JSON, ei muuta."""
         raise
 
 
+def changed_companies(
+    companies: list[dict],
+    copies_by_company: dict,
+    previous_copies: dict,
+    previous_positioning: dict
+) -> list[dict]:
+    """
+    Yritykset jotka pitää pisteyttää uudelleen (--incremental)
+    
+    Yritys pisteytetään uudelleen, jos sen etusivun copy on muuttunut tai
+    sitä ei ole aiemmassa analyysissa.
+    
+    Args:
+        companies: Lista yrityksiä
+        copies_by_company: Tämän ajon {yritys: copy_data}
+        previous_copies: Aiemman ajon {yritys: copy_data}
+        previous_positioning: Aiemman ajon positioning-analyysi
+    
+    Returns:
+        Muuttuneet yritykset companies-järjestyksessä
+    """
+    scored = {item.get('company') for item in previous_positioning.get('analysis', [])}
+    changed = []
+    
+    for company in companies:
+        name = company.get('name')
+        previous_copy = previous_copies.get(name)
+        if (name not in scored or previous_copy is None or
+                copy_fingerprint(previous_copy) != copy_fingerprint(copies_by_company.get(name, {}))):
+            changed.append(company)
+    
+    return changed
+
+
+def merge_positioning(previous: dict, update: dict, companies: list[dict], icps: list[dict]) -> dict:
+    """
+    Yhdistää uudelleen pisteytettyjen yritysten tulokset aiempaan analyysiin
+    
+    Yrityskohtaiset tulokset otetaan päivityksestä jos yritys on siinä, muuten
+    aiemmasta analyysista. ICP:iden vahvimmat lasketaan yhdistetyistä pisteistä
+    (tasatilanteessa aiempi vahvin pysyy), yleiset oivallukset säilyvät aiemmasta.
+    
+    Args:
+        previous: Aiempi positioning-analyysi
+        update: Muuttuneiden yritysten positioning-analyysi
+        companies: Kaikki yritykset (järjestys)
+        icps: Lista ICP:itä
+    
+    Returns:
+        Yhdistetty positioning-analyysi
+    """
+    by_company = {item.get('company'): item for item in previous.get('analysis', [])}
+    by_company.update({item.get('company'): item for item in update.get('analysis', [])})
+    
+    analysis = [by_company[c.get('name')] for c in companies if c.get('name') in by_company]
+    
+    icp_leaders = {}
+    previous_leaders = previous.get('icp_leaders', {})
+    for icp in icps:
+        icp_name = icp.get('name')
+        scores = {
+            item.get('company'): pos.get('score', 0)
+            for item in analysis
+            for pos in item.get('positioning_by_icp', [])
+            if pos.get('icp_name') == icp_name
+        }
+        if not scores:
+            continue
+        best = max(scores.values())
+        leader = previous_leaders.get(icp_name)
+        if scores.get(leader) != best:
+            leader = next(name for name, score in scores.items() if score == best)
+        icp_leaders[icp_name] = leader
+    
+    return {
+        **previous,
+        "analysis": analysis,
+        "icp_leaders": icp_leaders,
+    }
+
+
 def print_positioning_summary(positioning_data: dict, icps: list[dict]):
     """Tulostaa positioning-analyysin yhteenvedon"""
     print("\n" + "=" * 60)
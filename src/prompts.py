@@ -0,0 +1,264 @@
+"""
+Vaiheiden promptipohjat
+Pysyvä ohjeosa (prefiksi) tulee aina ensin ja vaihtuva data loppuun, jotta
+OpenAI:n prompt caching voi käyttää saman vaiheen aiempien kutsujen prefiksiä
+"""
+
+
+# Vaihe 1A: analyze_target_company
+COMPANY_ANALYSIS_PREFIX = """Analysoi alla annetun URL:n yritys ja palauta VAIN JSON (ei muuta tekstiä).
+
+TÄRKEÄÄ:
+- Tee paras mahdollinen analyysi saatavilla olevan tiedon perusteella
+- ÄLÄ kysy mitään, vaan anna paras arvio
+- Palauta PELKKÄ JSON-objekti, ei selityksiä
+
+Analysoi:
+1. Yrityksen nimi
+2. Pääpalvelut ja tuotteet
+3. Asiakaskunta (toimialat, yrityskokoat)
+4. Value proposition
+5. Lyhyt yhteenveto
+
+JSON-rakenne (PAKOLLINEN):
+{
+    "company_name": "Yrityksen nimi",
+    "url": "Analysoitu URL sellaisenaan",
+    "services": ["Palvelu 1", "Palvelu 2"],
+    "products": ["Tuote 1"],
+    "target_customers": "Kuvaus asiakaskunnasta",
+    "customer_segments": ["Segmentti 1", "Segmentti 2"],
+    "value_proposition": "Ydinviesti",
+    "analysis": "Yhteenveto yrityksestä"
+}
+
+Palauta VAIN ylläoleva JSON, ei muuta."""
+
+# Vaihe 1B: find_competitors
+COMPETITORS_PREFIX = """TEHTÄVÄ:
+Etsi alla annetulle kohdeyritykselle pyydetty määrä pääkilpailijoita Suomen markkinassa.
+
+Kilpailijat tulee valita seuraavien kriteereiden perusteella:
+1. Tarjoavat samankaltaisia palveluita/tuotteita
+2. Palvelevat samankaltaista asiakaskuntaa (huomioi yrityskokojen samankaltaisuus)
+3. Toimivat Suomessa tai palvelevat aktiivisesti Suomen markkinaa
+4. Ovat todellisia, olemassa olevia yrityksiä
+5. Kilpailevat suorasti tai epäsuorasti samasta asiakaskunnasta
+
+Palauta vastaus JSON-muodossa:
+{
+    "target_company": "Kohdeyrityksen nimi",
+    "competitors": [
+        {
+            "name": "Kilpailijan virallinen nimi",
+            "url": "https://kilpailijan-verkkosivu.fi",
+            "description": "1-2 lauseen kuvaus yrityksestä",
+            "similarity_reason": "Miksi tämä on relevantti kilpailija (palvelut, asiakkaat, markkina-asema)"
+        }
+    ]
+}
+
+Varmista että:
+- Löydät täsmälleen pyydetyn määrän kilpailijoita
+- Kaikki kilpailijat ovat relevantteja kohdeyrityksen analyysiin nähden
+- URL:t ovat toimivia
+- similarity_reason selittää selkeästi kilpailija-aseman"""
+
+# Vaihe 3: extract_customer_names
+CUSTOMERS_PREFIX = """Etsi KAIKKI yritys- ja organisaatioiden nimet alla annetusta tekstistä, joka on haettu annetun yrityksen sivuilta.
+
+TÄRKEÄÄ:
+- Etsi VAIN yritysten ja organisaatioiden nimet (ei henkilönimiä)
+- Palauta PELKKÄ JSON-lista, ei selityksiä
+- Jos et löydä yhtään, palauta tyhjä lista: {"customers": []}
+
+Palauta JSON:
+{
+    "customers": ["Yritys 1", "Yritys 2", "Yritys 3"]
+}
+
+VAIN JSON, ei muuta tekstiä."""
+
+# Vaihe 3: extract_customer_names_batch
+CUSTOMER_BATCH_PREFIX = """Etsi KAIKKI yritys- ja organisaatioiden nimet alla annetuilta annetun yrityksen sivuilta.
+Jokainen sivu alkaa rivillä "=== SIVU <id> ===". Käsittele sivut erikseen.
+
+TÄRKEÄÄ:
+- Etsi VAIN yritysten ja organisaatioiden nimet (ei henkilönimiä)
+- Palauta jokaiselle sivulle oma rivi, myös jos nimiä ei löydy (tyhjä lista)
+- Palauta PELKKÄ JSON, ei selityksiä
+
+Palauta JSON:
+{
+    "pages": [
+        {"page_id": "p1", "customers": ["Yritys 1", "Yritys 2"]}
+    ]
+}
+
+VAIN JSON, ei muuta tekstiä."""
+
+# Vaihe 4: create_icps
+ICPS_PREFIX = """Analysoi alla annetut B2B-asiakkaat ja luo 4-6 ICP:ta (Ideal Customer Profile).
+
+TEHTAVA:
+Luo 4-6 erillaista ICP:ta nain, etta:
+1. Jokainen ICP edustaa selkeaa asiakastyyppia
+2. ICP:t kattavat mahdollisimman monen asiakkaan
+3. ICP:t ovat konkreettisia ja actionable
+
+JOKAISELLE ICP:LLE MAARITA:
+
+1. NIMI: Kuvaava nimi (esim. "Suuret finanssialan konsernit")
+
+2. FIRMOGRAFIA:
+   - company_size: Yrityksen koko (Small/Medium/Large/Enterprise)
+   - industries: Paatoimialat (lista)
+   - org_type: Organisaatiotyyppi (Private/Public/Government)
+   - geography: Maantieteellinen kattavuus
+
+3. TEKNOGRAFIA:
+   - digital_maturity: Digitaalisen kypsyyden taso (Low/Medium/High)
+   - tech_sophistication: Teknologinen edistykseellisyys
+   - innovation_appetite: Innovaatiohakuisuus (Low/Medium/High)
+
+4. TARPEET & HAASTEET:
+   - challenges: Paahaasteet (lista 3-5)
+   - typical_projects: Tyypilliset projektityypit (lista)
+   - priorities: Prioriteetit (lista)
+
+5. KAYTTAYTYMINEN:
+   - decision_speed: Paatoksenteon nopeus (Fast/Medium/Slow)
+   - budget_level: Budjettitaso (Low/Medium/High/Very High)
+   - partnership_style: Kumppanuustyyli
+
+6. ESIMERKIT:
+   - example_customers: 3-8 esimerkkia ANNETUSTA ASIAKASLISTASTA
+   - estimated_size: Kuinka monta asiakasta kuuluu tahan ICP:hen (arvio)
+
+7. MARKKINA-ARVO:
+   - market_value: Segmentin arvo (Low/Medium/High/Very High)
+   - reasoning: Lyhyt perustelu
+
+PALAUTA JSON:
+{
+    "icps": [
+        {
+            "name": "ICP nimi",
+            "firmographic": {
+                "company_size": "...",
+                "industries": ["Industry 1", "Industry 2"],
+                "org_type": "...",
+                "geography": "..."
+            },
+            "technographic": {
+                "digital_maturity": "...",
+                "tech_sophistication": "...",
+                "innovation_appetite": "..."
+            },
+            "needs": {
+                "challenges": ["Haaste 1", "Haaste 2"],
+                "typical_projects": ["Projekti 1", "Projekti 2"],
+                "priorities": ["Prioriteetti 1", "Prioriteetti 2"]
+            },
+            "behavioral": {
+                "decision_speed": "...",
+                "budget_level": "...",
+                "partnership_style": "..."
+            },
+            "example_customers": ["Asiakas 1", "Asiakas 2"],
+            "estimated_size": 10,
+            "market_value": "...",
+            "reasoning": "Miksi tama ICP on arvokas"
+        }
+    ]
+}
+
+TARKEA: Palauta VAIN JSON, ei muuta tekstia."""
+
+# Vaihe 6: analyze_positioning
+POSITIONING_PREFIX = """Analysoi miten alla annettujen yritysten viestit (etusivujen copyt) resonoivat annettujen ICP:iden (Ideal Customer Profiles) kanssa.
+
+TEHTÄVÄ:
+Arvioi JOKAISELLE yritykselle JOKAISEN ICP:n kohdalla:
+1. SCORE (1-5): Kuinka hyvin yrityksen viesti resonoi tämän ICP:n kanssa?
+   - 1 = Ei lainkaan relevantia
+   - 2 = Vähän relevanttia
+   - 3 = Kohtuullisen relevantia
+   - 4 = Erittäin relevantia
+   - 5 = Täydellinen match
+
+2. REASONING: Miksi tämä pisteet? (2-3 lausetta)
+
+3. STRENGTHS: Vahvuudet tämän ICP:n näkökulmasta
+
+4. WEAKNESSES: Heikkoudet tämän ICP:n näkökulmasta
+
+KRITEERIT PISTEILLE:
+- Mainitaanko ICP:n toimialoja eksplisiittisesti?
+- Puhutaanko ICP:n haasteista?
+- Onko case-esimerkkejä tästä ICP:stä?
+- Onko viesti linjassa ICP:n digitaalisen kypsyyden kanssa?
+- Onko tarjonta relevanttia ICP:n tarpeille?
+
+PALAUTA JSON:
+{
+    "analysis": [
+        {
+            "company": "Yritys A",
+            "positioning_by_icp": [
+                {
+                    "icp_name": "ICP 1 nimi",
+                    "score": 4,
+                    "reasoning": "Vahva fokus finanssialaan...",
+                    "strengths": ["Vahvuus 1", "Vahvuus 2"],
+                    "weaknesses": ["Heikkous 1"]
+                }
+            ]
+        }
+    ],
+    "icp_leaders": [
+        {"icp_name": "ICP 1 nimi", "company": "Vahvin yritys tälle"},
+        {"icp_name": "ICP 2 nimi", "company": "Vahvin yritys tälle"}
+    ],
+    "overall_insights": "2-3 lauseen yhteenveto löydöksistä"
+}
+
+TÄRKEÄÄ: Palauta VAIN JSON, ei muuta."""
+
+
+PREFIXES = {
+    "1A": COMPANY_ANALYSIS_PREFIX,
+    "1B": COMPETITORS_PREFIX,
+    "3": CUSTOMERS_PREFIX,
+    "3_batch": CUSTOMER_BATCH_PREFIX,
+    "4": ICPS_PREFIX,
+    "6": POSITIONING_PREFIX,
+}
+
+# Erottaa ohjeet ja datan (osa prefiksiä)
+DATA_HEADER = "\n\n### SYÖTE ###\n"
+
+
+def build_prompt(template: str, data: dict) -> str:
+    """
+    Muodostaa promptin: pysyvä prefiksi + vaihtuva data
+    
+    Args:
+        template: Promptipohjan tunnus (PREFIXES-avain)
+        data: {otsikko: arvo}, lisätään prefiksin perään annetussa järjestyksessä
+    
+    Returns:
+        Prompt
+    """
+    sections = "\n\n".join(f"{label}:\n{value}" for label, value in data.items())
+    return PREFIXES[template] + DATA_HEADER + sections
+
+
+def prompt_cache_key(template: str) -> str:
+    """
+    Palauttaa promptipohjan prompt_cache_key-arvon
+    
+    Saman pohjan kutsut ohjataan samalle välimuistille, jolloin prefiksi osuu
+    todennäköisemmin välimuistiin myös rinnakkaisissa kutsuissa.
+    """
+    return f"meom-{template}"
@@ -0,0 +1,204 @@
+"""
+Mukautuva domainikohtainen nopeusrajoitin (token bucket)
+Eri hostien pyynnöt eivät odota toisiaan; 429/503 ja Retry-After hidastavat vain kyseistä hostia
+"""
+
+import time
+import threading
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+from src import tracing
+
+
+# Pyyntöä sekunnissa per host ja kerralla sallittu purske
+DEFAULT_RATE = 4.0
+DEFAULT_BURST = 4
+
+# Nopeus ei laske tämän alle vaikka host pyytäisi hidastamaan toistuvasti
+MIN_RATE = 0.25
+
+# Retry-After-arvoa ei noudateta tätä pidempänä (sekunteja)
+MAX_RETRY_AFTER = 60
+
+# Jos 429/503 ei kerro odotusaikaa
+DEFAULT_BACKOFF = 2.0
+
+_config = {
+    "rate": DEFAULT_RATE,
+    "burst": DEFAULT_BURST,
+}
+
+_buckets = {}
+_buckets_lock = threading.Lock()
+
+
+class TokenBucket:
+    """Yhden hostin token bucket: tokens täyttyy nopeudella rate, max capacity"""
+    
+    def __init__(self, rate: float, capacity: int):
+        self.base_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.waited = 0.0
+        self.lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+    
+    def acquire(self, deadline: float = None) -> bool:
+        """
+        Ottaa yhden tokenin, odottaa tarvittaessa
+        
+        Args:
+            deadline: time.monotonic()-aika jonka jälkeen ei enää odoteta
+        
+        Returns:
+            bool: False jos token ei ehtisi vapautua ennen deadlinea
+        """
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                
+                wait = max(0.0, self.blocked_until - now)
+                if wait == 0.0:
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return True
+                    wait = (1 - self.tokens) / self.rate
+                
+                if deadline is not None and now + wait > deadline:
+                    return False
+                
+                self.waited += wait
+            
+            tracing.sleep(wait, "rate limit")
+    
+    def slow_down(self, delay: float):
+        """Estää pyynnöt delay sekunniksi ja puolittaa nopeuden"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + delay)
+            self.rate = max(MIN_RATE, self.rate / 2)
+            self.tokens = 0.0
+    
+    def speed_up(self):
+        """Palauttaa nopeutta kohti perustasoa onnistuneen pyynnön jälkeen"""
+        with self.lock:
+            if self.rate < self.base_rate:
+                self.rate = min(self.base_rate, self.rate + self.base_rate / 10)
+
+
+def configure(rate: float = None, burst: int = None):
+    """
+    Muuttaa oletusnopeutta (koskee uusia hosteja)
+    
+    Args:
+        rate: Pyyntöä sekunnissa per host
+        burst: Kerralla sallittu purske
+    
+    Raises:
+        ValueError: Jos rate ei ole positiivinen tai burst on alle 1
+    """
+    if rate is not None and not rate > 0:
+        raise ValueError(f"nopeuden pitää olla positiivinen, saatiin {rate}")
+    if burst is not None and burst < 1:
+        raise ValueError(f"purskeen pitää olla vähintään 1, saatiin {burst}")
+    
+    with _buckets_lock:
+        if rate is not None:
+            _config["rate"] = rate
+        if burst is not None:
+            _config["burst"] = burst
+        _buckets.clear()
+
+
+def _bucket(url: str) -> TokenBucket:
+    host = urlsplit(url).netloc.lower()
+    with _buckets_lock:
+        if host not in _buckets:
+            _buckets[host] = TokenBucket(_config["rate"], _config["burst"])
+        return _buckets[host]
+
+
+def acquire(url: str, deadline: float = None) -> bool:
+    """
+    Odottaa kunnes URL:n hostiin saa lähettää pyynnön
+    
+    Args:
+        url: Haettava URL
+        deadline: time.monotonic()-aika jonka jälkeen ei enää odoteta
+    
+    Returns:
+        bool: False jos vuoro ei ehtisi ennen deadlinea
+    """
+    return _bucket(url).acquire(deadline)
+
+
+def parse_retry_after(value: str) -> float:
+    """
+    Tulkitsee Retry-After-otsakkeen (sekunnit tai HTTP-päiväys)
+    
+    Args:
+        value: Otsakkeen arvo
+    
+    Returns:
+        Odotusaika sekunneissa (None jos arvo puuttuu tai on virheellinen)
+    """
+    if not value:
+        return None
+    
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def record_response(url: str, status_code: int, retry_after: str = None) -> float:
+    """
+    Päivittää hostin nopeuden vastauksen perusteella
+    
+    Args:
+        url: Haettu URL
+        status_code: HTTP-status
+        retry_after: Retry-After-otsakkeen arvo
+    
+    Returns:
+        Suositeltu odotusaika ennen uutta yritystä (None jos ei tarvitse yrittää uudelleen)
+    """
+    bucket = _bucket(url)
+    
+    if status_code not in (429, 503):
+        bucket.speed_up()
+        return None
+    
+    delay = parse_retry_after(retry_after)
+    if delay is None:
+        delay = DEFAULT_BACKOFF
+    
+    delay = min(delay, MAX_RETRY_AFTER)
+    bucket.slow_down(delay)
+    
+    return delay
+
+
+def get_wait_stats() -> dict:
+    """
+    Palauttaa hostikohtaisen odotusajan
+    
+    Returns:
+        Dictionary: {host: {"waited": sekunteja, "rate": nykyinen nopeus}}
+    """
+    with _buckets_lock:
+        return {
+            host: {"waited": round(bucket.waited, 2), "rate": bucket.rate}
+            for host, bucket in _buckets.items()
+        }
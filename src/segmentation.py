@@ -4,9 +4,15 @@ Luo 4-6 ICP:tä asiakaslistoista
 """
 
 import os
-from openai import OpenAI
 import json
 
+from src.llm_client import create_response
+from src.json_repair import parse_json_object
+from src.json_schemas import text_format, ICPS_SCHEMA
+from src.prompts import build_prompt, prompt_cache_key
+from src.model_router import route
+from src.token_budget import budget, fit_items
+
 
 def create_icps(customers_by_company: dict, api_key: str = None) -> dict:
     """
@@ -27,117 +33,42 @@ def create_icps(customers_by_company: dict, api_key: str = None) -> dict:
     if not api_key:
         raise ValueError("OpenAI API-avain puuttuu!")
     
-    client = OpenAI(api_key=api_key)
-    
     # Yhdistä kaikki asiakkaat
     all_customers = []
     for company, customers in customers_by_company.items():
         all_customers.extend(customers)
     
-    # Poista duplikaatit
-    unique_customers = list(set(all_customers))
+    # Poista duplikaatit (järjestys säilyy, jotta prompt on sama joka ajolla)
+    unique_customers = list(dict.fromkeys(all_customers))
     
     print(f"\nYhteensa {len(unique_customers)} uniikkia asiakasta")
     print("Luodaan ICP:t (Ideal Customer Profiles)...")
     
-    # Rajoita 150 ensimmäiseen jos liikaa
-    if len(unique_customers) > 150:
-        print(f"  - Rajoitetaan {len(unique_customers)} -> 150 asiakasta analyysiin")
-        unique_customers = unique_customers[:150]
+    # Rajoita asiakaslista vaiheen tokenibudjettiin
+    fitted = fit_items(unique_customers, budget("4"))
+    if len(fitted) < len(unique_customers):
+        print(f"  - Rajoitetaan {len(unique_customers)} -> {len(fitted)} asiakasta analyysiin")
+        unique_customers = fitted
     
     # Muotoile asiakkaslista
     customer_list = "\n".join([f"- {customer}" for customer in unique_customers])
     
-    prompt = f"""Analysoi seuraavat B2B-asiakkaat ja luo 4-6 ICP:ta (Ideal Customer Profile).
-
-ASIAKKAAT ({len(unique_customers)} kpl):
-{customer_list}
-
-TEHTAVA:
-Luo 4-6 erillaista ICP:ta nain, etta:
-1. Jokainen ICP edustaa selkeaa asiakastyyppia
-2. ICP:t kattavat mahdollisimman monen asiakkaan
-3. ICP:t ovat konkreettisia ja actionable
-
-JOKAISELLE ICP:LLE MAARITA:
-
-1. NIMI: Kuvaava nimi (esim. "Suuret finanssialan konsernit")
-
-2. FIRMOGRAFIA:
-   - company_size: Yrityksen koko (Small/Medium/Large/Enterprise)
-   - industries: Paatoimialat (lista)
-   - org_type: Organisaatiotyyppi (Private/Public/Government)
-   - geography: Maantieteellinen kattavuus
-
-3. TEKNOGRAFIA:
-   - digital_maturity: Digitaalisen kypsyyden taso (Low/Medium/High)
-   - tech_sophistication: Teknologinen edistykseellisyys
-   - innovation_appetite: Innovaatiohakuisuus (Low/Medium/High)
-
-4. TARPEET & HAASTEET:
-   - challenges: Paahaasteet (lista 3-5)
-   - typical_projects: Tyypilliset projektityypit (lista)
-   - priorities: Prioriteetit (lista)
-
-5. KAYTTAYTYMINEN:
-   - decision_speed: Paatoksenteon nopeus (Fast/Medium/Slow)
-   - budget_level: Budjettitaso (Low/Medium/High/Very High)
-   - partnership_style: Kumppanuustyyli
-
-6. ESIMERKIT:
-   - example_customers: 3-8 esimerkkia YLLA OLEVASTA LISTASTA
-   - estimated_size: Kuinka monta asiakasta kuuluu tahan ICP:hen (arvio)
-
-7. MARKKINA-ARVO:
-   - market_value: Segmentin arvo (Low/Medium/High/Very High)
-   - reasoning: Lyhyt perustelu
-
-PALAUTA JSON:
-{{
-    "icps": [
-        {{
-            "name": "ICP nimi",
-            "firmographic": {{
-                "company_size": "...",
-                "industries": ["Industry 1", "Industry 2"],
-                "org_type": "...",
-                "geography": "..."
-            }},
-            "technographic": {{
-                "digital_maturity": "...",
-                "tech_sophistication": "...",
-                "innovation_appetite": "..."
-            }},
-            "needs": {{
-                "challenges": ["Haaste 1", "Haaste 2"],
-                "typical_projects": ["Projekti 1", "Projekti 2"],
-                "priorities": ["Prioriteetti 1", "Prioriteetti 2"]
-            }},
-            "behavioral": {{
-                "decision_speed": "...",
-                "budget_level": "...",
-                "partnership_style": "..."
-            }},
-            "example_customers": ["Asiakas 1", "Asiakas 2"],
-            "estimated_size": 10,
-            "market_value": "...",
-            "reasoning": "Miksi tama ICP on arvokas"
-        }}
-    ]
-}}
-
-TARKEA: Palauta VAIN JSON, ei muuta tekstia."""
+    prompt = build_prompt("4", {f"ASIAKKAAT ({len(unique_customers)} kpl)": customer_list})
     
-    print("  - Analysoidaan asiakkaita GPT-5:lla...")
+    print(f"  - Analysoidaan asiakkaita mallilla {route('4')['model']}...")
     
     try:
-        response = client.responses.create(
-            model="gpt-5",
-            input=prompt
+        response = create_response(
+            stage="4",
+            api_key=api_key,
+            **route("4"),
+            input=prompt,
+            text=text_format("icps", ICPS_SCHEMA),
+            prompt_cache_key=prompt_cache_key("4")
         )
         
         # Parsi JSON
-        result = json.loads(response.output_text)
+        result = parse_json_object(response.output_text, "Vaiheen 4 vastaus")
         
         # Lisaa metatietoja
         result["total_customers"] = len(unique_customers)
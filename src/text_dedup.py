@@ -0,0 +1,106 @@
+"""
+Sivutekstien duplikaattien tunnistus
+Uudelleenohjausten kanonisointi, sisältötiiviste ja lähes-duplikaatit (shingling + Jaccard)
+"""
+
+import hashlib
+import threading
+
+from src.page_store import canonical_url
+
+
+# Shinglen pituus sanoina
+SHINGLE_SIZE = 5
+
+# Jaccard-samankaltaisuus jonka ylittyessä sivu on lähes-duplikaatti
+NEAR_DUPLICATE_THRESHOLD = 0.9
+
+
+def normalize_text(text: str) -> str:
+    """Pienet kirjaimet ja yhtenäiset välilyönnit"""
+    return ' '.join(text.lower().split())
+
+
+def content_hash(text: str) -> str:
+    """
+    Laskee normalisoidun tekstin tiivisteen
+    
+    Args:
+        text: Sivun teksti
+    
+    Returns:
+        SHA-256 heksana
+    """
+    return hashlib.sha256(normalize_text(text).encode('utf-8')).hexdigest()
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[str]:
+    """
+    Pilkkoo tekstin päällekkäisiksi size sanan jaksoiksi
+    
+    Args:
+        text: Sivun teksti
+        size: Shinglen pituus sanoina
+    
+    Returns:
+        Joukko shinglejä
+    """
+    words = normalize_text(text).split()
+    
+    if len(words) <= size:
+        return {' '.join(words)} if words else set()
+    
+    return {' '.join(words[i:i + size]) for i in range(len(words) - size + 1)}
+
+
+def jaccard(a: set, b: set) -> float:
+    """Jaccard-samankaltaisuus kahden joukon välillä"""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+class PageDeduplicator:
+    """
+    Pitää kirjaa jo käsitellyistä sivuista (säieturvallinen)
+    
+    Sivu on duplikaatti jos sen lopullinen URL (uudelleenohjausten jälkeen),
+    tekstin tiiviste tai shinglejoukko vastaa jo nähtyä sivua.
+    """
+    
+    def __init__(self, threshold: float = NEAR_DUPLICATE_THRESHOLD):
+        self.threshold = threshold
+        self.urls = set()
+        self.hashes = set()
+        self.shingle_sets = []
+        self.lock = threading.Lock()
+    
+    def check(self, final_url: str, text: str) -> str:
+        """
+        Tarkistaa sivun ja rekisteröi sen jos se on uusi
+        
+        Args:
+            final_url: Sivun URL uudelleenohjausten jälkeen
+            text: Sivun teksti
+        
+        Returns:
+            Syy ("url", "hash", "near") jos duplikaatti, muuten None
+        """
+        url_key = canonical_url(final_url).rstrip('/')
+        text_hash = content_hash(text)
+        text_shingles = shingles(text)
+        
+        with self.lock:
+            if url_key in self.urls:
+                return "url"
+            if text_hash in self.hashes:
+                return "hash"
+            for seen in self.shingle_sets:
+                if jaccard(text_shingles, seen) >= self.threshold:
+                    return "near"
+            
+            self.urls.add(url_key)
+            self.hashes.add(text_hash)
+            self.shingle_sets.append(text_shingles)
+        
+        return None
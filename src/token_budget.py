@@ -0,0 +1,136 @@
+"""
+Tokenibudjetit vaiheittain
+Laskee tokenit paikallisesti (tiktoken jos asennettu, muuten ~4 merkkiä per token) ja sovittaa syötteet budjettiin
+"""
+
+import threading
+
+
+# Tokenisointi (GPT-5 käyttää o200k-sanastoa)
+ENCODING_NAME = "o200k_base"
+
+# Arvio kun tiktokenia ei ole
+CHARS_PER_TOKEN = 4
+
+# Vaihekohtaiset budjetit tokeneina
+DEFAULT_BUDGETS = {
+    "3": 4000,          # Yhden asiakassivun teksti
+    "3_batch": 16000,   # Yhden eräpyynnön sivut yhteensä
+    "4": 3000,          # ICP-analyysin asiakaslista
+    "5": 1250,          # Etusivun koko teksti (full_text)
+    "6": 3000,          # Kaikkien yritysten etusivutekstit yhteensä
+}
+
+_budgets = dict(DEFAULT_BUDGETS)
+
+_encoding = None
+_encoding_loaded = False
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    """Lataa tiktoken-sanaston ensimmäisellä käytöllä (None jos ei saatavilla)"""
+    global _encoding, _encoding_loaded
+    
+    with _encoding_lock:
+        if not _encoding_loaded:
+            _encoding_loaded = True
+            try:
+                import tiktoken
+                _encoding = tiktoken.get_encoding(ENCODING_NAME)
+            except Exception:
+                _encoding = None
+    
+    return _encoding
+
+
+def configure(budgets: dict = None):
+    """
+    Muuttaa vaihekohtaisia budjetteja
+    
+    Args:
+        budgets: {vaihe: tokenit}, esim. {"3": 6000}
+    """
+    for stage, tokens in (budgets or {}).items():
+        if stage not in DEFAULT_BUDGETS:
+            raise ValueError(f"Tuntematon vaihe: {stage} (vaihtoehdot: {', '.join(DEFAULT_BUDGETS)})")
+        _budgets[stage] = int(tokens)
+
+
+def budget(stage: str) -> int:
+    """Palauttaa vaiheen tokenibudjetin"""
+    return _budgets[stage]
+
+
+def count_tokens(text: str) -> int:
+    """
+    Laskee tekstin tokenit
+    
+    Args:
+        text: Teksti
+    
+    Returns:
+        Tokenien määrä (arvio jos tiktoken ei ole käytettävissä)
+    """
+    if not text:
+        return 0
+    
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def truncate_to_tokens(text: str, max_tokens: int, suffix: str = "...") -> str:
+    """
+    Lyhentää tekstin budjettiin
+    
+    Args:
+        text: Teksti
+        max_tokens: Maksimimäärä tokeneita
+        suffix: Lisätään loppuun jos tekstiä lyhennettiin
+    
+    Returns:
+        Teksti joka mahtuu budjettiin
+    """
+    if not text or count_tokens(text) <= max_tokens:
+        return text
+    
+    encoding = _get_encoding()
+    if encoding is not None:
+        truncated = encoding.decode(encoding.encode(text, disallowed_special=())[:max_tokens])
+    else:
+        truncated = text[:max_tokens * CHARS_PER_TOKEN]
+    
+    # Älä katkaise sanaa kesken
+    cut = truncated.rfind(' ')
+    if cut > len(truncated) // 2:
+        truncated = truncated[:cut]
+    
+    return truncated + suffix
+
+
+def fit_items(items: list[str], max_tokens: int) -> list[str]:
+    """
+    Palauttaa niin monta alkua listasta kuin budjettiin mahtuu (rivi per alkio)
+    
+    Args:
+        items: Lista tekstejä
+        max_tokens: Maksimimäärä tokeneita
+    
+    Returns:
+        Listan alku joka mahtuu budjettiin
+    """
+    fitted = []
+    used = 0
+    
+    for item in items:
+        # +1 rivinvaihdolle / listamerkille
+        tokens = count_tokens(item) + 1
+        if used + tokens > max_tokens:
+            break
+        fitted.append(item)
+        used += tokens
+    
+    return fitted
@@ -0,0 +1,196 @@
+"""
+Ajon jäljitys (tracing)
+Spanit vaiheille, HTTP-hauille, HTML-parsinnalle, LLM-kutsuille ja odotuksille. Vienti Chrome trace
+-muotoon (chrome://tracing, ui.perfetto.dev) ja yhteenveto ajasta kategorioittain (analyzer.py --trace)
+"""
+
+import os
+import json
+import time
+import threading
+from contextlib import contextmanager
+
+
+# Kategoriat yhteenvedon järjestyksessä
+CATEGORIES = ("stage", "http", "parse", "llm", "sleep")
+
+_enabled = {"on": False}
+_origin = {"time": time.perf_counter()}
+_spans = []
+_threads = {}
+_lock = threading.Lock()
+
+
+def configure(enabled: bool = None):
+    """
+    Kytkee jäljityksen päälle tai pois (pois päältä span() ei kirjaa mitään)
+    
+    Args:
+        enabled: True = kirjataan spanit, aikaleimat lasketaan tästä hetkestä
+    """
+    if enabled is not None:
+        with _lock:
+            _enabled["on"] = enabled
+            if enabled:
+                _origin["time"] = time.perf_counter()
+
+
+def is_enabled() -> bool:
+    return _enabled["on"]
+
+
+@contextmanager
+def span(name: str, category: str, **attributes):
+    """
+    Mittaa lohkon keston
+    
+    Lohkossa voi lisätä attribuutteja palautettuun dictiin (esim. tavut tai
+    tokenit kun ne selviävät). Poikkeus kirjataan attribuuttiin "error".
+    
+        with tracing.span("GET", "http", url=url) as attrs:
+            response = ...
+            attrs["bytes"] = len(response.content)
+    
+    Args:
+        name: Spanin nimi, esim. "Vaihe 3" tai "GET"
+        category: Yksi CATEGORIES-arvoista
+        **attributes: Spanin attribuutit, esim. url, model
+    """
+    if not _enabled["on"]:
+        yield attributes
+        return
+    
+    start = time.perf_counter()
+    try:
+        yield attributes
+    except BaseException as e:
+        attributes["error"] = type(e).__name__
+        raise
+    finally:
+        end = time.perf_counter()
+        thread = threading.current_thread()
+        with _lock:
+            _threads.setdefault(thread.ident, thread.name)
+            _spans.append({
+                "name": name,
+                "category": category,
+                "start": start - _origin["time"],
+                "duration": end - start,
+                "tid": thread.ident,
+                "attributes": attributes,
+            })
+
+
+def sleep(seconds: float, name: str = "sleep", **attributes):
+    """time.sleep joka kirjataan sleep-kategorian spaniksi"""
+    with span(name, "sleep", seconds=round(seconds, 3), **attributes):
+        time.sleep(seconds)
+
+
+def get_spans() -> list[dict]:
+    """Palauttaa kirjatut spanit alkuhetken mukaan järjestettynä"""
+    with _lock:
+        return sorted((dict(s) for s in _spans), key=lambda s: s["start"])
+
+
+def to_chrome_trace() -> dict:
+    """
+    Muuntaa spanit Chrome trace event -muotoon
+    
+    Returns:
+        {"traceEvents": [...], "displayTimeUnit": "ms"}; ajat mikrosekunteina
+    """
+    pid = os.getpid()
+    with _lock:
+        threads = dict(_threads)
+    
+    events = [
+        {"name": "thread_name", "ph": "M", "pid": pid, "tid": tid, "args": {"name": name}}
+        for tid, name in threads.items()
+    ]
+    events.extend(
+        {
+            "name": s["name"],
+            "cat": s["category"],
+            "ph": "X",
+            "ts": round(s["start"] * 1e6),
+            "dur": round(s["duration"] * 1e6),
+            "pid": pid,
+            "tid": s["tid"],
+            "args": s["attributes"],
+        }
+        for s in get_spans()
+    )
+    
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def export(path: str):
+    """
+    Tallentaa spanit Chrome trace -JSON-tiedostoon
+    
+    Raises:
+        OSError: Jos tiedostoa ei voi kirjoittaa
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(to_chrome_trace(), f, ensure_ascii=False, default=str)
+
+
+def summarize() -> dict:
+    """
+    Laskee ajan kategorioittain
+    
+    Rinnakkaiset spanit lasketaan yhteen, joten summa voi ylittää seinäkelloajan.
+    
+    Returns:
+        {kategoria: {"count", "total", "max"}} sekunteina
+    """
+    summary = {}
+    for s in get_spans():
+        c = summary.setdefault(s["category"], {"count": 0, "total": 0.0, "max": 0.0})
+        c["count"] += 1
+        c["total"] += s["duration"]
+        c["max"] = max(c["max"], s["duration"])
+    return summary
+
+
+def print_summary(slowest: int = 5):
+    """Tulostaa ajan kategorioittain ja hitaimmat yksittäiset spanit"""
+    summary = summarize()
+    if not summary:
+        return
+    
+    print("\n" + "=" * 60)
+    print("JALJITYS - AIKA KATEGORIOITTAIN")
+    print("=" * 60)
+    print(f"\n{'Kategoria':<12}{'Spanit':>8}{'Yht. s':>10}{'Ka. ms':>10}{'Max s':>10}")
+    print("-" * 60)
+    
+    order = sorted(summary, key=lambda c: CATEGORIES.index(c) if c in CATEGORIES else len(CATEGORIES))
+    for category in order:
+        c = summary[category]
+        print(f"{category:<12}{c['count']:>8}{c['total']:>10.2f}"
+              f"{1000 * c['total'] / c['count']:>10.1f}{c['max']:>10.2f}")
+    
+    spans = [s for s in get_spans() if s["category"] != "stage"]
+    if spans:
+        print("\nHitaimmat:")
+        for s in sorted(spans, key=lambda s: s["duration"], reverse=True)[:slowest]:
+            detail = s["attributes"].get("url") or s["attributes"].get("model") or ""
+            print(f"  {s['duration']:>7.2f} s  {s['category']:<6} {s['name']} {str(detail)[:60]}")
+    
+    print("\nSpanit ovat sisäkkäisiä (vaihe sisältää haut, haku nopeusrajoituksen odotukset) ja")
+    print("rinnakkaisia, joten kategorioiden summat voivat ylittää kokonaisajan.")
+    print("=" * 60)
+
+
+def clear():
+    """Tyhjentää kirjatut spanit"""
+    with _lock:
+        _spans.clear()
+        _threads.clear()
+        _origin["time"] = time.perf_counter()
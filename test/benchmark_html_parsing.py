@@ -0,0 +1,140 @@
+"""
+HTML-parsereiden benchmark
+Mittaa backendien nopeuden tallennetulla etusivukorpuksella ja vertaa tuloksia html.parseriin.
+Identtisyys koskee vain mitattua korpusta (virheellinen HTML: ks. test_html_parsing.py).
+"""
+
+import os
+import re
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.html_parsing import available_backends, parse_document, DEFAULT_BACKEND
+
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+DEFAULT_URLS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_urls.txt')
+
+
+def save_corpus(url_file: str, corpus_dir: str):
+    """Hakee URL-listan etusivut ja tallentaa ne korpukseen"""
+    from src.http_client import fetch
+    
+    os.makedirs(corpus_dir, exist_ok=True)
+    
+    with open(url_file, 'r', encoding='utf-8') as f:
+        urls = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    
+    for url in urls:
+        name = re.sub(r'[^a-z0-9]+', '-', url.lower().split('://', 1)[-1]).strip('-')
+        try:
+            response = fetch(url)
+        except Exception as e:
+            print(f"  [WARN] {url}: {type(e).__name__}")
+            continue
+        
+        with open(os.path.join(corpus_dir, name + '.html'), 'wb') as f:
+            f.write(response.content)
+        print(f"  [OK] {url} ({len(response.content)} tavua)")
+
+
+def load_corpus(corpus_dir: str) -> dict:
+    """Lataa korpuksen: {tiedostonimi: bytes}"""
+    pages = {}
+    for name in sorted(os.listdir(corpus_dir)):
+        if name.endswith(('.html', '.htm')):
+            with open(os.path.join(corpus_dir, name), 'rb') as f:
+                pages[name] = f.read()
+    return pages
+
+
+def run_benchmark(pages: dict, backends: list[str], repeat: int = 5) -> dict:
+    """
+    Ajaa benchmarkin
+    
+    Returns:
+        {backend: {"ms_per_page": float, "identical": N, "mismatches": [nimi, ...]}}
+    """
+    reference = {name: parse_document(content, DEFAULT_BACKEND) for name, content in pages.items()}
+    results = {}
+    
+    for backend in backends:
+        mismatches = []
+        for name, content in pages.items():
+            if parse_document(content, backend) != reference[name]:
+                mismatches.append(name)
+        
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for content in pages.values():
+                parse_document(content, backend)
+        elapsed = time.perf_counter() - start
+        
+        results[backend] = {
+            "ms_per_page": elapsed * 1000 / (repeat * len(pages)),
+            "identical": len(pages) - len(mismatches),
+            "mismatches": mismatches,
+        }
+    
+    return results
+
+
+def print_results(results: dict, page_count: int):
+    """Tulostaa tulostaulukon"""
+    baseline = results.get(DEFAULT_BACKEND, {}).get("ms_per_page")
+    
+    print("\n" + "=" * 60)
+    print(f"HTML-PARSERIT ({page_count} sivua)")
+    print("=" * 60)
+    print(f"\n{'Backend':<14}{'ms/sivu':>10}{'nopeutus':>10}{'identtisia':>14}")
+    print("-" * 60)
+    
+    for backend, r in results.items():
+        speedup = f"{baseline / r['ms_per_page']:.1f}x" if baseline else "-"
+        print(f"{backend:<14}{r['ms_per_page']:>10.2f}{speedup:>10}"
+              f"{r['identical']:>9}/{page_count}")
+    
+    for backend, r in results.items():
+        for name in r["mismatches"]:
+            print(f"  [DIFF] {backend}: {name}")
+    
+    print("\nIdenttisyys koskee vain tätä korpusta: virheellisessä HTML:ssä kappaleet voivat poiketa.")
+    
+    print("\n" + "=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="HTML-parsereiden benchmark")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="Korpushakemisto (.html-tiedostot)")
+    parser.add_argument("--save-corpus", metavar="URL_FILE", nargs='?', const=DEFAULT_URLS,
+                        help="Hae URL-listan etusivut korpukseen ennen benchmarkia")
+    parser.add_argument("--repeat", type=int, default=5, help="Toistokerrat per sivu")
+    parser.add_argument("--backends", nargs='+', default=None, help="Mitattavat backendit")
+    args = parser.parse_args()
+    
+    if args.save_corpus:
+        print(f"Tallennetaan korpus: {args.corpus}")
+        save_corpus(args.save_corpus, args.corpus)
+    
+    if not os.path.isdir(args.corpus):
+        print(f"[FAIL] Korpusta ei loydy: {args.corpus}")
+        print("   Aja ensin: python test/benchmark_html_parsing.py --save-corpus")
+        return 1
+    
+    pages = load_corpus(args.corpus)
+    if not pages:
+        print(f"[FAIL] Korpus on tyhja: {args.corpus}")
+        return 1
+    
+    backends = args.backends or available_backends()
+    results = run_benchmark(pages, backends, args.repeat)
+    print_results(results, len(pages))
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
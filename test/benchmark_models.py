@@ -0,0 +1,293 @@
+"""
+Mallien benchmark
+Toistaa nauhoitetut LLM-pyynnöt (analyzer.py --record-llm) eri malleilla ja vertaa vastauksia alkuperäisiin
+
+Mittaa latenssin, tokenit ja yhtäpitävyyden nauhoitettuun vastaukseen vaiheittain, jotta
+runsaasti kutsuja tekevät vaiheet (esim. 3) voi siirtää nopeammalle mallille luotettavasti.
+Oletuksena pyynnöt ajetaan paikallista testipalvelinta (fake_openai_server.py) vasten.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import threading
+from http.server import ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from openai import OpenAI
+
+from src.json_repair import parse_json
+from src.model_router import STAGES, REASONING_EFFORTS
+
+
+DEFAULT_CORPUS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'llm_corpus.jsonl')
+DEFAULT_CANDIDATES = ["gpt-5", "gpt-5-mini:minimal", "gpt-5-nano:minimal"]
+
+
+def load_corpus(path: str, stages: list[str] = None) -> list[dict]:
+    """Lataa nauhoitetut pyynnöt: [{"stage", "request", "output_text"}]"""
+    records = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if stages and record["stage"] not in stages:
+                continue
+            records.append(record)
+    return records
+
+
+def parse_candidate(spec: str) -> dict:
+    """'malli[:effort]' -> {"model", "reasoning_effort"}"""
+    model, _, effort = spec.partition(":")
+    if effort and effort not in REASONING_EFFORTS:
+        raise ValueError(f"Tuntematon reasoning effort: {effort}")
+    return {"model": model, "reasoning_effort": effort or None}
+
+
+def _jaccard(a: set, b: set) -> float:
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+
+def _names(values) -> set:
+    return {str(v).strip().lower() for v in values if v}
+
+
+def _customer_pairs(data: dict) -> set:
+    """Vaihe 3: (sivu, nimi) -parit, yksittäisen sivun vastauksessa sivu on tyhjä"""
+    if "pages" in data:
+        return {
+            (str(page.get("page_id")), name)
+            for page in data.get("pages", [])
+            for name in _names(page.get("customers", []))
+        }
+    return {("", name) for name in _names(data.get("customers", []))}
+
+
+def _same_group_pairs(icps: list) -> tuple[set, set]:
+    """Vaihe 4: asiakkaat ja asiakasparit jotka ovat samassa ICP:ssä"""
+    customers = set()
+    pairs = set()
+    for icp in icps:
+        members = sorted(_names(icp.get("example_customers", [])))
+        customers.update(members)
+        pairs.update((a, b) for i, a in enumerate(members) for b in members[i + 1:])
+    return customers, pairs
+
+
+def _icp_agreement(reference: dict, candidate: dict) -> float:
+    """Rand-indeksi esimerkkiasiakkaiden ryhmittelystä (ICP-nimet ovat vapaata tekstiä)"""
+    ref_customers, ref_pairs = _same_group_pairs(reference.get("icps", []))
+    cand_customers, cand_pairs = _same_group_pairs(candidate.get("icps", []))
+    
+    common = sorted(ref_customers & cand_customers)
+    all_pairs = [(a, b) for i, a in enumerate(common) for b in common[i + 1:]]
+    if not all_pairs:
+        return _jaccard(ref_customers, cand_customers)
+    
+    same = sum(1 for pair in all_pairs if (pair in ref_pairs) == (pair in cand_pairs))
+    return same / len(all_pairs)
+
+
+def _scores(data: dict) -> dict:
+    """Vaihe 6: {(yritys, icp): pisteet}"""
+    return {
+        (str(item.get("company")).lower(), str(score.get("icp_name")).lower()): score.get("score")
+        for item in data.get("analysis", [])
+        for score in item.get("positioning_by_icp", [])
+    }
+
+
+def agreement(stage: str, reference_text: str, candidate_text: str) -> float:
+    """
+    Yhtäpitävyys nauhoitettuun vastaukseen (0.0-1.0)
+    
+    Vaihe 1A: palveluiden, tuotteiden ja segmenttien Jaccard
+    Vaihe 1B: kilpailijoiden nimien Jaccard
+    Vaihe 3:  asiakasnimien Jaccard (sivuittain eräpyynnöissä)
+    Vaihe 4:  esimerkkiasiakkaiden ryhmittelyn Rand-indeksi
+    Vaihe 6:  osuus yritys-ICP-pisteistä jotka ovat ±1 sisällä
+    """
+    try:
+        reference = parse_json(reference_text)
+        candidate = parse_json(candidate_text)
+    except json.JSONDecodeError:
+        return 0.0
+    
+    if stage == "1A":
+        keys = ("services", "products", "customer_segments")
+        return _jaccard(
+            _names(v for key in keys for v in reference.get(key, [])),
+            _names(v for key in keys for v in candidate.get(key, []))
+        )
+    
+    if stage == "1B":
+        return _jaccard(
+            _names(c.get("name") for c in reference.get("competitors", [])),
+            _names(c.get("name") for c in candidate.get("competitors", []))
+        )
+    
+    if stage == "3":
+        return _jaccard(_customer_pairs(reference), _customer_pairs(candidate))
+    
+    if stage == "4":
+        return _icp_agreement(reference, candidate)
+    
+    if stage == "6":
+        ref_scores = _scores(reference)
+        cand_scores = _scores(candidate)
+        if not ref_scores:
+            return float(not cand_scores)
+        close = sum(
+            1 for key, score in ref_scores.items()
+            if isinstance(score, int) and isinstance(cand_scores.get(key), int)
+            and abs(score - cand_scores[key]) <= 1
+        )
+        return close / len(ref_scores)
+    
+    return float(reference == candidate)
+
+
+def replay(client: OpenAI, record: dict, candidate: dict) -> dict:
+    """Ajaa yhden nauhoitetun pyynnön ehdokasmallilla"""
+    request = dict(record["request"])
+    request["model"] = candidate["model"]
+    request.pop("reasoning", None)
+    if candidate["reasoning_effort"]:
+        request["reasoning"] = {"effort": candidate["reasoning_effort"]}
+    
+    start = time.perf_counter()
+    try:
+        response = client.responses.create(**request)
+    except Exception as e:
+        print(f"  [WARN] {candidate['model']} vaihe {record['stage']}: {type(e).__name__}")
+        return {"latency": time.perf_counter() - start, "error": True}
+    
+    latency = time.perf_counter() - start
+    usage = getattr(response, 'usage', None)
+    
+    return {
+        "latency": latency,
+        "error": False,
+        "input_tokens": getattr(usage, 'input_tokens', 0) or 0,
+        "output_tokens": getattr(usage, 'output_tokens', 0) or 0,
+        "agreement": agreement(record["stage"], record["output_text"], response.output_text),
+    }
+
+
+def run_benchmark(client: OpenAI, records: list[dict], candidates: list[dict]) -> dict:
+    """
+    Ajaa benchmarkin
+    
+    Returns:
+        {(vaihe, malli, effort): {"requests", "errors", "latency_avg", "latency_max",
+                                  "input_tokens", "output_tokens", "agreement"}}
+    """
+    results = {}
+    
+    for candidate in candidates:
+        for record in records:
+            key = (record["stage"], candidate["model"], candidate["reasoning_effort"] or "-")
+            r = replay(client, record, candidate)
+            
+            m = results.setdefault(key, {
+                "requests": 0, "errors": 0, "latency_total": 0.0, "latency_max": 0.0,
+                "input_tokens": 0, "output_tokens": 0, "agreement_total": 0.0,
+            })
+            m["requests"] += 1
+            m["latency_total"] += r["latency"]
+            m["latency_max"] = max(m["latency_max"], r["latency"])
+            if r["error"]:
+                m["errors"] += 1
+                continue
+            m["input_tokens"] += r["input_tokens"]
+            m["output_tokens"] += r["output_tokens"]
+            m["agreement_total"] += r["agreement"]
+    
+    for m in results.values():
+        ok = m["requests"] - m["errors"]
+        m["latency_avg"] = m.pop("latency_total") / m["requests"]
+        m["agreement"] = m.pop("agreement_total") / ok if ok else 0.0
+    
+    return results
+
+
+def print_results(results: dict, record_count: int):
+    """Tulostaa tulostaulukon"""
+    print("\n" + "=" * 78)
+    print(f"MALLIT ({record_count} nauhoitettua pyyntöä)")
+    print("=" * 78)
+    print(f"\n{'Vaihe':<7}{'Malli':<20}{'Effort':<9}{'Pyyntöjä':>9}{'Ka. s':>8}{'Max s':>8}"
+          f"{'Tok in':>8}{'Tok out':>8}{'Sama %':>8}")
+    print("-" * 78)
+    
+    def order(item):
+        stage, model, effort = item[0]
+        return (STAGES.index(stage) if stage in STAGES else len(STAGES), model, effort)
+    
+    for (stage, model, effort), m in sorted(results.items(), key=order):
+        ok = m["requests"] - m["errors"]
+        in_avg = m["input_tokens"] // ok if ok else 0
+        out_avg = m["output_tokens"] // ok if ok else 0
+        print(f"{stage:<7}{model:<20}{effort:<9}{m['requests']:>9}{m['latency_avg']:>8.2f}{m['latency_max']:>8.2f}"
+              f"{in_avg:>8}{out_avg:>8}{100 * m['agreement']:>7.0f}%")
+    
+    print("\nTokenit ovat keskiarvoja per pyyntö. Sama % = yhtäpitävyys nauhoitettuun vastaukseen.")
+    print("=" * 78)
+
+
+def start_stand_in() -> str:
+    """Käynnistää paikallisen testipalvelimen taustalle ja palauttaa sen base URL:n"""
+    from fake_openai_server import Handler
+    
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mallien benchmark nauhoitetuilla LLM-pyynnöillä")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS,
+                        help="Nauhoitus (analyzer.py --record-llm tiedosto.jsonl)")
+    parser.add_argument("--candidates", nargs='+', default=DEFAULT_CANDIDATES, metavar="MALLI[:EFFORT]",
+                        help=f"Verrattavat mallit (oletus: {' '.join(DEFAULT_CANDIDATES)})")
+    parser.add_argument("--stages", nargs='+', choices=STAGES, help="Mitattavat vaiheet (oletus: kaikki)")
+    parser.add_argument("--base-url", default=None,
+                        help="OpenAI-yhteensopiva API (oletus: paikallinen testipalvelin)")
+    args = parser.parse_args()
+    
+    if not os.path.isfile(args.corpus):
+        print(f"[FAIL] Nauhoitusta ei loydy: {args.corpus}")
+        print(f"   Aja ensin: python analyzer.py --url https://yritys.fi --record-llm {args.corpus}")
+        return 1
+    
+    records = load_corpus(args.corpus, args.stages)
+    if not records:
+        print(f"[FAIL] Nauhoituksessa ei ole pyyntöjä valituille vaiheille: {args.corpus}")
+        return 1
+    
+    try:
+        candidates = [parse_candidate(spec) for spec in args.candidates]
+    except ValueError as e:
+        print(f"[FAIL] {e}")
+        return 1
+    
+    base_url = args.base_url or start_stand_in()
+    api_key = os.getenv("OPENAI_API_KEY") if args.base_url else "test"
+    print(f"API: {base_url}")
+    
+    client = OpenAI(api_key=api_key or "test", base_url=base_url, max_retries=2)
+    results = run_benchmark(client, records, candidates)
+    print_results(results, len(records))
+    
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
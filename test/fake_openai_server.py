@@ -0,0 +1,277 @@
+"""
+Paikallinen OpenAI-testipalvelin (Responses, Files ja Batches API)
+Vastaa deterministisesti ilman verkkoa, jotta eräajoa ja LLM-vaiheita voi testata
+
+Käyttö:
+    python test/fake_openai_server.py --port 8780
+    OPENAI_BASE_URL=http://127.0.0.1:8780/v1 OPENAI_API_KEY=test python analyzer.py ...
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from email.parser import BytesParser
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+# Yritysnimet joissa on yhtiömuoto, esim. "Nokia Oyj" tai "Kesko Oy"
+COMPANY_PATTERN = re.compile(r"\b[A-ZÅÄÖ][\w&-]*(?: [A-ZÅÄÖ][\w&-]*)* (?:Oyj|Oy|Ab|Ltd|Inc)\b")
+
+# Prompt caching kuten OpenAI:lla: vähintään 1024 tokenin yhteinen prefiksi, 128 tokenin askelin
+PROMPT_CACHE_MIN_TOKENS = 1024
+PROMPT_CACHE_STEP = 128
+
+# Keinotekoinen vastausviive sekunneissa (--latency), jotta rinnakkaisuuden vaikutus näkyy
+_latency = {"seconds": 0.0}
+
+_files = {}
+_batches = {}
+_prompts = {}
+# RLock: erän käsittely (run_batch_job) kutsuu make_responsea lukon sisältä
+_lock = threading.RLock()
+
+
+def _names(text: str) -> list[str]:
+    return list(dict.fromkeys(COMPANY_PATTERN.findall(text)))
+
+
+def answer(prompt: str) -> str:
+    """Muodostaa vastaustekstin promptin perusteella"""
+    if "=== SIVU" in prompt:
+        blocks = re.split(r"=== SIVU (\S+) ===\n", prompt)[1:]
+        pages = [
+            {"page_id": page_id, "customers": _names(text)}
+            for page_id, text in zip(blocks[0::2], blocks[1::2])
+        ]
+        return json.dumps({"pages": pages}, ensure_ascii=False)
+    
+    if '"customers"' in prompt:
+        return json.dumps({"customers": _names(prompt.split("TEKSTI:\n", 1)[-1])}, ensure_ascii=False)
+    
+    if "positioning_by_icp" in prompt:
+        companies = re.findall(r"\n=== (.+?) ===\n", prompt)
+        icps = re.findall(r"\n\d+\. (.+)\n", prompt.rsplit("ICP:T", 1)[-1])
+        analysis = [
+            {
+                "company": company,
+                "positioning_by_icp": [
+                    {"icp_name": icp, "score": 3, "reasoning": "Testi", "strengths": [], "weaknesses": []}
+                    for icp in icps
+                ],
+            }
+            for company in companies
+        ]
+        return json.dumps({
+            "analysis": analysis,
+            "icp_leaders": [{"icp_name": icp, "company": companies[0]} for icp in icps] if companies else [],
+            "overall_insights": "Testi",
+        }, ensure_ascii=False)
+    
+    if '"competitors"' in prompt:
+        count = int(re.search(r"KILPAILIJOIDEN MÄÄRÄ:\n(\d+)", prompt).group(1))
+        url = re.search(r"URL: (\S+)", prompt).group(1)
+        return json.dumps({
+            "target_company": "Kohde Oy",
+            "competitors": [
+                {"name": f"Kilpailija {i} Oy", "url": url, "description": "Testi", "similarity_reason": "Testi"}
+                for i in range(1, count + 1)
+            ],
+        }, ensure_ascii=False)
+    
+    if '"company_name"' in prompt:
+        url = prompt.rsplit("URL:\n", 1)[-1].strip()
+        return json.dumps({
+            "company_name": "Kohde Oy", "url": url, "services": ["Testi"], "products": [],
+            "target_customers": "Testi", "customer_segments": [], "value_proposition": "Testi",
+            "analysis": "Testi",
+        }, ensure_ascii=False)
+    
+    return "{}"
+
+
+def _cached_tokens(key: str, prompt: str) -> int:
+    """Laskee kuinka monta tokenia promptin alusta löytyy saman avaimen aiemmista prompteista"""
+    with _lock:
+        common = max((len(os.path.commonprefix([prompt, seen])) for seen in _prompts.get(key, ())), default=0)
+        _prompts.setdefault(key, []).append(prompt)
+    
+    tokens = common // 4
+    if tokens < PROMPT_CACHE_MIN_TOKENS:
+        return 0
+    return tokens - tokens % PROMPT_CACHE_STEP
+
+
+def make_response(body: dict) -> dict:
+    """Muodostaa Responses API -vastauksen"""
+    prompt = body.get("input", "")
+    if not isinstance(prompt, str):
+        prompt = json.dumps(prompt, ensure_ascii=False)
+    
+    text = answer(prompt)
+    # Työkalut ja vastausskeema kuuluvat välimuistin prefiksiin ennen promptia
+    cache_prefix = json.dumps([body.get("tools", []), body.get("text", {})], sort_keys=True)
+    cached_tokens = _cached_tokens(body.get("prompt_cache_key") or body.get("model", ""), cache_prefix + prompt)
+    input_tokens = len(cache_prefix + prompt) // 4 + 1
+    output_tokens = len(text) // 4 + 1
+    
+    return {
+        "id": f"resp_{uuid.uuid4().hex[:12]}",
+        "object": "response",
+        "created_at": int(time.time()),
+        "model": body.get("model", "gpt-5"),
+        "status": "completed",
+        "output": [{
+            "type": "message",
+            "id": f"msg_{uuid.uuid4().hex[:12]}",
+            "role": "assistant",
+            "status": "completed",
+            "content": [{"type": "output_text", "text": text, "annotations": []}],
+        }],
+        "parallel_tool_calls": True,
+        "tool_choice": "auto",
+        "tools": body.get("tools", []),
+        "usage": {
+            "input_tokens": input_tokens,
+            "input_tokens_details": {"cached_tokens": cached_tokens, "cache_write_tokens": 0},
+            "output_tokens": output_tokens,
+            "output_tokens_details": {"reasoning_tokens": 0},
+            "total_tokens": input_tokens + output_tokens,
+        },
+    }
+
+
+def _file_object(file_id: str, filename: str, size: int, purpose: str) -> dict:
+    return {
+        "id": file_id,
+        "object": "file",
+        "bytes": size,
+        "created_at": int(time.time()),
+        "filename": filename,
+        "purpose": purpose,
+        "status": "processed",
+    }
+
+
+def run_batch_job(batch: dict):
+    """Käsittelee erän heti ja kirjoittaa tulostiedoston"""
+    lines = []
+    for line in _files[batch["input_file_id"]]["content"].decode("utf-8").splitlines():
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        lines.append(json.dumps({
+            "id": f"batch_req_{uuid.uuid4().hex[:12]}",
+            "custom_id": request["custom_id"],
+            "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": make_response(request["body"])},
+            "error": None,
+        }, ensure_ascii=False))
+    
+    content = ("\n".join(lines) + "\n").encode("utf-8")
+    file_id = f"file-{uuid.uuid4().hex[:12]}"
+    _files[file_id] = {"meta": _file_object(file_id, "output.jsonl", len(content), "batch_output"), "content": content}
+    
+    batch.update({
+        "status": "completed",
+        "completed_at": int(time.time()),
+        "output_file_id": file_id,
+        "request_counts": {"total": len(lines), "completed": len(lines), "failed": 0},
+    })
+
+
+class Handler(BaseHTTPRequestHandler):
+    def _send(self, status: int, payload, content_type: str = "application/json"):
+        data = payload if isinstance(payload, bytes) else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def _body(self) -> bytes:
+        return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+    
+    def do_POST(self):
+        body = self._body()
+        
+        if self.path == "/v1/responses":
+            time.sleep(_latency["seconds"])
+            return self._send(200, make_response(json.loads(body)))
+        
+        if self.path == "/v1/files":
+            message = BytesParser().parsebytes(
+                b"Content-Type: " + self.headers["Content-Type"].encode() + b"\r\n\r\n" + body
+            )
+            fields = {part.get_param("name", header="content-disposition"): part for part in message.get_payload()}
+            upload = fields["file"]
+            content = upload.get_payload(decode=True)
+            purpose = fields["purpose"].get_payload(decode=True).decode()
+            file_id = f"file-{uuid.uuid4().hex[:12]}"
+            meta = _file_object(file_id, upload.get_filename() or "input.jsonl", len(content), purpose)
+            with _lock:
+                _files[file_id] = {"meta": meta, "content": content}
+            return self._send(200, meta)
+        
+        if self.path == "/v1/batches":
+            params = json.loads(body)
+            batch = {
+                "id": f"batch_{uuid.uuid4().hex[:12]}",
+                "object": "batch",
+                "endpoint": params["endpoint"],
+                "input_file_id": params["input_file_id"],
+                "completion_window": params["completion_window"],
+                "created_at": int(time.time()),
+                "status": "in_progress",
+                "metadata": params.get("metadata"),
+                "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            }
+            with _lock:
+                _batches[batch["id"]] = batch
+            return self._send(200, batch)
+        
+        self._send(404, {"error": {"message": f"Tuntematon polku {self.path}"}})
+    
+    def do_GET(self):
+        match = re.fullmatch(r"/v1/batches/([\w-]+)", self.path)
+        if match and match.group(1) in _batches:
+            batch = _batches[match.group(1)]
+            with _lock:
+                # Ensimmäinen tilakysely näkee erän kesken, seuraava valmiina
+                if batch["status"] == "in_progress" and batch.get("polled"):
+                    run_batch_job(batch)
+                batch["polled"] = True
+            return self._send(200, {k: v for k, v in batch.items() if k != "polled"})
+        
+        match = re.fullmatch(r"/v1/files/([\w-]+)/content", self.path)
+        if match and match.group(1) in _files:
+            return self._send(200, _files[match.group(1)]["content"], "application/jsonl")
+        
+        self._send(404, {"error": {"message": f"Tuntematon polku {self.path}"}})
+    
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Paikallinen OpenAI-testipalvelin")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--latency", type=float, default=0.0, help="Viive per Responses-kutsu sekunneissa")
+    args = parser.parse_args()
+    
+    _latency["seconds"] = args.latency
+    server = ThreadingHTTPServer((args.host, args.port), Handler)
+    print(f"OpenAI-testipalvelin: http://{args.host}:{args.port}/v1")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
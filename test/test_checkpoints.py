@@ -0,0 +1,42 @@
+"""
+checkpoints-testit
+Ajettavien vaiheiden valinta: puuttuvat esivaiheet ajetaan, vanhentuneet checkpointit ohitetaan
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import checkpoints
+
+
+def test_plan_single_step_uses_checkpoints():
+    """--step 6: vain vaihe 6 kun esivaiheiden checkpointit ovat olemassa"""
+    available = {"1", "3", "4", "5"}
+    assert checkpoints.plan({"6"}, available, propagate=False) == ["6"]
+    assert checkpoints.required_checkpoints(["6"]) == ["1", "4", "5"]
+
+
+def test_plan_runs_missing_prerequisites():
+    """Puuttuvat esivaiheet ajetaan, jälkimmäiset vaiheet vanhenevat"""
+    assert checkpoints.plan({"6"}, {"1", "3"}, propagate=False) == ["4", "5", "6"]
+    assert checkpoints.plan({"4"}, {"1", "3", "4", "5", "6"}) == ["4", "6", "7"]
+
+
+def test_stale_checkpoint_not_available(tmp_path, monkeypatch):
+    """Checkpoint on vanhentunut jos esivaihe on tallennettu sen jälkeen tai parametrit muuttuivat"""
+    run_dir = str(tmp_path)
+    params = {"1": {"url": "https://a.fi", "competitors": 5}}
+    clock = iter(range(100))
+    monkeypatch.setattr(checkpoints.time, "time", lambda: next(clock))
+    
+    checkpoints.save_stage(run_dir, "1", {"company_analysis": {}, "competitor_data": {}}, params["1"])
+    stage_3 = {"customers_by_company": {"A": ["Nokia Oyj"]}, "customer_fingerprints": {"A": "abc"}}
+    checkpoints.save_stage(run_dir, "3", stage_3)
+    assert checkpoints.available_stages(run_dir, params) == {"1", "3"}
+    assert checkpoints.load_stage(run_dir, "3") == stage_3
+    
+    checkpoints.save_stage(run_dir, "1", {"company_analysis": {}, "competitor_data": {}}, params["1"])
+    assert checkpoints.available_stages(run_dir, params) == {"1"}
+    assert checkpoints.available_stages(run_dir, {"1": {"url": "https://a.fi", "competitors": 3}}) == set()
@@ -0,0 +1,96 @@
+"""
+company_memo-testit
+Sama yritys lasketaan kerran, vaikka se pyydetään eri URL-muodoissa tai rinnakkain
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import company_memo
+from src import customer_extractor
+
+
+@pytest.fixture(autouse=True)
+def clean_memo():
+    company_memo.clear()
+    yield
+    company_memo.clear()
+
+
+def test_same_company_computed_once():
+    """www-etuliite, polku ja rinnakkaiset kutsut osuvat samaan tulokseen"""
+    calls = []
+    lock = threading.Lock()
+    
+    def compute(url):
+        with lock:
+            calls.append(url)
+        time.sleep(0.05)
+        return [url]
+    
+    urls = ["https://meom.fi", "https://www.meom.fi/", "https://MEOM.fi/asiakkaat", "meom.fi"]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda u: company_memo.get_or_compute("customers", u, compute, u), urls))
+    
+    assert len(calls) == 1
+    assert all(r == results[0] for r in results)
+    assert company_memo.get_stats() == {"customers": {"computed": 1, "reused": 3}}
+    
+    # Eri laji lasketaan erikseen
+    company_memo.get_or_compute("copy", "https://meom.fi", compute, "copy")
+    assert len(calls) == 2
+
+
+def test_failure_is_not_memoized():
+    """Poikkeuksen jälkeen seuraava kutsuja yrittää uudelleen"""
+    def fail():
+        raise RuntimeError("verkko")
+    
+    with pytest.raises(RuntimeError):
+        company_memo.get_or_compute("copy", "https://meom.fi", fail)
+    
+    assert company_memo.get_or_compute("copy", "https://meom.fi", lambda: "ok") == "ok"
+
+
+def test_batch_api_mode_submits_shared_company_once(monkeypatch):
+    """Kaksi kohdetta samalla kilpailijalla: yhteisen yrityksen sivut vain yhteen erään"""
+    submitted = []
+    lock = threading.Lock()
+    
+    def collect(company, deadline_seconds):
+        return [{"id": "p1", "url": company["url"], "text": f"{company['name']} asiakkaat"}]
+    
+    def run_batch(requests, stage, api_key):
+        time.sleep(0.05)
+        with lock:
+            submitted.extend(request["custom_id"] for request in requests)
+        return {
+            request["custom_id"]: type("Response", (), {"output_text": '{"customers": ["Nokia Oyj"]}'})()
+            for request in requests
+        }
+    
+    monkeypatch.setattr(customer_extractor, "_collect_company_pages", collect)
+    monkeypatch.setattr(customer_extractor, "run_batch", run_batch)
+    
+    shared = {"name": "Jaettu Oy", "url": "https://jaettu.fi"}
+    targets = [
+        [{"name": "A Oy", "url": "https://a.fi"}, shared],
+        [{"name": "B Oy", "url": "https://b.fi"}, shared],
+    ]
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        results = list(executor.map(
+            lambda companies: customer_extractor.extract_all_companies_customers(
+                companies, api_key="test", llm_mode="batch"
+            ),
+            targets
+        ))
+    
+    assert len(submitted) == 3
+    assert all(result["Jaettu Oy"] == ["Nokia Oyj"] for result in results)
+    assert company_memo.get_stats() == {"customers": {"computed": 3, "reused": 1}}
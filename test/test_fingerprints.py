@@ -0,0 +1,81 @@
+"""
+fingerprints-testit
+Päivitysajossa (--incremental) vain muuttuneiden yritysten tulokset lasketaan uudelleen
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import fingerprints
+from src import customer_extractor
+from src.fingerprints import pages_fingerprint
+from src.positioning import changed_companies, merge_positioning
+
+
+@pytest.fixture(autouse=True)
+def clean_fingerprints():
+    fingerprints.clear()
+    yield
+    fingerprints.clear()
+
+
+def test_lookup_reuses_only_unchanged_content():
+    """Sama sisältö (eri järjestyksessä) -> aiempi tulos, muuttunut -> None"""
+    pages = [{"id": "p1", "text": "Nokia Oyj"}, {"id": "p2", "text": "Kesko Oy"}]
+    fingerprints.remember("customers", "https://a.fi", pages_fingerprint(pages), ["Nokia Oyj", "Kesko Oy"])
+    
+    assert fingerprints.lookup("customers", "https://www.a.fi/", pages_fingerprint(pages[::-1])) == \
+        ["Nokia Oyj", "Kesko Oy"]
+    assert fingerprints.lookup("customers", "https://a.fi", pages_fingerprint(pages[:1])) is None
+    assert fingerprints.lookup("customers", "https://b.fi", pages_fingerprint(pages)) is None
+
+
+def test_empty_page_set_keeps_previous_result(monkeypatch):
+    """Tilapäinen hakuvirhe (ei sivuja) ei korvaa aiempia asiakkaita tyhjällä"""
+    pages = [{"id": "p1", "text": "Nokia Oyj"}]
+    fingerprints.remember("customers", "https://a.fi", pages_fingerprint(pages), ["Nokia Oyj"])
+    fingerprints.configure(enabled=True)
+    monkeypatch.setattr(customer_extractor, "_discover_candidates", lambda url, deadline: ["https://a.fi/asiakkaat"])
+    monkeypatch.setattr(customer_extractor, "_collect_pages", lambda *args: [])
+    
+    try:
+        assert customer_extractor.get_all_customers("https://a.fi", "A Oy", api_key="test") == ["Nokia Oyj"]
+    finally:
+        fingerprints.configure(enabled=False)
+    
+    companies = [{"name": "A Oy", "url": "https://a.fi"}]
+    assert fingerprints.snapshot("customers", companies) == {"A Oy": pages_fingerprint(pages)}
+    
+    # Ilman aiempaa tulosta tuntematon sisältö on tyhjä tulos
+    assert fingerprints.carry_over("customers", "https://b.fi") is None
+
+
+def _scores(company, score):
+    return {"company": company, "positioning_by_icp": [{"icp_name": "ICP 1", "score": score}]}
+
+
+def test_positioning_rescores_changed_companies_only():
+    """Vain muuttuneen copyn yritys pisteytetään, tulokset yhdistetään aiempaan"""
+    companies = [{"name": "A"}, {"name": "B"}, {"name": "C"}]
+    copy = {"success": True, "hero_headline": "Hero", "main_value_prop": "", "full_text": "Teksti"}
+    previous_copies = {"A": copy, "B": copy}
+    copies = {"A": copy, "B": {**copy, "hero_headline": "Uusi hero"}, "C": copy}
+    previous = {
+        "analysis": [_scores("A", 4), _scores("B", 3)],
+        "icp_leaders": {"ICP 1": "A"},
+        "overall_insights": "Aiemmat oivallukset",
+    }
+    
+    changed = changed_companies(companies, copies, previous_copies, previous)
+    assert [c["name"] for c in changed] == ["B", "C"]
+    
+    update = {"analysis": [_scores("B", 5), _scores("C", 2)], "icp_leaders": {"ICP 1": "B"}}
+    merged = merge_positioning(previous, update, companies, [{"name": "ICP 1"}])
+    
+    assert [item["company"] for item in merged["analysis"]] == ["A", "B", "C"]
+    assert merged["analysis"][1]["positioning_by_icp"][0]["score"] == 5
+    assert merged["icp_leaders"] == {"ICP 1": "B"}
+    assert merged["overall_insights"] == "Aiemmat oivallukset"
@@ -0,0 +1,62 @@
+"""
+html_parsing-testit
+Virheellisessä HTML:ssä backendit voivat poiketa html.parserista vain tunnetuissa kentissä
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import html_parsing
+from src.html_parsing import available_backends, parse_document, DEFAULT_BACKEND
+
+
+MALFORMED = {
+    # Sulkematon <p>: html.parser sisäkkäistää kappaleet, muut sulkevat ne HTML5:n mukaan
+    "unclosed_p": b"<html><body><h1>Otsikko</h1><p>Eka kappale<p>Toka kappale<div>Laatikko</div>"
+                  b"<p>Kolmas</body></html>",
+    # <template>: lxml.html poimii sisällön tekstiin, selectolax ohittaa tyhjän kappaleen
+    "template": b"<html><body><h1>Otsikko</h1><template><p>Piilossa</p></template><p>Nakyva</p></body></html>",
+    # Ristiin menevät tagit
+    "crossed": b"<html><body><h1>Otsikko <b>lihava</h1><p>Eka</b> teksti<p>Toka<a href='/x'>linkki</p>"
+               b"</body></html>",
+}
+
+# Kentät jotka saavat poiketa html.parserista virheellisessä HTML:ssä
+MAY_DIFFER = {
+    DEFAULT_BACKEND: set(),
+    "bs4-lxml": {"paragraphs"},
+    "lxml": {"paragraphs", "text", "copy_text"},
+    "selectolax": {"paragraphs"},
+}
+
+
+@pytest.mark.parametrize("backend", available_backends())
+def test_malformed_html_differs_only_in_known_fields(backend):
+    for name, content in MALFORMED.items():
+        reference = parse_document(content, DEFAULT_BACKEND)
+        document = parse_document(content, backend)
+        
+        differing = {field for field in reference if document[field] != reference[field]}
+        assert differing <= MAY_DIFFER[backend], f"{backend} / {name}: {differing}"
+        assert document["h1"] == reference["h1"] and document["links"] == reference["links"]
+
+
+def test_unclosed_paragraphs_per_backend():
+    """html.parser jatkaa kappaletta seuraavaan asti, HTML5-parserit sulkevat sen"""
+    content = MALFORMED["unclosed_p"]
+    
+    assert parse_document(content, DEFAULT_BACKEND)["paragraphs"][0] == "Eka kappaleToka kappaleLaatikkoKolmas"
+    for backend in set(available_backends()) - {DEFAULT_BACKEND}:
+        assert parse_document(content, backend)["paragraphs"] == ["Eka kappale", "Toka kappale", "Kolmas"]
+
+
+def test_unknown_backend_is_rejected(monkeypatch):
+    """Tuntematon backend: set_backend nostaa ValueErrorin, ympäristömuuttuja palaa oletukseen"""
+    with pytest.raises(ValueError):
+        html_parsing.set_backend("tuntematon")
+    
+    monkeypatch.setenv("MEOM_HTML_PARSER", "tuntematon")
+    assert html_parsing._initial_backend() == DEFAULT_BACKEND
@@ -0,0 +1,137 @@
+"""
+http_cache-testit
+Tuore merkintä palautetaan ilman verkkoa, vanhentunut tarkistetaan ehdollisella GET:llä (304),
+offline-tila ei mene verkkoon ja evict() poistaa vanhimmat merkinnät kokorajan alle
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+import requests
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import http_cache
+from src import http_client
+
+
+ETAG = '"v1"'
+LAST_MODIFIED = "Mon, 05 Oct 2026 10:00:00 GMT"
+
+
+class EtagHandler(BaseHTTPRequestHandler):
+    """Palauttaa 304 jos If-None-Match vastaa ETagia, kirjaa pyyntöjen otsakkeet"""
+    
+    seen = []
+    
+    def do_GET(self):
+        EtagHandler.seen.append(dict(self.headers))
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.end_headers()
+            return
+        
+        body = b"<html><body>Asiakkaat</body></html>"
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', ETAG)
+        self.send_header('Last-Modified', LAST_MODIFIED)
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path):
+    saved = dict(http_cache._config)
+    http_cache.configure(enabled=True, cache_dir=str(tmp_path), ttl=3600, offline=False)
+    yield tmp_path
+    http_cache.configure(**saved)
+    http_client.close_session()
+    http_client.reset_circuit_breakers()
+
+
+@pytest.fixture
+def url():
+    EtagHandler.seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), EtagHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/asiakkaat"
+    server.shutdown()
+    server.server_close()
+
+
+def _response(url: str, body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response._content = body
+    response.url = url
+    return response
+
+
+def test_fresh_entry_served_without_network(url):
+    first = http_client.fetch(url)
+    second = http_client.fetch(url)
+    
+    assert not getattr(first, 'from_cache', False) and second.from_cache
+    assert second.content == first.content
+    assert len(EtagHandler.seen) == 1
+
+
+def test_stale_entry_revalidated_with_304(url):
+    """TTL:n jälkeen lähetetään If-None-Match/If-Modified-Since ja 304 palauttaa välimuistin rungon"""
+    http_client.fetch(url)
+    entry = http_cache.load(url)
+    assert http_cache.conditional_headers(entry) == {
+        "If-None-Match": ETAG,
+        "If-Modified-Since": LAST_MODIFIED,
+    }
+    
+    http_cache.configure(ttl=0)
+    validated_at = entry["meta"]["validated_at"]
+    response = http_client.fetch(url)
+    
+    assert len(EtagHandler.seen) == 2 and EtagHandler.seen[1].get('If-None-Match') == ETAG
+    assert response.status_code == 200 and response.from_cache
+    assert response.content == b"<html><body>Asiakkaat</body></html>"
+    assert http_cache.load(url)["meta"]["validated_at"] > validated_at
+
+
+def test_offline_serves_stale_and_misses_raise(url):
+    http_client.fetch(url)
+    http_cache.configure(ttl=0, offline=True)
+    
+    assert http_client.fetch(url).from_cache
+    with pytest.raises(http_cache.CacheMissError):
+        http_client.fetch(url + "/puuttuu")
+    assert len(EtagHandler.seen) == 1
+
+
+def test_evict_removes_least_recently_used_over_limit():
+    """Kokorajan ylittyessä poistetaan vanhimmin käytetyt, liian vanhat poistetaan aina"""
+    urls = [f"https://a.fi/{i}" for i in range(4)]
+    now = time.time()
+    
+    for i, u in enumerate(urls):
+        http_cache.save(u, _response(u, b"x" * 100))
+        meta_path, _ = http_cache._paths(u)
+        os.utime(meta_path, (now - 100 + i, now - 100 + i))
+    
+    # Käyttö päivittää LRU-järjestyksen: urls[0] on nyt uusin
+    http_cache.load(urls[0])
+    
+    http_cache.configure(max_bytes=250)
+    assert http_cache.evict() == 2
+    assert [http_cache.load(u) is not None for u in urls] == [True, False, False, True]
+    
+    http_cache.configure(max_bytes=10_000, max_age=50)
+    meta_path, _ = http_cache._paths(urls[3])
+    os.utime(meta_path, (now - 60, now - 60))
+    assert http_cache.evict() == 1
+    assert http_cache.load(urls[3]) is None and http_cache.load(urls[0]) is not None
@@ -0,0 +1,104 @@
+"""
+http_client-testit
+Aikabudjetin loppuminen kesken haun ei laukaise katkaisijaa eikä jää sivuvarastoon,
+eikä kokorajaan katkaistua runkoa tallenneta välimuistiin
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import http_cache
+from src import http_client
+from src import page_store
+
+
+class StallingHandler(BaseHTTPRequestHandler):
+    """Lähettää otsakkeet ja alun rungosta, sitten pysähtyy"""
+    
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Content-Length', '100000')
+        self.end_headers()
+        self.wfile.write(b"<html><body>" + b"x" * 1000)
+        self.wfile.flush()
+        time.sleep(1.5)
+    
+    def log_message(self, *args):
+        pass
+
+
+class LargeHandler(BaseHTTPRequestHandler):
+    """Palauttaa 10 kt:n sivun ilman Content-Lengthiä"""
+    
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html')
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        self.wfile.write(b"<html><body>" + b"x" * 10000 + b"</body></html>")
+    
+    def log_message(self, *args):
+        pass
+
+
+def _serve(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+@pytest.fixture(autouse=True)
+def clean_http(tmp_path):
+    saved = dict(http_cache._config)
+    http_cache.configure(enabled=False, cache_dir=str(tmp_path))
+    yield
+    http_cache.configure(enabled=saved["enabled"], cache_dir=saved["cache_dir"])
+    http_client.close_session()
+    http_client.reset_circuit_breakers()
+    page_store.clear()
+
+
+@pytest.fixture
+def stalling_url():
+    server = _serve(StallingHandler)
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+
+
+def test_deadline_mid_read_is_not_a_host_failure(stalling_url):
+    """Budjetin lyhentämä lukutimeout -> DeadlineExceededError, ei katkaisijaa eikä muistettua virhettä"""
+    for _ in range(http_client.BREAKER_THRESHOLD):
+        with pytest.raises(http_client.DeadlineExceededError):
+            page_store.get_page(stalling_url, deadline=time.monotonic() + 0.3)
+    
+    assert http_client.is_host_available(stalling_url)
+    
+    with page_store._pages_lock:
+        assert page_store.canonical_url(stalling_url) not in page_store._pages
+
+
+def test_truncated_body_is_not_cached():
+    """max_bytes-rajaan katkaistu vastaus palautetaan, mutta ei tallenneta välimuistiin"""
+    server = _serve(LargeHandler)
+    url = f"http://127.0.0.1:{server.server_address[1]}/"
+    http_cache.configure(enabled=True)
+    
+    try:
+        response = http_client.fetch(url, max_bytes=1000)
+        assert response.truncated and len(response.content) == 1000
+        assert http_cache.load(url) is None
+        
+        response = http_client.fetch(url)
+        assert not response.truncated
+        assert http_cache.load(url) is not None
+    finally:
+        server.shutdown()
+        server.server_close()
@@ -0,0 +1,63 @@
+"""
+json_repair-testit
+Mallin vastauksissa esiintyvät rikkinäiset JSONit: koodiaidat, selitystekstit, pilkut ja katkenneet vastaukset
+"""
+
+import os
+import sys
+import json
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.json_repair import parse_json, parse_json_object
+from src.positioning import parse_positioning
+from src.customer_extractor import parse_customer_names, parse_customer_batch
+
+
+def test_valid_json():
+    """Validi JSON jäsennetään sellaisenaan"""
+    assert parse_json('{"customers": ["Nokia Oyj"]}') == {"customers": ["Nokia Oyj"]}
+
+
+def test_code_fence_and_trailing_commas():
+    """Koodiaita ja perässä olevat pilkut poistetaan"""
+    text = '```json\n{"customers": ["A", "B",],}\n```'
+    assert parse_json(text) == {"customers": ["A", "B"]}
+
+
+def test_surrounding_text():
+    """Selitysteksti JSONin ympärillä ohitetaan"""
+    text = 'Tässä vastaus:\n{"icps": [{"name": "ICP {1}"}]}\nToivottavasti auttaa!'
+    assert parse_json(text) == {"icps": [{"name": "ICP {1}"}]}
+
+
+def test_truncated_json():
+    """Katkennut vastaus suljetaan, keskeneräinen avain pudotetaan"""
+    assert parse_json('{"a": {"b": [1, 2,') == {"a": {"b": [1, 2]}}
+    assert parse_json('{"a": 1, "b') == {"a": 1}
+    assert parse_json('{"a": "kesken') == {"a": "kesken"}
+
+
+def test_unrepairable_raises_decode_error():
+    """Korjauskelvoton vastaus nostaa JSONDecodeErrorin (kutsujat käsittelevät sen)"""
+    with pytest.raises(json.JSONDecodeError):
+        parse_json("En löytänyt yhtään asiakasta.")
+
+
+def test_positioning_leaders_list_to_dict():
+    """Skeeman icp_leaders-lista muunnetaan raportin käyttämäksi dictiksi"""
+    text = '{"analysis": [], "icp_leaders": [{"icp_name": "ICP 1", "company": "Yritys A"}], "overall_insights": ""}'
+    assert parse_positioning(text)["icp_leaders"] == {"ICP 1": "Yritys A"}
+
+
+def test_list_response_is_rejected_as_value_error():
+    """Objektia odottavat vaiheet nostavat ValueErrorin listasta, eivät AttributeError/TypeErroria"""
+    assert parse_json_object('```json\n{"icps": []}\n```', "Vaiheen 4 vastaus") == {"icps": []}
+    
+    with pytest.raises(ValueError, match="Vaiheen 4 vastaus ei ole JSON-objekti"):
+        parse_json_object('[{"name": "ICP 1"}]', "Vaiheen 4 vastaus")
+    
+    for parse in (parse_positioning, parse_customer_names, lambda text: parse_customer_batch(text, ["p1"])):
+        with pytest.raises(ValueError):
+            parse('["Nokia Oyj"]')
@@ -0,0 +1,137 @@
+"""
+llm_cache-testit
+Avain ei riipu parametrien järjestyksestä, osuma palauttaa saman vastauksen,
+vanhentunut tai keskeneräinen vastaus ei päädy käyttöön ja LRU-siivous pitää kokorajan
+"""
+
+import os
+import sys
+import time
+import pytest
+from openai.types.responses import Response
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import llm_cache
+
+
+@pytest.fixture(autouse=True)
+def cache_path(tmp_path):
+    saved = dict(llm_cache._config)
+    path = tmp_path / "llm.sqlite3"
+    llm_cache.configure(enabled=True, path=str(path), ttl=3600, max_bytes=10_000_000)
+    yield path
+    llm_cache.configure(**saved)
+
+
+def _request(prompt: str) -> dict:
+    return {
+        "model": "gpt-5",
+        "tools": [{"type": "web_search"}],
+        "input": prompt,
+    }
+
+
+def _response(response_id: str, status: str = "completed") -> Response:
+    return Response.model_validate({
+        "id": response_id,
+        "created_at": 0,
+        "model": "gpt-5",
+        "object": "response",
+        "output": [],
+        "parallel_tool_calls": False,
+        "tool_choice": "auto",
+        "tools": [],
+        "status": status,
+    })
+
+
+def _set_times(request: dict, created: float = None, last_used: float = None):
+    """Siirtää merkinnän aikaleimoja (kuten os.utime http_cache-testeissä)"""
+    with llm_cache._lock:
+        conn = llm_cache._connection()
+        key = llm_cache.cache_key(request)
+        if created is not None:
+            conn.execute("UPDATE responses SET created = ? WHERE key = ?", (created, key))
+        if last_used is not None:
+            conn.execute("UPDATE responses SET last_used = ? WHERE key = ?", (last_used, key))
+        conn.commit()
+
+
+def test_cache_key_ignores_key_order():
+    request = _request("Listaa Nokian asiakkaat")
+    reordered = dict(reversed(list(request.items())))
+    
+    assert llm_cache.cache_key(request) == llm_cache.cache_key(reordered)
+    assert llm_cache.cache_key(request) != llm_cache.cache_key(_request("Listaa Konecranesin asiakkaat"))
+    assert llm_cache.cache_key(request) != llm_cache.cache_key({**request, "model": "gpt-5-mini"})
+
+
+def test_save_and_load_hit(cache_path):
+    request = _request("Listaa Nokian asiakkaat")
+    assert llm_cache.load(request) is None
+    
+    llm_cache.save(request, _response("resp_1"), stage="customers")
+    hit = llm_cache.load(dict(reversed(list(request.items()))))
+    
+    assert isinstance(hit, Response) and hit.id == "resp_1"
+    assert cache_path.exists()
+    
+    # Uusi yhteys (esim. seuraava ajo) lukee saman tiedoston
+    llm_cache.configure(path=str(cache_path))
+    assert llm_cache.load(request).id == "resp_1"
+
+
+def test_incomplete_and_disabled_are_skipped():
+    """Keskeneräistä vastausta ei tallenneta, pois kytketty välimuisti ei lue eikä kirjoita"""
+    request = _request("Listaa Nokian asiakkaat")
+    
+    llm_cache.save(request, _response("resp_1", status="incomplete"))
+    assert llm_cache.load(request) is None
+    
+    llm_cache.configure(enabled=False)
+    llm_cache.save(request, _response("resp_2"))
+    llm_cache.configure(enabled=True)
+    assert llm_cache.load(request) is None
+    
+    llm_cache.save(request, _response("resp_3"))
+    llm_cache.configure(enabled=False)
+    assert llm_cache.load(request) is None
+
+
+def test_expired_entry_is_deleted():
+    request = _request("Listaa Nokian asiakkaat")
+    llm_cache.save(request, _response("resp_1"))
+    _set_times(request, created=time.time() - 7200)
+    
+    assert llm_cache.load(request) is None
+    
+    # Poistettu: TTL:n pidentäminen ei tuo sitä takaisin
+    llm_cache.configure(ttl=10_000)
+    assert llm_cache.load(request) is None
+
+
+def test_evict_removes_least_recently_used_over_limit():
+    """Kokorajan ylittyessä poistetaan vähiten käytetyt, osuma päivittää järjestyksen"""
+    requests_ = [_request(f"Yritys {i}") for i in range(3)]
+    now = time.time()
+    
+    for i, request in enumerate(requests_):
+        llm_cache.save(request, _response(f"resp_{i}"))
+        _set_times(request, last_used=now - 100 + i)
+    
+    size = len(_response("resp_0").model_dump_json())
+    
+    # Osuma: requests_[0] on nyt uusin
+    assert llm_cache.load(requests_[0]) is not None
+    
+    llm_cache.configure(max_bytes=2 * size)
+    assert llm_cache.evict() == 1
+    assert [llm_cache.load(r) is not None for r in requests_] == [True, False, True]
+    
+    # save() siivoaa myös itse: yllä requests_[2] luettiin viimeisenä, joten requests_[0] poistuu
+    llm_cache.save(_request("Yritys 3"), _response("resp_3"))
+    assert llm_cache.load(requests_[2]) is not None and llm_cache.load(requests_[0]) is None
+    
+    llm_cache.clear()
+    assert llm_cache.load(requests_[0]) is None
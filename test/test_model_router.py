@@ -0,0 +1,31 @@
+"""
+model_router-testit
+Vaiheen malli ja reasoning effort päätyvät responses.create:n parametreiksi
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import model_router
+
+
+def test_route_params():
+    """Oletus on gpt-5 ilman reasoning-parametria, konfiguraatio vaihtaa vain annetun vaiheen"""
+    assert model_router.route("3") == {"model": "gpt-5"}
+    
+    model_router.configure({"3": {"model": "gpt-5-mini", "reasoning_effort": "minimal"}})
+    try:
+        assert model_router.route("3") == {"model": "gpt-5-mini", "reasoning": {"effort": "minimal"}}
+        assert model_router.route("4") == {"model": "gpt-5"}
+    finally:
+        model_router.configure(model_router.DEFAULT_ROUTES)
+
+
+@pytest.mark.parametrize("routes", [{"2": "gpt-5"}, {"3": {"reasoning_effort": "low"}}, {"3": {"model": "x", "reasoning_effort": "max"}}])
+def test_invalid_config(routes):
+    """Virheellinen vaihe, puuttuva malli tai tuntematon effort hylätään"""
+    with pytest.raises(ValueError):
+        model_router.configure(routes)
@@ -0,0 +1,111 @@
+"""
+page_discovery-testit
+Listaussivu voittaa yksittäisen casen, vieraat domainit ja tiedostot ohitetaan,
+sitemap löytyy robots.txt:n kautta ja indeksistä seurataan sivu-sitemapeja
+"""
+
+import os
+import sys
+import threading
+import pytest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import http_cache
+from src import http_client
+from src import page_discovery
+from src.page_discovery import score_candidate, rank_candidates, find_sitemap_urls
+
+
+def test_score_candidate():
+    """Avainsana polun lopussa ja matala polku antavat eniten pisteitä"""
+    assert score_candidate("https://a.fi/asiakkaat") == 12
+    assert score_candidate("https://a.fi/asiakkaat/nokia") == 9
+    assert score_candidate("https://a.fi/työmme") == 8
+    assert score_candidate("https://a.fi/yritys", "Asiakkaamme") == 5
+    assert score_candidate("https://a.fi/yhteystiedot", "Ota yhteyttä") == 0
+
+
+def test_rank_candidates_filters_and_orders():
+    links = [
+        {"href": "/asiakkaat/nokia", "text": "Nokia"},
+        {"href": "/asiakkaat/#logot", "text": "Asiakkaat"},
+        {"href": "https://toinen.fi/asiakkaat", "text": "Asiakkaat"},
+        {"href": "/referenssit/esite.pdf", "text": "Referenssit"},
+        {"href": "/tag/case/", "text": "Case"},
+        {"href": "/", "text": "Asiakkaat"},
+        {"href": "mailto:myynti@a.fi", "text": "Asiakkaat"},
+        {"href": "/yhteystiedot", "text": "Yhteystiedot"},
+    ]
+    sitemap_urls = ["https://www.a.fi/referenssit", "https://a.fi/asiakkaat/", "https://a.fi/blogi/kesa"]
+    
+    ranked = rank_candidates("https://a.fi/", links, sitemap_urls)
+    
+    # Sama sivu linkkitekstillä pisteytetään kerran (paras), tasapisteissä lyhyempi URL ensin
+    assert ranked == [
+        "https://a.fi/asiakkaat/",
+        "https://www.a.fi/referenssit",
+        "https://a.fi/asiakkaat/nokia",
+    ]
+    assert rank_candidates("https://a.fi/", links, sitemap_urls, limit=1) == ["https://a.fi/asiakkaat/"]
+    assert rank_candidates("https://a.fi/", [{"href": "/yhteystiedot", "text": ""}], []) == []
+
+
+class SitemapHandler(BaseHTTPRequestHandler):
+    """robots.txt -> sitemap-indeksi -> alisitemapit"""
+    
+    seen = []
+    
+    def do_GET(self):
+        SitemapHandler.seen.append(self.path)
+        base = f"http://{self.headers['Host']}"
+        
+        if self.path == "/robots.txt":
+            body = f"User-agent: *\nDisallow: /wp-admin/\nSitemap: {base}/sitemap_index.xml\n"
+        elif self.path == "/sitemap_index.xml":
+            children = [f"post-sitemap{i}.xml" for i in range(3)] + ["page-sitemap.xml"]
+            locs = "".join(f"<sitemap><loc>{base}/{child}</loc></sitemap>" for child in children)
+            body = f'<?xml version="1.0"?><sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{locs}</sitemapindex>'
+        elif "sitemap" in self.path:
+            name = self.path.strip("/").split("-")[0]
+            body = (f'<?xml version="1.0"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+                    f'<url><loc>{base}/{name}/1</loc></url></urlset>')
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        
+        data = body.encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+    
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def site(tmp_path):
+    saved = dict(http_cache._config)
+    http_cache.configure(enabled=False, cache_dir=str(tmp_path))
+    SitemapHandler.seen = []
+    server = ThreadingHTTPServer(("127.0.0.1", 0), SitemapHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+    server.server_close()
+    http_cache.configure(**saved)
+    http_client.close_session()
+    http_client.reset_circuit_breakers()
+
+
+def test_sitemap_index_prefers_page_sitemaps(site):
+    """Indeksistä luetaan MAX_CHILD_SITEMAPS alisitemapia, sivu-sitemap ensin"""
+    urls = find_sitemap_urls(site)
+    
+    assert len(urls) == page_discovery.MAX_CHILD_SITEMAPS
+    assert urls[0] == site + "page/1"
+    assert SitemapHandler.seen[:3] == ["/robots.txt", "/sitemap_index.xml", "/page-sitemap.xml"]
+    assert "/post-sitemap2.xml" not in SitemapHandler.seen
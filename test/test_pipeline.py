@@ -0,0 +1,55 @@
+"""
+pipeline-testit
+Riippumattomat vaiheet ajetaan rinnakkain ja kriittinen polku seuraa riippuvuuksia
+"""
+
+import os
+import sys
+import time
+import threading
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import pipeline
+
+
+def _runners(log: list, delays: dict = None, fail: str = None):
+    lock = threading.Lock()
+    
+    def make(stage):
+        def run(inputs):
+            assert set(inputs) == set(pipeline.STAGE_INPUTS[stage])
+            with lock:
+                log.append(("start", stage))
+            time.sleep((delays or {}).get(stage, 0.0))
+            with lock:
+                log.append(("end", stage))
+            if stage == fail:
+                return None
+            return {name: stage for name in pipeline.STAGE_OUTPUTS[stage]}
+        return run
+    
+    return {stage: make(stage) for stage in pipeline.STAGE_ORDER}
+
+
+def test_stage_5_overlaps_3_and_4():
+    """Vaihe 5 käynnistyy vaiheen 1 jälkeen odottamatta vaiheita 3 ja 4"""
+    log = []
+    state = {}
+    timings = pipeline.run_stages(pipeline.STAGE_ORDER, _runners(log, {"3": 0.2, "4": 0.2}), state)
+    
+    assert log.index(("start", "5")) < log.index(("end", "3"))
+    assert log.index(("end", "5")) < log.index(("start", "6"))
+    assert state["positioning_data"] == "6"
+    assert pipeline.critical_path(timings) == ["1", "3", "4", "6", "7"]
+
+
+def test_failed_stage_stops_dependents():
+    """None-tulos keskeyttää ajon eikä riippuvia vaiheita käynnistetä"""
+    log = []
+    with pytest.raises(pipeline.StageFailed):
+        pipeline.run_stages(pipeline.STAGE_ORDER, _runners(log, fail="3"), {})
+    
+    assert ("start", "4") not in log
+    assert ("start", "6") not in log
@@ -0,0 +1,51 @@
+"""
+prompts-testit
+Promptin alku (ohjeet) pysyy tavulleen samana syötteestä riippumatta, jotta prompt caching osuu
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.prompts import PREFIXES, DATA_HEADER, build_prompt
+from src.customer_extractor import build_customer_prompt, build_customer_batch_prompt
+from src.positioning import build_positioning_prompt
+
+
+def _static_part(template: str) -> bytes:
+    return (PREFIXES[template] + DATA_HEADER).encode("utf-8")
+
+
+@pytest.mark.parametrize("template", sorted(PREFIXES))
+def test_prefix_is_byte_stable(template):
+    """Eri data ei muuta prefiksiä, ja data tulee vasta otsikon jälkeen"""
+    first = build_prompt(template, {"YRITYS": "Nokia Oyj", "TEKSTI": "a" * 50}).encode("utf-8")
+    second = build_prompt(template, {"YRITYS": "Kesko Oy"}).encode("utf-8")
+    
+    assert first.startswith(_static_part(template))
+    assert second.startswith(_static_part(template))
+    assert b"Nokia" not in _static_part(template)
+
+
+def test_customer_prompts_share_prefix():
+    """Vaiheen 3 promptit eri yrityksille ja sivuille alkavat samalla prefiksillä"""
+    a = build_customer_prompt("Asiakkaitamme ovat Nokia Oyj ja Kesko Oy. " * 5, "Yritys A")
+    b = build_customer_prompt("Referenssit: Fiskars Oyj. " * 5, "Yritys B")
+    assert a.startswith(PREFIXES["3"] + DATA_HEADER)
+    assert b.startswith(PREFIXES["3"] + DATA_HEADER)
+    
+    pages = [{"id": "c0-p1", "text": "Nokia Oyj " * 10}]
+    assert build_customer_batch_prompt(pages, "Yritys A").startswith(PREFIXES["3_batch"] + DATA_HEADER)
+
+
+def test_positioning_prompt_data_last():
+    """Yritykset ja ICP:t tulevat ohjeiden perään"""
+    prompt = build_positioning_prompt(
+        [{"name": "Yritys A"}],
+        [{"name": "ICP 1"}],
+        {"Yritys A": {"success": True, "hero_headline": "Hero", "main_value_prop": "", "full_text": "Teksti"}}
+    )
+    assert prompt.startswith(PREFIXES["6"] + DATA_HEADER)
+    assert prompt.index("=== Yritys A ===") > len(PREFIXES["6"])
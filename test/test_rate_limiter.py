@@ -0,0 +1,57 @@
+"""
+rate_limiter-testit
+Token bucket kieltäytyy odottamasta deadlinen yli, 429/503 hidastaa vain kyseistä hostia ja nopeus palautuu
+"""
+
+import os
+import sys
+import time
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import rate_limiter
+
+
+@pytest.fixture(autouse=True)
+def clean_buckets():
+    rate_limiter.configure(rate=rate_limiter.DEFAULT_RATE, burst=rate_limiter.DEFAULT_BURST)
+    yield
+    rate_limiter.configure(rate=rate_limiter.DEFAULT_RATE, burst=rate_limiter.DEFAULT_BURST)
+
+
+def test_acquire_refuses_wait_past_deadline():
+    """Purske käytetään heti, seuraavaa tokenia ei odoteta jos se ei ehdi ennen deadlinea"""
+    rate_limiter.configure(rate=1.0, burst=2)
+    url = "https://a.fi/sivu"
+    
+    assert rate_limiter.acquire(url) and rate_limiter.acquire(url)
+    assert not rate_limiter.acquire(url, deadline=time.monotonic() + 0.2)
+    
+    # Eri host ei odota
+    assert rate_limiter.acquire("https://b.fi/", deadline=time.monotonic() + 0.01)
+
+
+def test_429_slows_down_host_and_caps_retry_after():
+    """Retry-After rajataan MAX_RETRY_AFTER:iin, nopeus puolittuu ja palautuu onnistumisista"""
+    url = "https://a.fi/"
+    
+    assert rate_limiter.record_response(url, 429, "3600") == rate_limiter.MAX_RETRY_AFTER
+    assert not rate_limiter.acquire(url, deadline=time.monotonic() + 1)
+    assert rate_limiter.get_wait_stats()["a.fi"]["rate"] == rate_limiter.DEFAULT_RATE / 2
+    
+    assert rate_limiter.record_response(url, 503) == rate_limiter.DEFAULT_BACKOFF
+    assert rate_limiter.get_wait_stats()["a.fi"]["rate"] == rate_limiter.DEFAULT_RATE / 4
+    
+    for _ in range(20):
+        assert rate_limiter.record_response(url, 200) is None
+    assert rate_limiter.get_wait_stats()["a.fi"]["rate"] == rate_limiter.DEFAULT_RATE
+    
+    # Toinen host ei hidastu
+    assert "b.fi" not in rate_limiter.get_wait_stats()
+
+
+@pytest.mark.parametrize("rate, burst", [(0, None), (-1.0, None), (float("nan"), None), (None, 0)])
+def test_configure_rejects_invalid_values(rate, burst):
+    with pytest.raises(ValueError):
+        rate_limiter.configure(rate=rate, burst=burst)
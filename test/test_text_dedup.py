@@ -0,0 +1,59 @@
+"""
+text_dedup-testit
+Sama URL, sama normalisoitu teksti tai lähes sama teksti (Jaccard >= kynnys) on duplikaatti
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src.text_dedup import PageDeduplicator, shingles, jaccard, NEAR_DUPLICATE_THRESHOLD
+
+
+def _words(count: int, prefix: str = "sana") -> list[str]:
+    return [f"{prefix}{i}" for i in range(count)]
+
+
+def test_shingles_and_jaccard():
+    """Lyhyt teksti on yksi shingle, normalisointi ei vaikuta"""
+    assert shingles("Nokia  Oyj") == {"nokia oyj"}
+    assert shingles("") == set()
+    assert len(shingles(" ".join(_words(10)))) == 6
+    
+    assert jaccard(set(), set()) == 1.0
+    assert jaccard({"a", "b"}, {"b", "c"}) == 1 / 3
+
+
+def test_duplicates_by_url_hash_and_near():
+    dedup = PageDeduplicator()
+    text = " ".join(_words(200))
+    
+    assert dedup.check("https://a.fi/asiakkaat", text) is None
+    
+    # Uudelleenohjaus samaan sivuun (hostin kirjainkoko, kauttaviiva, fragmentti)
+    assert dedup.check("https://A.fi/asiakkaat/#logot", "muu teksti") == "url"
+    
+    # Sama teksti eri kirjainkoolla ja välilyönneillä
+    assert dedup.check("https://a.fi/referenssit", "  " + text.upper().replace(" ", "\n")) == "hash"
+    
+    # Yksi sana vaihdettu: 191/201 shingleä yhteisiä (0.95) -> lähes-duplikaatti
+    near = _words(200)
+    near[100] = "muutettu"
+    assert dedup.check("https://a.fi/cases", " ".join(near)) == "near"
+
+
+def test_below_threshold_is_new_page():
+    """Kymmenesosa sanoista vaihdettu: samankaltaisuus jää kynnyksen alle"""
+    original = _words(200)
+    changed = original[:100] + _words(20, "uusi") + original[120:]
+    assert jaccard(shingles(" ".join(original)), shingles(" ".join(changed))) < NEAR_DUPLICATE_THRESHOLD
+    
+    dedup = PageDeduplicator()
+    assert dedup.check("https://a.fi/asiakkaat", " ".join(original)) is None
+    assert dedup.check("https://a.fi/referenssit", " ".join(changed)) is None
+    
+    # Tiukempi kynnys on kutsujan valittavissa
+    strict = PageDeduplicator(threshold=0.5)
+    assert strict.check("https://a.fi/asiakkaat", " ".join(original)) is None
+    assert strict.check("https://a.fi/referenssit", " ".join(changed)) == "near"
@@ -0,0 +1,49 @@
+"""
+tracing-testit
+Spanit kirjataan vain kun jäljitys on päällä, ja vienti on Chrome trace -muotoa
+"""
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from src import tracing
+
+
+@pytest.fixture(autouse=True)
+def clean_tracing():
+    tracing.clear()
+    yield
+    tracing.configure(enabled=False)
+    tracing.clear()
+
+
+def test_disabled_records_nothing():
+    with tracing.span("GET", "http", url="https://a.fi") as attrs:
+        attrs["bytes"] = 10
+    assert tracing.get_spans() == []
+
+
+def test_spans_export_as_chrome_trace():
+    """Sisäkkäiset spanit, attribuutit ja poikkeus päätyvät trace-tapahtumiin"""
+    tracing.configure(enabled=True)
+    
+    with tracing.span("Vaihe 3", "stage", stage="3"):
+        with tracing.span("GET", "http", url="https://a.fi") as attrs:
+            attrs["bytes"] = 10
+        with pytest.raises(ValueError):
+            with tracing.span("parse", "parse"):
+                raise ValueError("rikki")
+    
+    events = [e for e in tracing.to_chrome_trace()["traceEvents"] if e["ph"] == "X"]
+    assert [e["name"] for e in events] == ["Vaihe 3", "GET", "parse"]
+    
+    stage, get, parse = events
+    assert get["args"] == {"url": "https://a.fi", "bytes": 10}
+    assert parse["args"]["error"] == "ValueError"
+    assert stage["ts"] <= get["ts"] and get["ts"] + get["dur"] <= stage["ts"] + stage["dur"]
+    
+    summary = tracing.summarize()
+    assert summary["http"]["count"] == 1 and set(summary) == {"stage", "http", "parse"}